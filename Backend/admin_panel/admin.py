@@ -1,5 +1,9 @@
+from collections import Counter
+
 from django.contrib import admin
 from django.contrib.admin import AdminSite
+from django.db import transaction
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
 class TaskFlowAdminSite(AdminSite):
@@ -24,6 +28,11 @@ from board.models import Board
 from task.models import Task
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.admin import UserAdmin, GroupAdmin
+from board.counters import adjust_task_counts, task_count_key
+from board.revisions import record_board_change, record_task_change
+from board.snapshots import END, KEEP, patch_board_snapshot
+from task.ordering import check_position, position_at_end
+from task.search import search_filter, search_terms
 
 # Custom admin classes
 class WorkspaceAdmin(admin.ModelAdmin):
@@ -32,6 +41,8 @@ class WorkspaceAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
+    # Bumped by every change, never edited
+    readonly_fields = ('revision',)
 
 class UserWorkspaceAdmin(admin.ModelAdmin):
     list_display = ('user', 'workspace', 'role', 'join_date')
@@ -48,6 +59,19 @@ class BoardAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
     raw_id_fields = ('workspace',)
+    readonly_fields = ('revision',)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Tasks keep a copy of their board's workspace: boards don't move
+        if obj is not None:
+            return self.readonly_fields + ('workspace',)
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if change:
+                patch_board_snapshot(obj.id, {"name": obj.name, "updated_at": obj.updated_at})
 
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'board', 'priority', 'status', 'assigned_to', 'created_at', 'updated_at')
@@ -72,6 +96,58 @@ class TaskAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('created_at', 'updated_at')
 
+    # Admin edits (including list_editable) are saved like the API saves
+    # them, so counters, the change feed and board snapshots stay in step
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            previous, after = None, END
+            if change:
+                before = Task.objects.only("board", "status", "priority").get(id=obj.id)
+                previous = task_count_key(before)
+                if (before.board_id, before.status) == (obj.board_id, obj.status):
+                    after = KEEP
+            # A new task, or one changing column, goes to the bottom of it
+            if after == END:
+                obj.position = position_at_end(obj.board_id, obj.status)
+            super().save_model(request, obj, form, change)
+            check_position(obj)
+            if not change:
+                action = "created"
+            elif previous[0] != obj.board_id:
+                action = "moved"
+            else:
+                action = "updated"
+            record_task_change(obj, action, previous=previous, after=after)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Names and descriptions through the full-text index instead of
+        # LIKE scans of every task; board names are few enough to scan
+        if not search_terms(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(
+            search_filter(search_term) | Q(board__name__icontains=search_term.strip())
+        ), False
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            previous = task_count_key(obj)
+            # Deleted through a queryset so the instance keeps its id
+            Task.objects.filter(id=obj.id).delete()
+            record_task_change(obj, "deleted", previous=previous)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            tasks = list(queryset.values_list("id", "board_id", "status", "priority"))
+            if not tasks:
+                return
+            queryset.delete()
+            adjust_task_counts(removed=Counter((board_id, status, priority) for _, board_id, status, priority in tasks))
+            record_board_change(
+                *{board_id for _, board_id, _, _ in tasks},
+                tasks=[(board_id, task_id, "deleted") for task_id, board_id, _, _ in tasks],
+            )
+
 # Register models with the custom admin site
 admin_site.register(User, UserAdmin)
 admin_site.register(Group, GroupAdmin)
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Board event streams (/board/<id>/events) hold a connection open per client.
+# Serve them with an ASGI server (e.g. uvicorn backend.asgi:application) so a
+# worker keeps thousands of streams on its event loop. Under WSGI each stream
+# would pin a thread for good, so the endpoint answers 501 there.
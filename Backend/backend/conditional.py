@@ -0,0 +1,30 @@
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+
+def revision_etag(request, *markers):
+    """
+    Strong ETag for a representation identified by version ``markers``
+    (e.g. model ids and revision counters) and the request's query string,
+    which selects between representations (fields, pages, columns).
+    """
+    query = hashlib.sha1(request.GET.urlencode().encode()).hexdigest()[:12]
+    return quote_etag("-".join(str(marker) for marker in markers) + "-" + query)
+
+
+def not_modified(request, etag):
+    """Return a 304 response if the client already holds ``etag``, else None."""
+    client_etags = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in client_etags or "*" in client_etags:
+        return with_etag(HttpResponseNotModified(), etag)
+    return None
+
+
+def with_etag(response, etag):
+    response["ETag"] = etag
+    # Let browsers keep the body but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
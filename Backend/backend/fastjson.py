@@ -0,0 +1,64 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from backend.timing import phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+# Types orjson does not know (Decimal, timedelta, lazy strings) go through
+# the same conversions JsonResponse used to apply
+_django_encoder = DjangoJSONEncoder()
+
+if orjson is not None:
+    # Datetimes, dates, times and UUIDs are encoded natively; aware UTC
+    # datetimes keep the "Z" suffix JsonResponse produced. One difference
+    # on the wire: times keep all six fractional digits, where
+    # DjangoJSONEncoder cut them to milliseconds ("...:51.616241Z" rather
+    # than "...:51.616Z"). Both are ISO 8601 and parse to the same instant
+    # in browsers, whose Date only holds milliseconds. Cutting them here
+    # would take a Python call per datetime and make encoding a board
+    # about five times slower.
+    _OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value):
+        """Encode ``value`` to JSON bytes."""
+        return orjson.dumps(value, default=_django_encoder.default, option=_OPTIONS)
+
+    def loads(data):
+        """
+        Decode JSON from bytes or str. Raises ``json.JSONDecodeError``
+        (orjson's error subclasses it), like ``json.loads``.
+        """
+        return orjson.loads(data)
+
+else:
+
+    def dumps(value):
+        """Encode ``value`` to JSON bytes."""
+        return json.dumps(value, cls=DjangoJSONEncoder).encode()
+
+    def loads(data):
+        return json.loads(data)
+
+
+class JsonResponse(HttpResponse):
+    """
+    Drop-in replacement for ``django.http.JsonResponse`` encoding with
+    orjson. Like Django's, ``safe=True`` only accepts a dict.
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        with phase("json"):
+            content = dumps(data)
+        super().__init__(content=content, **kwargs)
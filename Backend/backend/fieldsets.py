@@ -0,0 +1,38 @@
+class InvalidFieldset(ValueError):
+    """Raised when ?fields= or ?exclude= names an unknown field."""
+
+
+def _parse(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def requested_fields(request, available):
+    """
+    Return the fields selected by ``?fields=`` and/or ``?exclude=``
+    (comma-separated) in ``available``'s order, or None when the request
+    asks for the full representation.
+    """
+    fields = request.GET.get("fields")
+    exclude = request.GET.get("exclude")
+    if fields is None and exclude is None:
+        return None
+
+    selected = _parse(fields) if fields is not None else list(available)
+    excluded = _parse(exclude) if exclude is not None else []
+    unknown = [name for name in selected + excluded if name not in available]
+    if unknown:
+        raise InvalidFieldset(f"Unknown field(s): {', '.join(unknown)}")
+
+    return tuple(
+        name for name in available if name in selected and name not in excluded
+    )
+
+
+def wants_representation(request):
+    """
+    Whether a write should answer with the full resource rather than a
+    minimal body: asked by ``Prefer: return=representation`` or by
+    selecting fields with ``?fields=`` / ``?exclude=``.
+    """
+    prefer = [value.strip() for value in request.headers.get("Prefer", "").split(",")]
+    return "return=representation" in prefer or "fields" in request.GET or "exclude" in request.GET
@@ -1,6 +1,53 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
-from django.http import JsonResponse
-from django.urls import resolve
+from django.conf import settings
+from django.urls import NoReverseMatch, Resolver404, resolve, reverse
+
+from backend.fastjson import JsonResponse
+from backend.timing import phase
+from user.revocation import revocation_store
+from workspace.activity import current_actor
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified JWT payloads, keyed by a digest of the
+    raw token. Entries are dropped once the token's ``exp`` has passed.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                raise jwt.ExpiredSignatureError("Signature has expired")
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key, payload):
+        expires_at = payload.get("exp")
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 
 class JWTAuthenticationMiddleware:
     def __init__(self, get_response):
@@ -9,34 +56,80 @@ class JWTAuthenticationMiddleware:
             "login",
             "register",
         ]
+        # Routes that may pass the token as ?token=, for browsers'
+        # EventSource, which cannot set headers
+        self.query_token_urls = frozenset(["board_events"])
+        self.exempt_prefixes = ("/admin/",)
+        # Exempt routes are matched against a path table built once, instead
+        # of running the URL resolver on every request.
+        self.exempt_paths = self._build_exempt_paths()
+        self.token_cache = VerifiedTokenCache(
+            getattr(settings, "JWT_TOKEN_CACHE_SIZE", 4096)
+        )
 
-    def __call__(self, request):
-        # Skip admin path
-        if request.path.startswith("/admin/"):
-            return self.get_response(request)
+    def _build_exempt_paths(self):
+        paths = set()
+        for url_name in self.exempt_urls:
+            try:
+                path = reverse(url_name)
+            except NoReverseMatch:
+                continue
+            paths.add(path)
+            # CommonMiddleware may have appended a slash before we run
+            paths.add(path.rstrip("/") + "/")
+        return frozenset(paths)
 
-        # Safely get the current URL name
+    def _accepts_query_token(self, request):
+        # Only event stream requests pay for resolve()
+        if "text/event-stream" not in request.headers.get("Accept", ""):
+            return False
         try:
-            current_url_name = resolve(request.path_info).url_name
-        except:
-            current_url_name = None
+            return resolve(request.path_info).url_name in self.query_token_urls
+        except Resolver404:
+            return False
 
-        if current_url_name in self.exempt_urls:
+    def _decode(self, token):
+        key = hashlib.sha256(token.encode()).digest()
+        payload = self.token_cache.get(key, time.time())
+        if payload is None:
+            payload = jwt.decode(
+                token, "eY18N^G5uJ4#TpRZQc3!X*w9m7$L@KbS", algorithms=["HS256"]
+            )
+            self.token_cache.set(key, payload)
+        # Views receive their own copy so the cached payload stays pristine
+        return dict(payload)
+
+    def __call__(self, request):
+        path = request.path_info
+        if path.startswith(self.exempt_prefixes) or path in self.exempt_paths:
             return self.get_response(request)
 
-        if "Authorization" not in request.headers:
+        if "Authorization" in request.headers:
+            header = request.headers["Authorization"]
+        elif "token" in request.GET and self._accepts_query_token(request):
+            header = "Bearer " + request.GET["token"]
+        else:
             return JsonResponse({"error": "Token not found"}, status=400)
 
+        with phase("auth"):
+            try:
+                token = header.split(" ")[1]
+                request.user = self._decode(token)
+            except IndexError:
+                return JsonResponse({"error": "Invalid authorization header"}, status=400)
+            except jwt.ExpiredSignatureError:
+                return JsonResponse({"error": "Token expired"}, status=400)
+            except jwt.InvalidTokenError:
+                return JsonResponse({"error": "Invalid token"}, status=400)
+
+            jti = request.user.get("jti")
+            if jti and revocation_store.is_revoked(jti):
+                # A well-formed token that no longer authenticates anyone
+                return JsonResponse({"error": "Token revoked"}, status=401)
+
+        # Attributes the request's changes in the activity feed
+        actor = current_actor.set(request.user.get("id"))
         try:
-            token = request.headers["Authorization"].split(" ")[1]
-            request.user = jwt.decode(
-                token, "eY18N^G5uJ4#TpRZQc3!X*w9m7$L@KbS", algorithms=["HS256"]
-            )
-        except IndexError:
-            return JsonResponse({"error": "Invalid authorization header"}, status=400)
-        except jwt.ExpiredSignatureError:
-            return JsonResponse({"error": "Token expired"}, status=400)
-        except jwt.InvalidTokenError:
-            return JsonResponse({"error": "Invalid token"}, status=400)
-
-        return self.get_response(request)
+            return self.get_response(request)
+        finally:
+            current_actor.reset(actor)
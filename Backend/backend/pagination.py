@@ -0,0 +1,107 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.db.models import Q
+
+from backend.fastjson import JsonResponse
+
+
+class InvalidPage(ValueError):
+    """Raised for a malformed cursor or page size."""
+
+
+def get_page_limit(request, param="limit", default=None, maximum=None, optional=False):
+    """
+    The page size requested by ``param``. An ``optional`` page size is None,
+    for the whole list, unless ``param`` or a cursor is given: lists that
+    predate pagination keep returning everything to existing clients.
+    """
+    if optional and param not in request.GET and "cursor" not in request.GET:
+        return None
+    default = default or settings.PAGE_SIZE
+    maximum = maximum or settings.MAX_PAGE_SIZE
+    try:
+        limit = int(request.GET.get(param, default))
+    except (TypeError, ValueError):
+        raise InvalidPage(f"{param} must be a positive integer")
+    if limit < 1:
+        raise InvalidPage(f"{param} must be a positive integer")
+    return min(limit, maximum)
+
+
+def encode_cursor(values):
+    values = [
+        value.isoformat() if isinstance(value, datetime.datetime) else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def load_cursor(cursor, length):
+    """The raw list of ``length`` values in ``cursor`` (InvalidPage if malformed)."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise InvalidPage("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidPage("Invalid cursor")
+    return values
+
+
+def decode_cursor(cursor, model, keys):
+    values = load_cursor(cursor, len(keys))
+    try:
+        return [
+            model._meta.get_field(key).to_python(value)
+            for key, value in zip(keys, values)
+        ]
+    except Exception:
+        raise InvalidPage("Invalid cursor")
+
+
+def keyset_page(queryset, keys, limit, cursor=None):
+    """
+    Return ``(items, next_cursor)`` for one page of ``queryset`` ordered by
+    ``keys`` (ascending, or descending with a "-" prefix; the last key must
+    be unique). The cursor encodes the key values of the last row, so every
+    page is an index range scan no matter how deep it is, unlike OFFSET.
+    A ``limit`` of None returns the whole list.
+    """
+    queryset = queryset.order_by(*keys)
+    if limit is None:
+        return list(queryset), None
+    names = [key.lstrip("-") for key in keys]
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, names)
+        after = Q()
+        for i, key in enumerate(keys):
+            lookup = "lt" if key.startswith("-") else "gt"
+            condition = Q(**{f"{names[i]}__{lookup}": values[i]})
+            for previous_name, previous_value in zip(names[:i], values[:i]):
+                condition &= Q(**{previous_name: previous_value})
+            after |= condition
+        queryset = queryset.filter(after)
+
+    items = list(queryset[: limit + 1])
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor([getattr(items[-1], name) for name in names])
+
+
+def paginated_response(request, data, next_cursor):
+    """
+    JSON array response for one page. The body stays a plain list; the next
+    page is advertised in the X-Next-Cursor and Link headers.
+    """
+    response = JsonResponse(data, safe=False)
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        response["X-Next-Cursor"] = next_cursor
+        response["Link"] = '<%s>; rel="next"' % request.build_absolute_uri(
+            f"{request.path}?{params.urlencode()}"
+        )
+    return response
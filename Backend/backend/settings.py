@@ -40,12 +40,14 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework.authtoken",
     "corsheaders",
+    "user",
     "workspace",
     "board",
     "task",
 ]
 
 MIDDLEWARE = [
+    "backend.timing.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -61,6 +63,9 @@ ROOT_URLCONF = "backend.urls"
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Your Vite dev server
 ]
+# Pagination headers set by backend.pagination.paginated_response, and
+# backend.timing.ServerTimingMiddleware's Server-Timing
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor", "Link", "Server-Timing"]
 
 TEMPLATES = [
     {
@@ -88,6 +93,14 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Transactions take the write lock up front and wait for it.
+            # Deferred ones read first, and fail at once with "database is
+            # locked" when another connection (a request, or a background
+            # writer such as the activity flush) is already writing.
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
     }
 }
 
@@ -111,6 +124,24 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# The first hasher is used for new passwords; logins with a hash from any
+# other listed hasher are transparently rehashed with it.
+#
+# Scrypt lanes per hash (Django's default is 5). This is a security cost
+# parameter, not a free speed-up: fewer lanes make each login cheaper and
+# each offline guess against a leaked hash equally cheaper. One lane keeps
+# a login at ~30 ms of CPU; admission under load is the login executor's
+# job (LOGIN_HASH_*), so raise this if the hardware allows.
+PASSWORD_SCRYPT_PARALLELISM = 1
+PASSWORD_HASHERS = [
+    "user.hashers.FastScryptPasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -140,3 +171,104 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Maximum number of verified JWT payloads kept in memory by
+# JWTAuthenticationMiddleware; entries also expire with the token itself.
+JWT_TOKEN_CACHE_SIZE = 4096
+
+# Per-user workspace role maps cached by workspace.membership. Changes made
+# in the same process invalidate at once; the TTL is how long a member
+# removed through another worker process keeps access there. It matches
+# TOKEN_REVOCATION_SYNC_INTERVAL, so logout and removal share one window,
+# and costs each process one indexed query per active user per TTL.
+WORKSPACE_ROLE_CACHE_SIZE = 10000
+WORKSPACE_ROLE_CACHE_TTL = 5
+
+# How often (seconds) each process pulls newly revoked token ids from the
+# RevokedToken table into its in-memory denylist. This is how long a logged
+# out token still works against the other worker processes.
+TOKEN_REVOCATION_SYNC_INTERVAL = 5
+
+# Login password hashing runs on a dedicated pool so login bursts cannot
+# starve ordinary API traffic. Every admitted login holds a request worker
+# until its hash is done, so WORKERS + QUEUE_SIZE must stay well below the
+# request workers of a process; logins beyond that get a 503 at once, and
+# those waiting longer than TIMEOUT seconds get one too.
+LOGIN_HASH_WORKERS = 2
+LOGIN_HASH_QUEUE_SIZE = 2
+LOGIN_HASH_TIMEOUT = 1
+
+# Kanban column windowing: default and maximum tasks returned per status
+# column by GET /board/<id>?per_column=N and /board/<id>/column/<status>.
+BOARD_COLUMN_PAGE_SIZE = 20
+BOARD_COLUMN_MAX_PAGE_SIZE = 100
+
+# Keyset pagination for list endpoints (?limit=N&cursor=...). The workspace,
+# member and board lists that existed before it only paginate when a limit
+# or cursor is given, and return everything otherwise.
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Largest batch accepted by the bulk task endpoints (create, status, move,
+# delete). Bigger imports should be split client-side.
+TASK_BULK_MAX_SIZE = 5000
+
+# Task position keys (fractional indexes) longer than this get their board
+# column rebalanced in the background.
+TASK_POSITION_REBALANCE_LENGTH = 24
+
+# Delta sync (/board/<id>/changes, /workspace/changes/<id>): change entries
+# are kept this many days; older cursors get 410 and must resync in full.
+# SYNC_PAGE_SIZE bounds the entries read per call.
+SYNC_RETENTION_DAYS = 7
+SYNC_PAGE_SIZE = 1000
+
+# Board event streams (/board/<id>/events, Server-Sent Events). Each worker
+# process tails the change log every SSE_POLL_INTERVAL seconds (at once for
+# its own changes) and holds at most SSE_MAX_CONNECTIONS streams. A stream
+# more than SSE_QUEUE_SIZE events behind is closed; the client reconnects
+# and replays from Last-Event-ID.
+SSE_POLL_INTERVAL = 0.25
+SSE_HEARTBEAT_INTERVAL = 15
+SSE_MAX_CONNECTIONS = 1000
+SSE_QUEUE_SIZE = 100
+
+# Workspace activity feed (/workspace/activity/<id>). Entries are queued in
+# memory and written in batches of ACTIVITY_BATCH_SIZE, or every
+# ACTIVITY_FLUSH_INTERVAL seconds, by a background thread in each process.
+# Up to ACTIVITY_MAX_PENDING entries are held while the database is
+# unavailable. Entries are kept ACTIVITY_RETENTION_DAYS days.
+ACTIVITY_FEED_ENABLED = True
+ACTIVITY_BATCH_SIZE = 500
+ACTIVITY_FLUSH_INTERVAL = 1.0
+ACTIVITY_MAX_PENDING = 50000
+ACTIVITY_RETENTION_DAYS = 90
+
+# Task archival (manage.py archive_done_tasks): done tasks not updated for
+# TASK_ARCHIVE_AFTER_DAYS days move to the archive table, in transactions
+# of TASK_ARCHIVE_CHUNK_SIZE tasks TASK_ARCHIVE_CHUNK_PAUSE seconds apart,
+# so other writers get the database in between. /task/archived/<id>
+# browses them and /task/restore/<id> brings them back.
+TASK_ARCHIVE_AFTER_DAYS = 30
+TASK_ARCHIVE_CHUNK_SIZE = 1000
+TASK_ARCHIVE_CHUNK_PAUSE = 0.1
+
+# Server-Timing (backend.timing.ServerTimingMiddleware): this fraction of
+# requests (0 disables, 1 times every request) gets a Server-Timing header
+# with per-phase durations and the query count and time. With
+# SERVER_TIMING_LOG each sampled request also logs one JSON line to the
+# "backend.timing" logger.
+SERVER_TIMING_SAMPLE_RATE = 0.05
+SERVER_TIMING_LOG = False
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "backend.timing": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        "user.login": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
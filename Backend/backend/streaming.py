@@ -0,0 +1,41 @@
+from django.http import StreamingHttpResponse
+
+from backend.fastjson import dumps
+
+# Bytes buffered before a chunk is handed to the server
+CHUNK_SIZE = 64 * 1024
+
+
+def encode(value):
+    return dumps(value)
+
+
+def json_array(items):
+    """Yield the JSON bytes of an array, one already-encoded item at a time."""
+    yield b"["
+    for i, item in enumerate(items):
+        if i:
+            yield b","
+        yield item
+    yield b"]"
+
+
+def _chunks(pieces, chunk_size=CHUNK_SIZE):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def streaming_json_response(pieces):
+    """
+    Stream JSON bytes produced piece by piece. Pair it with
+    ``QuerySet.iterator()`` so peak memory stays bounded by the chunk sizes,
+    not by the size of the result.
+    """
+    return StreamingHttpResponse(_chunks(pieces), content_type="application/json")
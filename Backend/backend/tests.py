@@ -0,0 +1,302 @@
+import datetime
+import decimal
+import json
+import re
+import time
+import uuid
+from unittest import mock, skipIf
+
+import jwt
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils.translation import gettext_lazy
+
+from backend import fastjson
+from backend.fastjson import dumps, loads
+from user.revocation import revocation_store
+from workspace.membership import membership_cache
+from workspace.models import UserWorkspace, Workspace
+from .middlewares import JWTAuthenticationMiddleware, VerifiedTokenCache
+
+
+def ok(request):
+    return HttpResponse("ok")
+
+
+class VerifiedTokenCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = VerifiedTokenCache(max_size=2)
+        cache.set(b"a", {"id": 1})
+        cache.set(b"b", {"id": 2})
+        cache.get(b"a", time.time())
+        cache.set(b"c", {"id": 3})
+        self.assertIsNone(cache.get(b"b", time.time()))
+        self.assertEqual(cache.get(b"a", time.time()), {"id": 1})
+        self.assertEqual(cache.get(b"c", time.time()), {"id": 3})
+
+    def test_expired_entry_raises_and_is_dropped(self):
+        cache = VerifiedTokenCache(max_size=2)
+        cache.set(b"a", {"id": 1, "exp": 100})
+        self.assertEqual(cache.get(b"a", 99), {"id": 1, "exp": 100})
+        with self.assertRaises(jwt.ExpiredSignatureError):
+            cache.get(b"a", 100)
+        self.assertIsNone(cache.get(b"a", 99))
+
+
+class JWTAuthenticationMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("member", "member@example.com", "pw12345!")
+
+    def setUp(self):
+        revocation_store.sync()
+        response = self.client.post(
+            "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+        )
+        self.token = loads(response.content)["token"]
+        self.middleware = JWTAuthenticationMiddleware(ok)
+
+    def authenticate(self, token=None):
+        request = RequestFactory().get("/user/me", HTTP_AUTHORIZATION=f"Bearer {token or self.token}")
+        return self.middleware(request)
+
+    def test_repeat_token_is_not_verified_again(self):
+        self.assertEqual(self.authenticate().status_code, 200)
+        with mock.patch("backend.middlewares.jwt.decode") as decode:
+            self.assertEqual(self.authenticate().status_code, 200)
+        decode.assert_not_called()
+
+    def test_cached_token_is_refused_once_expired(self):
+        self.assertEqual(self.authenticate().status_code, 200)
+        exp = jwt.decode(self.token, options={"verify_signature": False})["exp"]
+        with mock.patch("backend.middlewares.time.time", return_value=exp):
+            response = self.authenticate()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(loads(response.content), {"error": "Token expired"})
+
+    def test_tampered_token_is_not_served_from_cache(self):
+        self.assertEqual(self.authenticate().status_code, 200)
+        header, payload, signature = self.token.split(".")
+        response = self.authenticate(f"{header}.{payload}.{signature[::-1]}")
+        self.assertEqual(loads(response.content), {"error": "Invalid token"})
+
+    def test_query_token_only_for_event_streams(self):
+        events = reverse("board_events", args=[1])
+        for path, accept, status in (
+            (events, "text/event-stream", 200),
+            (events, "application/json", 400),
+            (reverse("me"), "text/event-stream", 400),
+            ("/nowhere", "text/event-stream", 400),
+        ):
+            request = RequestFactory().get(path, {"token": self.token}, HTTP_ACCEPT=accept)
+            response = self.middleware(request)
+            self.assertEqual(response.status_code, status, (path, accept))
+            if status == 400:
+                self.assertEqual(loads(response.content), {"error": "Token not found"})
+
+    def test_exempt_paths_are_the_reversed_routes(self):
+        for name in ("login", "register"):
+            path = reverse(name)
+            self.assertIn(path, self.middleware.exempt_paths)
+            self.assertIn(path.rstrip("/") + "/", self.middleware.exempt_paths)
+            response = self.middleware(RequestFactory().post(path))
+            self.assertEqual(response.content, b"ok")
+        response = self.middleware(RequestFactory().get(reverse("me")))
+        self.assertEqual(loads(response.content), {"error": "Token not found"})
+
+
+class AuthOverheadBenchmark(TestCase):
+    """
+    Per-request cost of the middleware for a repeat token, against what it
+    did before the token cache and the exempt path table: a resolve() of
+    the path and a full HS256 verification on every request.
+    """
+
+    REQUESTS = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("member", "member@example.com", "pw12345!")
+
+    def setUp(self):
+        revocation_store.sync()
+        response = self.client.post(
+            "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+        )
+        self.request = RequestFactory().get("/user/me", HTTP_AUTHORIZATION=f"Bearer {loads(response.content)['token']}")
+
+    def per_request(self, middleware):
+        middleware(self.request)
+        started = time.perf_counter()
+        for _ in range(self.REQUESTS):
+            middleware(self.request)
+        return (time.perf_counter() - started) / self.REQUESTS
+
+    def test_repeat_token_overhead(self):
+        uncached = JWTAuthenticationMiddleware(ok)
+        uncached.token_cache = VerifiedTokenCache(max_size=0)
+        call = uncached.__call__
+
+        def before(request):
+            resolve(request.path_info)
+            return call(request)
+
+        before_cost = self.per_request(before)
+        after_cost = self.per_request(JWTAuthenticationMiddleware(ok))
+        # About 75 µs before and 10 µs after on the machine this was written on
+        self.assertLess(after_cost, before_cost / 2, f"{after_cost * 1e6:.1f} µs vs {before_cost * 1e6:.1f} µs")
+
+
+class ServerTimingTests(TestCase):
+    METRIC = re.compile(r'^(\w+);dur=\d+\.\d{2}(;desc="[^"]*")?$')
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user("member", "member@example.com", "pw12345!")
+        cls.workspace = Workspace.objects.create(name="Workspace")
+        UserWorkspace.objects.create(user=user, workspace=cls.workspace)
+
+    def setUp(self):
+        revocation_store.sync()
+        membership_cache.clear()
+        response = self.client.post(
+            "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+        )
+        self.token = loads(response.content)["token"]
+
+    def get(self):
+        # A fresh client loads the middleware with the overridden settings
+        client = self.client_class()
+        return client.get(f"/board/all/{self.workspace.id}", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def metrics(self, response):
+        metrics = {}
+        for metric in response["Server-Timing"].split(", "):
+            self.assertRegex(metric, self.METRIC)
+            metrics[metric.split(";")[0]] = metric
+        return metrics
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_rate_zero_times_nothing(self):
+        self.assertNotIn("Server-Timing", self.get())
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.5)
+    def test_sampled_fraction(self):
+        with mock.patch("backend.timing.random.random", side_effect=[0.7, 0.2]):
+            self.assertNotIn("Server-Timing", self.get())
+            self.assertIn("Server-Timing", self.get())
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_phases(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        metrics = self.metrics(response)
+        # The membership cache was cold: its lookup is a phase with a query
+        self.assertEqual(set(metrics), {"auth", "membership", "json", "db", "total"})
+        self.assertEqual(list(metrics)[-2:], ["db", "total"])
+        queries = int(re.search(r'desc="(\d+) queries"', metrics["db"]).group(1))
+        self.assertGreater(queries, 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1, SERVER_TIMING_LOG=True)
+    def test_log_line(self):
+        with self.assertLogs("backend.timing", "INFO") as logs:
+            response = self.get()
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["method"], "GET")
+        self.assertEqual(line["path"], f"/board/all/{self.workspace.id}")
+        self.assertEqual(line["route"], "board/all/<int:workspace_id>")
+        self.assertEqual(line["status"], 200)
+        self.assertGreater(line["db_queries"], 0)
+        for key in ("total_ms", "db_ms", "auth_ms", "membership_ms", "json_ms"):
+            self.assertIsInstance(line[key], float, key)
+        self.assertIn(f"total;dur={line['total_ms']:.2f}", response["Server-Timing"])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_log_is_off_by_default(self):
+        with self.assertNoLogs("backend.timing"):
+            self.get()
+
+
+def django_dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder).encode()
+
+
+@skipIf(fastjson.orjson is None, "orjson is not installed")
+class FastJsonTests(SimpleTestCase):
+    UTC = datetime.timezone.utc
+
+    def test_same_output_as_django(self):
+        # Everything but fractional seconds, see test_datetimes_keep_microseconds
+        value = {
+            "int": 1,
+            "float": 1.5,
+            "str": "naïve \u2028 \"quoted\"",
+            "none": None,
+            "bool": [True, False],
+            "nested": {"list": [1, {"a": []}]},
+            1: "int key",
+            "utc": datetime.datetime(2026, 10, 18, 19, 1, 51, tzinfo=self.UTC),
+            "offset": datetime.datetime(2026, 10, 18, 19, 1, 51, tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+            "naive": datetime.datetime(2026, 10, 18, 19, 1, 51),
+            "date": datetime.date(2026, 10, 18),
+            "time": datetime.time(19, 1, 51),
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "decimal": decimal.Decimal("1.10"),
+            "duration": datetime.timedelta(days=1, seconds=5),
+            "lazy": gettext_lazy("Hello"),
+        }
+        self.assertEqual(loads(dumps(value)), json.loads(django_dumps(value)))
+
+    def test_datetimes_keep_microseconds(self):
+        value = datetime.datetime(2026, 10, 18, 19, 1, 51, 616241, tzinfo=self.UTC)
+        self.assertEqual(loads(dumps(value)), "2026-10-18T19:01:51.616241Z")
+        self.assertEqual(json.loads(django_dumps(value)), "2026-10-18T19:01:51.616Z")
+        self.assertEqual(loads(dumps(value.replace(microsecond=616000))), "2026-10-18T19:01:51.616000Z")
+        # The same instant to the millisecond
+        self.assertEqual(
+            datetime.datetime.fromisoformat(loads(dumps(value))).replace(microsecond=616000),
+            datetime.datetime.fromisoformat(json.loads(django_dumps(value))),
+        )
+
+    def test_safe(self):
+        with self.assertRaises(TypeError):
+            fastjson.JsonResponse([1])
+        response = fastjson.JsonResponse([1], safe=False)
+        self.assertEqual((response["Content-Type"], response.content), ("application/json", b"[1]"))
+
+    def test_encode_benchmark(self):
+        # The tasks of a 10k-task board, as task_to_dict returns them
+        now = datetime.datetime.now(self.UTC)
+        board = {
+            "id": 1,
+            "name": "Board",
+            "tasks": [
+                {
+                    "id": i,
+                    "name": f"Task {i}",
+                    "description": "x" * 100,
+                    "priority": "low",
+                    "status": "done",
+                    "board_id": 1,
+                    "assigned_to": {"id": 1, "username": "member", "email": "member@example.com"},
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(10000)
+            ],
+        }
+
+        def best_of(encode):
+            timings = []
+            for _ in range(5):
+                started = time.perf_counter()
+                encode(board)
+                timings.append(time.perf_counter() - started)
+            return min(timings)
+
+        before, after = best_of(django_dumps), best_of(dumps)
+        # About 48 ms before and 5 ms after on the machine this was written on
+        self.assertLess(after, before / 3, f"{after * 1000:.1f} ms vs {before * 1000:.1f} ms")
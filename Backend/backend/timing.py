@@ -0,0 +1,104 @@
+import contextlib
+import contextvars
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+
+# Server-Timing
+#
+# A sampled request gets a RequestTimer: the code paths worth telling apart
+# (JWT decoding, membership lookups, JSON encoding) add their time to it
+# with ``phase()``, and an execute_wrapper on the connection counts every
+# query. The totals go out in a Server-Timing header and, if enabled, one
+# log line per request. Phases may contain queries (a membership cache
+# miss does), so "db" overlaps them; "total" covers the whole middleware
+# stack below ServerTimingMiddleware. Requests not sampled only pay for a
+# random() call and a context variable lookup per phase.
+
+logger = logging.getLogger("backend.timing")
+
+# The RequestTimer of the current request, or None when it isn't sampled
+current_timer = contextvars.ContextVar("current_timer", default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        self.db_time = 0.0
+
+    def add(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Add the time spent in the block to the current request's ``name`` phase."""
+    timer = current_timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def server_timing_header(timer, total):
+    metrics = [f"{name};dur={duration * 1000:.2f}" for name, duration in timer.phases.items()]
+    metrics.append(f'db;dur={timer.db_time * 1000:.2f};desc="{timer.queries} queries"')
+    metrics.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(metrics)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0)
+        self.log = getattr(settings, "SERVER_TIMING_LOG", False)
+
+    def __call__(self, request):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        total = time.perf_counter() - started
+
+        response["Server-Timing"] = server_timing_header(timer, total)
+        if self.log:
+            match = request.resolver_match
+            logger.info(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "route": match.route if match else None,
+                        "status": response.status_code,
+                        "total_ms": round(total * 1000, 2),
+                        "db_ms": round(timer.db_time * 1000, 2),
+                        "db_queries": timer.queries,
+                        **{f"{name}_ms": round(duration * 1000, 2) for name, duration in timer.phases.items()},
+                    }
+                )
+            )
+        return response
@@ -0,0 +1,196 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from backend.pagination import decode_cursor, encode_cursor
+from workspace.activity import record_activity
+from .events import event_hub
+from .models import Board, BoardChange
+from .serialization import board_queryset, board_to_dict, task_queryset, task_to_dict
+
+
+# Change log
+#
+# Every board and task mutation appends entries in the transaction that
+# made it, after the workspace revision bump. That bump locks the workspace
+# row, so within a workspace entry ids are assigned in commit order and a
+# client reading "after id N" never skips a change. Entries only say *what*
+# changed; feeds read the current rows, and an id that no longer resolves
+# (deleted, or moved off the board) is reported as a tombstone.
+
+
+class CursorExpired(Exception):
+    """Raised for a cursor older than the change retention window."""
+
+
+def log_task_changes(changes, workspace_id=None):
+    """
+    Log ``(board_id, task_id, action)`` triples (see BoardChange.ACTION_CHOICES).
+    Pass ``workspace_id`` when every board is known to be in it, to skip
+    looking the boards up.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+    if workspace_id is not None:
+        workspaces = {board_id: workspace_id for board_id, _, _ in changes}
+    else:
+        workspaces = dict(
+            Board.objects.filter(id__in={board_id for board_id, _, _ in changes}).values_list("id", "workspace_id")
+        )
+    entries = BoardChange.objects.bulk_create(
+        [
+            BoardChange(
+                workspace_id=workspaces[board_id],
+                board_id=board_id,
+                kind="task",
+                object_id=task_id,
+                action=action,
+            )
+            for board_id, task_id, action in changes
+            if board_id in workspaces
+        ],
+        batch_size=1000,
+    )
+    record_activity(entries)
+    # Push to this process's event streams as soon as the change commits
+    transaction.on_commit(event_hub.wake)
+
+
+def log_board_change(board, action):
+    entry = BoardChange.objects.create(
+        workspace_id=board.workspace_id,
+        board_id=board.id,
+        kind="board",
+        object_id=board.id,
+        action=action,
+    )
+    record_activity([entry])
+    transaction.on_commit(event_hub.wake)
+
+
+def retention():
+    return datetime.timedelta(days=settings.SYNC_RETENTION_DAYS)
+
+
+def prune_changes():
+    """
+    Delete entries past the retention window. A day of grace beyond it
+    keeps every entry a still-valid cursor can need.
+    """
+    cutoff = timezone.now() - retention() - datetime.timedelta(days=1)
+    deleted, _ = BoardChange.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+# Feeds
+
+
+def _encode_sync_cursor(last_id, issued_at):
+    return encode_cursor([last_id, issued_at])
+
+
+def _decode_sync_cursor(since):
+    """Return the last change id a cursor has seen (InvalidPage if malformed)."""
+    last_id, issued_at = decode_cursor(since, BoardChange, ("id", "created_at"))
+    if issued_at < timezone.now() - retention():
+        raise CursorExpired("Cursor expired, a full resync is required")
+    return last_id
+
+
+def _current_change_id():
+    return BoardChange.objects.aggregate(last=Max("id"))["last"] or 0
+
+
+def _read_changes(since, **filters):
+    """
+    Entries after the cursor ``since`` matching ``filters``, at most
+    SYNC_PAGE_SIZE. Returns ``(entries, next_cursor, more)``.
+    """
+    last_id = _decode_sync_cursor(since)
+    entries = list(
+        BoardChange.objects.filter(id__gt=last_id, **filters)
+        .order_by("id")
+        .values_list("id", "kind", "object_id", "created_at")[: settings.SYNC_PAGE_SIZE + 1]
+    )
+    more = len(entries) > settings.SYNC_PAGE_SIZE
+    if more:
+        entries = entries[: settings.SYNC_PAGE_SIZE]
+        # The entries still to read are newer than the last one returned
+        next_cursor = _encode_sync_cursor(entries[-1][0], entries[-1][3])
+    else:
+        next_cursor = _encode_sync_cursor(entries[-1][0] if entries else last_id, timezone.now())
+    return entries, next_cursor, more
+
+
+def _changed_ids(entries, kind):
+    return {object_id for _, entry_kind, object_id, _ in entries if entry_kind == kind}
+
+
+def board_changes(board, since=None):
+    """
+    Changes to ``board`` (loaded through board_queryset) after the cursor
+    ``since``. Without a cursor the whole board is returned, as a first
+    sync. Raises InvalidPage or CursorExpired for a bad cursor.
+    """
+    if since is None:
+        # Read the position first so concurrent changes are replayed next time
+        cursor = _encode_sync_cursor(_current_change_id(), timezone.now())
+        return {
+            "cursor": cursor,
+            "more": False,
+            "board": board_to_dict(board),
+            "tasks": [task_to_dict(task) for task in task_queryset().filter(board=board)],
+            "deleted_tasks": [],
+        }
+
+    entries, cursor, more = _read_changes(since, board_id=board.id)
+    task_ids = _changed_ids(entries, "task")
+    tasks = list(task_queryset().filter(board=board, id__in=task_ids))
+    data = {
+        "cursor": cursor,
+        "more": more,
+        "tasks": [task_to_dict(task) for task in tasks],
+        "deleted_tasks": sorted(task_ids - {task.id for task in tasks}),
+    }
+    if _changed_ids(entries, "board"):
+        data["board"] = board_to_dict(board)
+    return data
+
+
+def workspace_changes(workspace_id, since=None):
+    """
+    Boards and tasks of a workspace changed after the cursor ``since``
+    (everything without one). Raises InvalidPage or CursorExpired for a bad
+    cursor.
+    """
+    boards = board_queryset(with_tasks=False).filter(workspace_id=workspace_id)
+    tasks = task_queryset().filter(workspace_id=workspace_id)
+
+    if since is None:
+        cursor = _encode_sync_cursor(_current_change_id(), timezone.now())
+        return {
+            "cursor": cursor,
+            "more": False,
+            "boards": [board_to_dict(board) for board in boards.order_by("id")],
+            "deleted_boards": [],
+            "tasks": [task_to_dict(task) for task in tasks],
+            "deleted_tasks": [],
+        }
+
+    entries, cursor, more = _read_changes(since, workspace_id=workspace_id)
+    board_ids = _changed_ids(entries, "board")
+    task_ids = _changed_ids(entries, "task")
+    boards = list(boards.filter(id__in=board_ids).order_by("id"))
+    tasks = list(tasks.filter(id__in=task_ids))
+    return {
+        "cursor": cursor,
+        "more": more,
+        "boards": [board_to_dict(board) for board in boards],
+        "deleted_boards": sorted(board_ids - {board.id for board in boards}),
+        "tasks": [task_to_dict(task) for task in tasks],
+        "deleted_tasks": sorted(task_ids - {task.id for task in tasks}),
+    }
@@ -0,0 +1,103 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from task.models import Task
+from .models import BoardTaskCount
+from .serialization import TASK_PRIORITIES, TASK_STATUSES
+
+
+def task_count_key(task):
+    """The counter row a task is counted in."""
+    return (task.board_id, task.status, task.priority)
+
+
+def adjust_task_counts(removed=(), added=()):
+    """
+    Move tasks between counter rows: decrement the rows of the ``removed``
+    keys and increment those of the ``added`` keys (see task_count_key).
+    Both take an iterable of keys or a ``{key: number of tasks}`` mapping.
+    Call it inside the transaction that changed the tasks.
+    """
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    for (board_id, status, priority), delta in deltas.items():
+        if not delta:
+            continue
+        rows = BoardTaskCount.objects.filter(board_id=board_id, status=status, priority=priority)
+        if rows.update(count=F("count") + delta):
+            continue
+        # First task with this status and priority on the board
+        BoardTaskCount.objects.bulk_create(
+            [BoardTaskCount(board_id=board_id, status=status, priority=priority)],
+            ignore_conflicts=True,
+        )
+        rows.update(count=F("count") + delta)
+
+
+def counts_to_dict(rows):
+    """Fold ``(status, priority, count)`` rows into the task_counts payload."""
+    by_status = dict.fromkeys(TASK_STATUSES, 0)
+    by_priority = dict.fromkeys(TASK_PRIORITIES, 0)
+    for status, priority, count in rows:
+        by_status[status] = by_status.get(status, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
+    return {
+        "total": sum(by_status.values()),
+        "status": by_status,
+        "priority": by_priority,
+    }
+
+
+def get_board_task_counts(board_ids):
+    """Return ``{board_id: task_counts}`` for ``board_ids`` in one query."""
+    rows = defaultdict(list)
+    for board_id, status, priority, count in BoardTaskCount.objects.filter(
+        board_id__in=board_ids
+    ).values_list("board_id", "status", "priority", "count"):
+        rows[board_id].append((status, priority, count))
+    return {board_id: counts_to_dict(rows[board_id]) for board_id in board_ids}
+
+
+def get_workspace_task_counts(workspace_id):
+    return counts_to_dict(
+        BoardTaskCount.objects.filter(board__workspace_id=workspace_id)
+        .values_list("status", "priority")
+        .annotate(total=Sum("count"))
+        .order_by()
+    )
+
+
+def compute_task_counts(board_ids):
+    """Count the tasks of ``board_ids`` from scratch: ``{(board, status, priority): n}``."""
+    rows = (
+        Task.objects.filter(board_id__in=board_ids)
+        .values_list("board_id", "status", "priority")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    return {(board_id, status, priority): count for board_id, status, priority, count in rows}
+
+
+def find_drifted_counts(board_ids):
+    """Return the ids of the boards in ``board_ids`` whose counters disagree with their tasks."""
+    expected = compute_task_counts(board_ids)
+    stored = {
+        (board_id, status, priority): count
+        for board_id, status, priority, count in BoardTaskCount.objects.filter(
+            board_id__in=board_ids
+        ).values_list("board_id", "status", "priority", "count")
+        if count
+    }
+    return sorted({board_id for (board_id, _, _), _ in expected.items() ^ stored.items()})
+
+
+def rebuild_task_counts(*board_ids):
+    """Replace the counter rows of ``board_ids`` with counts from scratch."""
+    with transaction.atomic():
+        BoardTaskCount.objects.filter(board_id__in=board_ids).delete()
+        BoardTaskCount.objects.bulk_create(
+            BoardTaskCount(board_id=board_id, status=status, priority=priority, count=count)
+            for (board_id, status, priority), count in compute_task_counts(board_ids).items()
+        )
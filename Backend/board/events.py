@@ -0,0 +1,186 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+from backend.fastjson import dumps
+from .models import BoardChange
+from .serialization import board_queryset, board_to_dict, task_queryset, task_to_dict
+
+
+# Board event push
+#
+# The BoardChange table doubles as the broker: every worker process tails it
+# from one poller thread, so an event reaches the streams of all processes
+# whichever process made the change. Changes committed in this process wake
+# the poller at once; other processes see them within SSE_POLL_INTERVAL.
+# Each entry is resolved and encoded once per process, however many
+# clients follow its board.
+
+
+def format_event(event_id, event, data):
+    """One Server-Sent Events message (bytes)."""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, event.encode(), dumps(data))
+
+
+def resolve_events(entries):
+    """
+    Turn ``(id, board_id, kind, object_id, action)`` change entries into
+    ``(board_id, id, message)`` triples. Events carry the current task or
+    board (null once deleted); a task moved away carries its new board_id.
+    """
+    task_ids = {object_id for _, _, kind, object_id, _ in entries if kind == "task"}
+    board_ids = {object_id for _, _, kind, object_id, _ in entries if kind == "board"}
+    tasks = {task.id: task for task in task_queryset().filter(id__in=task_ids)} if task_ids else {}
+    boards = (
+        {board.id: board for board in board_queryset(with_tasks=False).filter(id__in=board_ids)}
+        if board_ids
+        else {}
+    )
+
+    events = []
+    for entry_id, board_id, kind, object_id, action in entries:
+        if kind == "task":
+            task = tasks.get(object_id)
+            data = {"id": object_id, "board_id": board_id, "task": task_to_dict(task) if task else None}
+        else:
+            board = boards.get(object_id)
+            data = {"id": object_id, "board_id": board_id, "board": board_to_dict(board) if board else None}
+        events.append((board_id, entry_id, format_event(entry_id, f"{kind}.{action}", data)))
+    return events
+
+
+def read_events(board_id, after_id, limit):
+    """
+    The next ``limit`` events of one board after change ``after_id``, for
+    replaying what a reconnecting stream missed: ``[(id, message)]``.
+    """
+    entries = list(
+        BoardChange.objects.filter(board_id=board_id, id__gt=after_id)
+        .order_by("id")
+        .values_list("id", "board_id", "kind", "object_id", "action")[:limit]
+    )
+    return [(entry_id, message) for _, entry_id, message in resolve_events(entries)]
+
+
+class Subscription:
+    def __init__(self, board_id, loop, max_queue):
+        self.board_id = board_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+
+    def offer(self, event):
+        # Runs on the subscriber's event loop
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: end the stream, the client reconnects
+            # with Last-Event-ID and replays what it missed
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventHub:
+    """
+    Per-process fan-out of board change entries to Server-Sent Events
+    streams. The poller thread starts with the first subscriber.
+    """
+
+    batch_size = 1000
+
+    def __init__(self, poll_interval, max_connections, max_queue):
+        self.poll_interval = poll_interval
+        self.max_connections = max_connections
+        self.max_queue = max_queue
+        self._subscribers = defaultdict(set)
+        self._count = 0
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def connections(self):
+        return self._count
+
+    def subscribe(self, board_id, loop):
+        """
+        Register a stream consuming on ``loop``; returns None when this
+        worker is at its connection limit. Runs a query the first time, so
+        call it from a thread (sync_to_async).
+        """
+        with self._lock:
+            if self._count >= self.max_connections:
+                return None
+            subscription = Subscription(board_id, loop, self.max_queue)
+            self._subscribers[board_id].add(subscription)
+            self._count += 1
+            if self._thread is None:
+                # Start from the current end of the log
+                self._last_id = BoardChange.objects.order_by("-id").values_list("id", flat=True).first() or 0
+                self._thread = threading.Thread(target=self._run, name="board-events", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.board_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.board_id]
+
+    def wake(self):
+        """Poll now instead of at the next interval (called on commit of local changes)."""
+        if self._thread is not None:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception:
+                # A failed poll (e.g. the database restarting) is retried next interval
+                connection.close()
+
+    def poll(self):
+        entries = list(
+            BoardChange.objects.filter(id__gt=self._last_id)
+            .order_by("id")
+            .values_list("id", "board_id", "kind", "object_id", "action")[: self.batch_size]
+        )
+        if not entries:
+            return
+        self._last_id = entries[-1][0]
+        if len(entries) == self.batch_size:
+            # More to read
+            self._wake.set()
+
+        # Subscribers are read after the query: a stream that joins later
+        # replays these entries from the database itself
+        with self._lock:
+            entries = [entry for entry in entries if entry[1] in self._subscribers]
+        if not entries:
+            return
+        events = resolve_events(entries)
+        with self._lock:
+            for board_id, entry_id, message in events:
+                for subscription in self._subscribers.get(board_id, ()):
+                    subscription.loop.call_soon_threadsafe(subscription.offer, (entry_id, message))
+
+
+event_hub = EventHub(
+    poll_interval=settings.SSE_POLL_INTERVAL,
+    max_connections=settings.SSE_MAX_CONNECTIONS,
+    max_queue=settings.SSE_QUEUE_SIZE,
+)
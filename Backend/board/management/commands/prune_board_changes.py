@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from board.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = "Delete change feed entries older than the SYNC_RETENTION_DAYS window"
+
+    def handle(self, *args, **options):
+        deleted = prune_changes()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} change entr{'y' if deleted == 1 else 'ies'}"))
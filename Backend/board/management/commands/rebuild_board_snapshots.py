@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from board.models import Board
+from board.snapshots import refresh_board_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild the pre-serialized board snapshots from live data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("board_ids", nargs="*", type=int, help="Only rebuild these boards")
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        board_ids = options["board_ids"] or list(
+            Board.objects.order_by("id").values_list("id", flat=True)
+        )
+        batch_size = options["batch_size"]
+        for start in range(0, len(board_ids), batch_size):
+            refresh_board_snapshots(*board_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(board_ids)} board snapshot(s)"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from board.counters import find_drifted_counts, rebuild_task_counts
+from board.models import Board
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-board task counters from scratch and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("board_ids", nargs="*", type=int, help="Only repair these boards")
+        parser.add_argument("--check", action="store_true", help="Only report drift, do not repair")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        board_ids = options["board_ids"] or list(
+            Board.objects.order_by("id").values_list("id", flat=True)
+        )
+        batch_size = options["batch_size"]
+        drifted = []
+        for start in range(0, len(board_ids), batch_size):
+            drifted += find_drifted_counts(board_ids[start:start + batch_size])
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS(f"Checked {len(board_ids)} board(s), all task counters are consistent"))
+            return
+
+        self.stdout.write(f"Drifted task counters: {', '.join(map(str, drifted))}")
+        if options["check"]:
+            raise CommandError("Task counters have drifted from live data; rerun without --check")
+        for start in range(0, len(drifted), batch_size):
+            rebuild_task_counts(*drifted[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"Repaired the task counters of {len(drifted)} board(s)"))
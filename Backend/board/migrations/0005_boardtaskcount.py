@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_tasks(apps, schema_editor):
+    BoardTaskCount = apps.get_model('board', 'BoardTaskCount')
+    BoardSnapshot = apps.get_model('board', 'BoardSnapshot')
+    Task = apps.get_model('task', 'Task')
+    rows = Task.objects.values_list('board_id', 'status', 'priority').annotate(count=Count('id')).order_by()
+    BoardTaskCount.objects.bulk_create(
+        BoardTaskCount(board_id=board_id, status=status, priority=priority, count=count)
+        for board_id, status, priority, count in rows
+    )
+    # Snapshots now embed the counters; they are backfilled on the next read
+    BoardSnapshot.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0004_boardsnapshot'),
+        ('task', '0004_task_board_status_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardTaskCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=10)),
+                ('priority', models.CharField(max_length=6)),
+                ('count', models.IntegerField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_counts', to='board.board')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('board', 'status', 'priority'), name='boardtaskcount_unique')],
+            },
+        ),
+        migrations.RunPython(count_existing_tasks, migrations.RunPython.noop),
+    ]
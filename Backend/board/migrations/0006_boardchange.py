@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0005_boardtaskcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('workspace_id', models.IntegerField()),
+                ('board_id', models.IntegerField()),
+                ('kind', models.CharField(choices=[('board', 'Board'), ('task', 'Task')], max_length=5)),
+                ('object_id', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board_id', 'id'], name='boardchange_board_idx'), models.Index(fields=['workspace_id', 'id'], name='boardchange_workspace_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0006_boardchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boardchange',
+            name='action',
+            field=models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('moved', 'Moved'), ('deleted', 'Deleted')], default='updated', max_length=7),
+        ),
+    ]
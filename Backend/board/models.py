@@ -9,6 +9,85 @@ class Board(models.Model):
     workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, related_name='boards')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+    # Bumped on every change to the board or its tasks; drives ETags
+    revision = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a workspace's boards
+            models.Index(fields=["workspace", "created_at", "id"], name="board_workspace_created_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class BoardSnapshot(models.Model):
+    """
+    Pre-serialized GET /board/<id> payload, patched (or dropped, for bulk
+    changes) in the same transaction as every board or task change so plain
+    board reads are a single-row fetch.
+    """
+    board = models.OneToOneField(Board, on_delete=models.CASCADE, primary_key=True, related_name='snapshot')
+    workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, related_name='board_snapshots')
+    board_revision = models.PositiveIntegerField()
+    workspace_revision = models.PositiveIntegerField()
+    payload = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of board {self.board_id} (revision {self.board_revision})"
+
+class BoardTaskCount(models.Model):
+    """
+    Number of tasks on a board per (status, priority), kept in step with the
+    tasks by F() updates in the same transaction as every task change.
+    """
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='task_counts')
+    status = models.CharField(max_length=10)
+    priority = models.CharField(max_length=6)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["board", "status", "priority"], name="boardtaskcount_unique"),
+        ]
+
+    def __str__(self):
+        return f"Board {self.board_id}: {self.count} {self.status}/{self.priority} task(s)"
+
+class BoardChange(models.Model):
+    """
+    Change feed entry: a board or task was created, updated, deleted,
+    archived or restored. The id is the change sequence clients sync from.
+    Boards and workspaces are plain ids so entries outlive what they
+    describe (they are tombstones for deletions) until pruned.
+    """
+    KIND_CHOICES = [
+        ("board", "Board"),
+        ("task", "Task"),
+    ]
+    ACTION_CHOICES = [
+        ("created", "Created"),
+        ("updated", "Updated"),
+        ("moved", "Moved"),
+        ("deleted", "Deleted"),
+        ("archived", "Archived"),
+        ("restored", "Restored"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    workspace_id = models.IntegerField()
+    board_id = models.IntegerField()
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES, default="updated")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["board_id", "id"], name="boardchange_board_idx"),
+            models.Index(fields=["workspace_id", "id"], name="boardchange_workspace_idx"),
+        ]
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"Change {self.id}: {self.kind} {self.object_id} {self.action}"
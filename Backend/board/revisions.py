@@ -0,0 +1,58 @@
+from django.db.models import F
+
+from workspace.models import Workspace
+from .changes import log_task_changes
+from .counters import adjust_task_counts, task_count_key
+from .models import Board
+from .serialization import task_to_dict
+from .snapshots import KEEP, drop_board_snapshots, patch_task_snapshot
+
+
+def bump_board_revision(*board_ids):
+    Board.objects.filter(id__in=board_ids).update(revision=F("revision") + 1)
+    Workspace.objects.filter(boards__id__in=board_ids).update(revision=F("revision") + 1)
+
+
+def record_board_change(*board_ids, tasks=()):
+    """
+    Record a change to the tasks of ``board_ids``: bump the board and
+    workspace revisions, log the changed ``tasks`` (``(board_id, task_id,
+    action)`` triples) to the change feed and drop the board snapshots for
+    the next read to rebuild. Call it inside the transaction that made the
+    change.
+    """
+    bump_board_revision(*board_ids)
+    log_task_changes(tasks)
+    drop_board_snapshots(*board_ids)
+
+
+def record_task_change(task, action, previous=None, after=KEEP, values=None):
+    """
+    Record a change to one task made in the current transaction: move it
+    between counter rows, bump the revisions, log it and patch the board
+    snapshots in place. ``previous`` is its task_count_key before the
+    change (None for a new task); a "deleted" task is taken off its board.
+    ``after`` is where the task now sits in its column (see
+    patch_task_snapshot). ``values`` are the changed payload fields; by
+    default the whole task is serialized, so it must be loaded with its
+    assignee.
+    """
+    removed = [previous] if previous else []
+    added = [] if action == "deleted" else [task_count_key(task)]
+    adjust_task_counts(removed=removed, added=added)
+
+    board_ids = sorted({board_id for board_id, _, _ in removed + added})
+    bump_board_revision(*board_ids)
+    log_task_changes(
+        [(board_id, task.id, action) for board_id in board_ids],
+        # Moves across boards may cross workspaces too
+        workspace_id=task.workspace_id if len(board_ids) == 1 else None,
+    )
+    if action == "deleted":
+        patch_task_snapshot(task.board_id, task.id, removed=removed)
+        return
+    if previous and previous[0] != task.board_id:
+        patch_task_snapshot(previous[0], task.id, removed=removed)
+        # New to this board's snapshot, so serialized whole
+        values = None
+    patch_task_snapshot(task.board_id, task.id, values or task_to_dict(task), after, removed, added)
@@ -0,0 +1,206 @@
+from django.db.models import Count, Prefetch
+
+from backend.pagination import keyset_page
+from backend.streaming import encode
+from task.models import Task
+from workspace.serialization import workspace_to_dict
+from .models import Board
+
+
+# Querysets
+#
+# Every board/task payload goes through the helpers below, so the querysets
+# here must load everything they touch up front: one query for the boards
+# (joined with their workspace) and one for all of their tasks (joined with
+# the assignee), however many boards or tasks there are.
+
+
+TASK_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "priority",
+    "status",
+    "board_id",
+    "assigned_to",
+    "created_at",
+    "updated_at",
+)
+
+USER_COLUMNS = ("id", "username", "email", "first_name", "last_name")
+
+# Model columns behind payload fields that are not plain task columns
+TASK_FIELD_COLUMNS = {
+    "board_id": ("board",),
+    "assigned_to": ("assigned_to", *("assigned_to__" + column for column in USER_COLUMNS)),
+}
+
+
+def task_queryset(fields=None):
+    """
+    Tasks in board column order (status, then position) with their
+    assignee joined. With a sparse ``fields`` tuple only the columns those
+    fields need are selected (plus id, board, status and position, which
+    prefetching and keyset pages rely on).
+    """
+    queryset = Task.objects.order_by("status", "position", "id")
+    if fields is None:
+        return queryset.select_related("assigned_to")
+
+    if "assigned_to" in fields:
+        queryset = queryset.select_related("assigned_to")
+    columns = {"id", "board", "status", "position"}
+    for field in fields:
+        columns.update(TASK_FIELD_COLUMNS.get(field, (field,)))
+    return queryset.only(*columns)
+
+
+def board_queryset(with_tasks=True, task_fields=None):
+    queryset = Board.objects.select_related("workspace")
+    if with_tasks:
+        queryset = queryset.prefetch_related(
+            Prefetch("tasks", queryset=task_queryset(task_fields))
+        )
+    return queryset
+
+
+# Payloads
+
+
+def user_to_dict(user):
+    if user is None:
+        return None
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+
+
+def task_to_dict(task, fields=None):
+    """Serialize a task, restricted to ``fields`` when given (see TASK_FIELDS)."""
+    if fields is None:
+        fields = TASK_FIELDS
+    data = {}
+    for field in fields:
+        if field == "assigned_to":
+            data[field] = user_to_dict(task.assigned_to)
+        else:
+            data[field] = getattr(task, field)
+    return data
+
+
+def board_to_dict(board, tasks=None, task_fields=None, task_counts=None):
+    """
+    Serialize a board loaded through board_queryset(). Pass ``tasks`` to
+    embed a task list (usually ``board.tasks.all()``, served from the
+    prefetch cache) and ``task_counts`` to embed its counters.
+    """
+    data = {
+        "id": board.id,
+        "name": board.name,
+        "workspace": workspace_to_dict(board.workspace),
+        "created_at": board.created_at,
+        "updated_at": board.updated_at,
+    }
+    if task_counts is not None:
+        data["task_counts"] = task_counts
+    if tasks is not None:
+        data["tasks"] = [task_to_dict(task, task_fields) for task in tasks]
+    return data
+
+
+def task_with_board_to_dict(task):
+    """Task payload with its board and workspace nested, as returned by task updates."""
+    data = task_to_dict(task)
+    data["board"] = board_to_dict(task.board)
+    return data
+
+
+# Kanban columns
+#
+# Column reads never load a whole board: counts come from the board's task
+# counters (or one grouped query) and each column page is a keyset scan over (board, status, position).
+
+TASK_STATUSES = [status for status, _ in Task.STATUS_CHOICES]
+TASK_PRIORITIES = [priority for priority, _ in Task.PRIORITY_CHOICES]
+
+
+def column_counts(board_id):
+    counts = dict.fromkeys(TASK_STATUSES, 0)
+    rows = (
+        Task.objects.filter(board_id=board_id)
+        .values_list("status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    counts.update(rows)
+    return counts
+
+
+def column_page(board_id, status, limit, cursor=None, fields=None):
+    """Return ``(tasks, next_cursor)`` for one status column."""
+    queryset = task_queryset(fields).filter(board_id=board_id, status=status)
+    return keyset_page(queryset, ("position", "id"), limit, cursor)
+
+
+def column_to_dict(count, tasks, next_cursor, fields=None):
+    return {
+        "count": count,
+        "tasks": [task_to_dict(task, fields) for task in tasks],
+        "next": next_cursor,
+    }
+
+
+def columns_to_dict(board_id, limit, fields=None, counts=None):
+    """``counts`` maps statuses to task counts; computed from the tasks if not given."""
+    if counts is None:
+        counts = column_counts(board_id)
+    columns = {}
+    for status, count in counts.items():
+        if count:
+            tasks, next_cursor = column_page(board_id, status, limit, fields=fields)
+        else:
+            tasks, next_cursor = [], None
+        columns[status] = column_to_dict(count, tasks, next_cursor, fields)
+    return columns
+
+
+# Streaming
+
+
+def iter_boards_json(boards, task_fields=None, task_counts=None, chunk_size=1000):
+    """
+    Yield the JSON bytes of ``[board_to_dict(board, tasks), ...]`` for a
+    board_queryset(with_tasks=False) without holding more than a chunk of
+    rows in memory. ``task_counts`` maps board ids to their counters. Boards and their tasks come from two ordered iterators
+    merged on board id, so the query count stays constant too.
+    """
+    boards = boards.order_by("id")
+    tasks = (
+        task_queryset(task_fields)
+        .filter(board__in=boards.values("id"))
+        .order_by("board_id", "status", "position", "id")
+        .iterator(chunk_size=chunk_size)
+    )
+    pending = next(tasks, None)
+
+    yield b"["
+    for board_index, board in enumerate(boards.iterator(chunk_size=chunk_size)):
+        if board_index:
+            yield b","
+        # Open the board object and splice its task array in as it streams
+        counts = task_counts.get(board.id) if task_counts is not None else None
+        yield encode(board_to_dict(board, task_counts=counts))[:-1] + b',"tasks":['
+        first = True
+        while pending is not None and pending.board_id <= board.id:
+            if pending.board_id == board.id:
+                if not first:
+                    yield b","
+                yield encode(task_to_dict(pending, task_fields))
+                first = False
+            pending = next(tasks, None)
+        yield b"]}"
+    yield b"]"
@@ -0,0 +1,36 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from workspace.models import Workspace
+from workspace.revisions import bump_workspace_revision
+from .changes import log_board_change
+from .models import Board
+from .snapshots import patch_workspace_snapshots
+
+
+@receiver(pre_save, sender=Board)
+def increment_board_revision(sender, instance, **kwargs):
+    # Incremented in SQL so a stale in-memory value can never be written back
+    if not instance._state.adding:
+        instance.revision = F("revision") + 1
+
+
+@receiver(post_save, sender=Board)
+def record_board_save(sender, instance, created, **kwargs):
+    # Bumped first: it locks the workspace row the change entry is ordered by
+    bump_workspace_revision(instance.workspace_id)
+    log_board_change(instance, "created" if created else "updated")
+
+
+@receiver(post_delete, sender=Board)
+def record_board_delete(sender, instance, **kwargs):
+    bump_workspace_revision(instance.workspace_id)
+    log_board_change(instance, "deleted")
+
+
+@receiver(post_save, sender=Workspace)
+def refresh_embedded_workspace(sender, instance, created, **kwargs):
+    # Board snapshots embed the workspace, so a rename must rewrite them
+    if not created:
+        patch_workspace_snapshots(instance.id)
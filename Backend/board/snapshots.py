@@ -0,0 +1,206 @@
+from django.db import transaction
+
+from backend.fastjson import dumps, loads
+from workspace.serialization import workspace_to_dict
+from .counters import get_board_task_counts
+from .models import Board, BoardSnapshot
+from .serialization import TASK_FIELDS, board_queryset, board_to_dict, task_queryset
+
+# Snapshots are kept in step by the write that changes a board: one-task
+# writes patch the stored payload in place (patch_board_snapshot,
+# patch_task_snapshot) and bulk writes drop it (drop_board_snapshots), so
+# no write serializes a whole board inside its transaction. A dropped or
+# missing snapshot is rebuilt by the next plain read (store_missing_snapshot).
+
+# Where patch_task_snapshot puts a task in its status column, besides
+# right after a given task id (None for the top)
+KEEP = "keep"
+END = "end"
+
+
+def build_snapshot(board):
+    """Build (unsaved) the snapshot of a board loaded with its workspace."""
+    data = board_to_dict(
+        board,
+        task_queryset().filter(board=board),
+        task_counts=get_board_task_counts([board.id])[board.id],
+    )
+    return BoardSnapshot(
+        board=board,
+        workspace_id=board.workspace_id,
+        board_revision=board.revision,
+        workspace_revision=board.workspace.revision,
+        payload=dumps(data).decode(),
+    )
+
+
+def refresh_board_snapshots(*board_ids):
+    """Rewrite the snapshots of ``board_ids`` from live data."""
+    for board in board_queryset(with_tasks=False).filter(id__in=board_ids):
+        snapshot = build_snapshot(board)
+        BoardSnapshot.objects.update_or_create(
+            board=board,
+            defaults={
+                "workspace_id": snapshot.workspace_id,
+                "board_revision": snapshot.board_revision,
+                "workspace_revision": snapshot.workspace_revision,
+                "payload": snapshot.payload,
+            },
+        )
+
+
+def _load_snapshot(board_id):
+    return BoardSnapshot.objects.select_related("board__workspace").filter(board_id=board_id).first()
+
+
+def _save_snapshot(snapshot, data):
+    # The revisions were joined in after the writer's bump, in its transaction
+    snapshot.payload = dumps(data).decode()
+    snapshot.board_revision = snapshot.board.revision
+    snapshot.workspace_revision = snapshot.board.workspace.revision
+    snapshot.save(update_fields=["payload", "board_revision", "workspace_revision", "updated_at"])
+
+
+def patch_board_snapshot(board_id, values):
+    """
+    Apply an edit of board payload fields (``values``) in place to the
+    snapshot of a board. Call it after the revision bump, in the same
+    transaction.
+    """
+    snapshot = _load_snapshot(board_id)
+    if snapshot is None:
+        # Backfilled by the next read
+        return
+    data = loads(snapshot.payload)
+    data.update(values)
+    _save_snapshot(snapshot, data)
+
+
+def _shift_counts(counts, keys, delta):
+    for _, status, priority in keys:
+        counts["total"] += delta
+        counts["status"][status] = counts["status"].get(status, 0) + delta
+        counts["priority"][priority] = counts["priority"].get(priority, 0) + delta
+
+
+def _column_index(tasks, status, after):
+    """Index to insert a task of ``status`` at: see patch_task_snapshot."""
+    # Columns follow each other in status order, as in task_queryset()
+    if after == END:
+        return next((i for i, task in enumerate(tasks) if task["status"] > status), len(tasks))
+    if after is None:
+        return next((i for i, task in enumerate(tasks) if task["status"] >= status), len(tasks))
+    index = next((i for i, task in enumerate(tasks) if task["id"] == after), None)
+    return None if index is None else index + 1
+
+
+def patch_task_snapshot(board_id, task_id, values=None, after=KEEP, removed=(), added=()):
+    """
+    Apply a one-task change in place to the snapshot of a board. ``values``
+    are the task's changed payload fields (all of them for a task new to
+    the board), or None if it left the board (deleted or moved away).
+    ``after`` places it in its column: KEEP where it was, END at the
+    bottom, None at the top, or a task id to follow. ``removed`` and
+    ``added`` are the counter keys the change took the task out of and put
+    it in (see adjust_task_counts). Call it after the revision bump, in the
+    same transaction.
+    """
+    snapshot = _load_snapshot(board_id)
+    if snapshot is None:
+        return
+    data = loads(snapshot.payload)
+    tasks = data["tasks"]
+    index = next((i for i, entry in enumerate(tasks) if entry["id"] == task_id), None)
+    if values is None:
+        if index is not None:
+            del tasks[index]
+    elif index is not None and after == KEEP:
+        tasks[index].update(values)
+    else:
+        if index is not None:
+            entry = tasks.pop(index)
+            entry.update(values)
+        elif after != KEEP and set(TASK_FIELDS) <= set(values):
+            entry = values
+        else:
+            # Not in the snapshot, so it has drifted: rebuilt by the next read
+            drop_board_snapshots(board_id)
+            return
+        index = _column_index(tasks, entry["status"], after)
+        if index is None:
+            drop_board_snapshots(board_id)
+            return
+        tasks.insert(index, entry)
+    if "task_counts" in data:
+        _shift_counts(data["task_counts"], [key for key in removed if key[0] == board_id], -1)
+        _shift_counts(data["task_counts"], [key for key in added if key[0] == board_id], 1)
+    _save_snapshot(snapshot, data)
+
+
+def drop_board_snapshots(*board_ids):
+    """
+    Delete the snapshots of ``board_ids``; the next read of each board
+    rebuilds it. Cheaper than a refresh for writers that change a board
+    many times in a row, as a refresh serializes the whole board.
+    """
+    BoardSnapshot.objects.filter(board_id__in=board_ids).delete()
+
+
+def patch_workspace_snapshots(workspace_id):
+    """Rewrite the workspace embedded in its boards' snapshots, after a rename."""
+    for snapshot in BoardSnapshot.objects.select_related("board__workspace").filter(workspace_id=workspace_id):
+        data = loads(snapshot.payload)
+        data["workspace"] = workspace_to_dict(snapshot.board.workspace)
+        _save_snapshot(snapshot, data)
+
+
+def store_missing_snapshot(board, data):
+    """
+    Backfill a snapshot from a payload a read has just built from
+    ``board``. Never replaces an existing row, and stores nothing if the
+    board or its workspace has changed since ``board`` was loaded: a write
+    committed in between (one that found no snapshot to patch) may not be
+    in ``data``.
+    """
+    with transaction.atomic():
+        current = Board.objects.select_for_update().filter(
+            id=board.id, revision=board.revision, workspace__revision=board.workspace.revision
+        )
+        if not current.exists():
+            return
+        BoardSnapshot.objects.bulk_create(
+            [
+                BoardSnapshot(
+                    board=board,
+                    workspace_id=board.workspace_id,
+                    board_revision=board.revision,
+                    workspace_revision=board.workspace.revision,
+                    payload=dumps(data).decode(),
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def find_stale_snapshots(board_ids=None):
+    """
+    Compare snapshots with live data. Returns ``(missing, drifted)`` lists of
+    board ids.
+    """
+    boards = board_queryset(with_tasks=False).select_related("snapshot").order_by("id")
+    if board_ids is not None:
+        boards = boards.filter(id__in=board_ids)
+    missing, drifted = [], []
+    for board in boards.iterator(chunk_size=100):
+        try:
+            snapshot = board.snapshot
+        except BoardSnapshot.DoesNotExist:
+            missing.append(board.id)
+            continue
+        expected = build_snapshot(board)
+        if (
+            loads(snapshot.payload) != loads(expected.payload)
+            or snapshot.workspace_id != expected.workspace_id
+        ):
+            drifted.append(board.id)
+    return missing, drifted
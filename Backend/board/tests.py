@@ -1,3 +1,644 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from backend.asgi import application
+from backend.fastjson import dumps
+from user.revocation import revocation_store
+from task.models import Task
+from workspace.activity import activity_buffer
+from workspace.models import UserWorkspace, Workspace
+from .counters import find_drifted_counts, get_board_task_counts
+from .events import event_hub
+from .models import Board, BoardChange, BoardSnapshot, BoardTaskCount
+
+
+class ApiTestCase(TestCase):
+    """
+    A workspace with a few boards of tasks spread over every column, with
+    two assignees, and a logged-in member. Big enough for any per-board or
+    per-task query to show up in a query count.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("member", "member@example.com", "pw12345!")
+        cls.other = User.objects.create_user("other", "other@example.com", "pw12345!")
+        cls.workspace = Workspace.objects.create(name="Workspace")
+        UserWorkspace.objects.create(user=cls.user, workspace=cls.workspace)
+        UserWorkspace.objects.create(user=cls.other, workspace=cls.workspace, role="MEMBER")
+
+        response = cls.client_class().post(
+            "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+        )
+        cls.token = response.json()["token"]
+
+        cls.boards = [Board.objects.create(name=f"Board {i}", workspace=cls.workspace) for i in range(3)]
+        for board in cls.boards:
+            cls.api(
+                cls.client_class(),
+                "post",
+                f"/task/bulk-create/{board.id}",
+                [
+                    {
+                        "name": f"Task {i}",
+                        "priority": ("low", "medium", "high")[i % 3],
+                        "status": ("not-done", "semi-done", "done")[i % 3],
+                        "assigned_to_id": (cls.user.id, cls.other.id, None)[i % 3],
+                    }
+                    for i in range(12)
+                ],
+            )
+            # Writes patch the snapshots written by these first reads
+            cls.api(cls.client_class(), "get", f"/board/{board.id}")
+        cls.board = cls.boards[0]
+
+    @classmethod
+    def api(cls, client, method, url, body=None, **headers):
+        headers.setdefault("HTTP_AUTHORIZATION", f"Bearer {cls.token}")
+        if body is None:
+            return getattr(client, method)(url, **headers)
+        return getattr(client, method)(url, dumps(body), content_type="application/json", **headers)
+
+    def setUp(self):
+        # Budgets are for warm caches: the token is verified and the
+        # member's roles are loaded, and no revocation sync is due
+        revocation_store.sync()
+        self.request("get", f"/board/{self.board.id}")
+
+    def request(self, method, url, body=None, **headers):
+        return self.api(self.client, method, url, body, **headers)
+
+    def assertBudget(self, queries, method, url, body=None, status=200, **headers):
+        with self.assertNumQueries(queries):
+            response = self.request(method, url, body, **headers)
+        self.assertEqual(response.status_code, status, response.content)
+        return response
+
+
+class BoardQueryBudgetTests(ApiTestCase):
+    """
+    Query budgets of the board endpoints. Counts include the SAVEPOINT and
+    RELEASE of each atomic block, which are BEGIN and COMMIT in production.
+    """
+
+    def test_get_boards(self):
+        # workspace, boards page, their tasks, their counters
+        response = self.assertBudget(4, "get", f"/board/all/{self.workspace.id}")
+        self.assertEqual(sum(len(board["tasks"]) for board in response.json()), 36)
+
+    def test_get_board_from_snapshot(self):
+        self.assertBudget(1, "get", f"/board/{self.board.id}")
+
+    def test_get_board_without_snapshot(self):
+        BoardSnapshot.objects.filter(board=self.board).delete()
+        # no snapshot, board, counters, tasks, then the guarded backfill
+        self.assertBudget(8, "get", f"/board/{self.board.id}")
+        self.assertTrue(BoardSnapshot.objects.filter(board=self.board).exists())
+
+    def test_get_board_per_column(self):
+        # board, counters, one page per status column
+        self.assertBudget(5, "get", f"/board/{self.board.id}?per_column=2")
+
+    def test_get_board_column(self):
+        self.assertBudget(3, "get", f"/board/{self.board.id}/column/done?limit=2")
+
+    def test_create_board(self):
+        # workspace, insert, workspace revision, change log
+        self.assertBudget(6, "post", "/board/create", {"name": "New", "workspace": self.workspace.id})
+
+    def test_update_board(self):
+        # board, update, workspace revision, change log, snapshot patch
+        self.assertBudget(8, "put", f"/board/update/{self.board.id}", {"name": "Renamed"})
+
+    def test_patch_board(self):
+        self.assertBudget(8, "patch", f"/board/update/{self.board.id}", {"name": "Renamed"})
+
+    def test_delete_board(self):
+        # board, cascades of its rows, workspace revision, change log
+        self.assertBudget(10, "delete", f"/board/delete/{self.board.id}")
+
+
+class BoardTaskCountTests(ApiTestCase):
+    """The counter rows follow every write path, without a recount."""
+
+    def assertCountsMatch(self):
+        board_ids = [board.id for board in self.boards]
+        self.assertEqual(find_drifted_counts(board_ids), [])
+        counts = get_board_task_counts(board_ids)
+        for board in self.boards:
+            tasks = Task.objects.filter(board=board)
+            self.assertEqual(counts[board.id]["total"], tasks.count())
+            for status, count in counts[board.id]["status"].items():
+                self.assertEqual(count, tasks.filter(status=status).count(), (board.id, status))
+
+    def task(self, status="not-done"):
+        return Task.objects.filter(board=self.board, status=status).order_by("id").first()
+
+    def write(self, method, url, body=None):
+        response = self.request(method, url, body)
+        self.assertIn(response.status_code, (200, 201), response.content)
+        self.assertCountsMatch()
+
+    def test_single_task_writes(self):
+        self.assertCountsMatch()
+        self.write("post", f"/task/create/{self.board.id}", {"name": "New", "priority": "high"})
+        task = self.task()
+        url = f"{self.board.id}/t/{task.id}"
+        self.write("put", f"/task/status/{url}", {"status": "done"})
+        self.write("put", f"/task/update/{url}", {
+            "name": "Renamed", "description": "", "priority": "low", "status": "semi-done",
+        })
+        self.write("patch", f"/task/update/{url}", {"priority": "medium"})
+        self.write("put", f"/task/move/{url}", {"status": "not-done"})
+        self.write("put", f"/task/assign/{task.id}", {"prevBoard": self.board.id, "newBoard": self.boards[1].id})
+        self.write("delete", f"/task/delete/{self.board.id}/t/{self.task().id}")
+
+    def test_bulk_writes(self):
+        self.write("put", "/task/bulk-status", {"filter": {"board": self.board.id, "priority": "low"}, "status": "done"})
+        self.write("put", "/task/bulk-move", {
+            "filter": {"board": self.board.id, "status": "done"}, "newBoard": self.boards[1].id,
+        })
+        self.write("delete", "/task/bulk-delete", {"filter": {"board": self.boards[1].id, "priority": "high"}})
+
+    def test_deleted_board_leaves_no_counters(self):
+        self.request("delete", f"/board/delete/{self.board.id}")
+        self.assertFalse(BoardTaskCount.objects.filter(board_id=self.board.id).exists())
+
+    def test_drift_is_found_and_repaired(self):
+        # A write that bypassed the counters, e.g. a raw UPDATE
+        Task.objects.filter(board=self.boards[1], status="done").update(status="not-done")
+        board_ids = [board.id for board in self.boards]
+        self.assertEqual(find_drifted_counts(board_ids), [self.boards[1].id])
+
+        stdout = io.StringIO()
+        with self.assertRaisesMessage(CommandError, "rerun without --check"):
+            call_command("repair_board_counts", "--check", stdout=stdout)
+        self.assertIn(f"Drifted task counters: {self.boards[1].id}", stdout.getvalue())
+        self.assertEqual(find_drifted_counts(board_ids), [self.boards[1].id])
+
+        call_command("repair_board_counts", stdout=stdout)
+        self.assertEqual(find_drifted_counts(board_ids), [])
+        self.assertCountsMatch()
+        call_command("repair_board_counts", "--check", stdout=stdout)
+
+    def test_zero_rows_are_not_drift(self):
+        BoardTaskCount.objects.create(board=self.board, status="done", priority="low", count=0)
+        self.assertEqual(find_drifted_counts([self.board.id]), [])
+
+
+class ChangeFeedTests(ApiTestCase):
+    def changes(self, since=None, board=None):
+        url = f"/board/{(board or self.board).id}/changes"
+        return self.request("get", f"{url}?since={since}" if since else url)
+
+    def task(self, status="not-done"):
+        return Task.objects.filter(board=self.board, status=status).order_by("id").first()
+
+    def test_cursor_round_trip(self):
+        first = self.changes().json()
+        self.assertEqual(len(first["tasks"]), 12)
+        self.assertEqual(first["board"]["id"], self.board.id)
+        nothing = self.changes(first["cursor"]).json()
+        self.assertEqual((nothing["tasks"], nothing["deleted_tasks"], nothing["more"]), ([], [], False))
+        self.assertNotIn("board", nothing)
+
+        task = self.task()
+        self.request("patch", f"/task/update/{self.board.id}/t/{task.id}", {"name": "Renamed"})
+        self.request("patch", f"/board/update/{self.board.id}", {"name": "Renamed board"})
+        changed = self.changes(nothing["cursor"]).json()
+        self.assertEqual([t["id"] for t in changed["tasks"]], [task.id])
+        self.assertEqual(changed["tasks"][0]["name"], "Renamed")
+        self.assertEqual(changed["board"]["name"], "Renamed board")
+        # Each change is delivered once
+        again = self.changes(changed["cursor"]).json()
+        self.assertEqual((again["tasks"], again["deleted_tasks"]), ([], []))
+
+    def test_tombstones(self):
+        cursor = self.changes().json()["cursor"]
+        target_cursor = self.changes(board=self.boards[1]).json()["cursor"]
+        deleted, moved = self.task(), self.task("done")
+        self.request("delete", f"/task/delete/{self.board.id}/t/{deleted.id}")
+        self.request("put", f"/task/assign/{moved.id}", {"prevBoard": self.board.id, "newBoard": self.boards[1].id})
+
+        changes = self.changes(cursor).json()
+        self.assertEqual(changes["deleted_tasks"], sorted([deleted.id, moved.id]))
+        self.assertEqual(changes["tasks"], [])
+        # The moved task shows up on its new board
+        target = self.changes(target_cursor, board=self.boards[1]).json()
+        self.assertEqual([t["id"] for t in target["tasks"]], [moved.id])
+
+    def test_workspace_tombstones(self):
+        cursor = self.request("get", f"/workspace/changes/{self.workspace.id}").json()["cursor"]
+        self.request("delete", f"/board/delete/{self.boards[2].id}")
+        changes = self.request("get", f"/workspace/changes/{self.workspace.id}?since={cursor}").json()
+        # Its tasks go with it: clients drop them along with the board
+        self.assertEqual(changes["deleted_boards"], [self.boards[2].id])
+
+    @override_settings(SYNC_PAGE_SIZE=5)
+    def test_more(self):
+        cursor = self.changes().json()["cursor"]
+        response = self.request("put", "/task/bulk-status", {"filter": {"board": self.board.id}, "status": "done"})
+        changed = response.json()["affected"]
+        self.assertGreater(changed, 5)
+
+        seen, pages, more = set(), 0, True
+        while more:
+            page = self.changes(cursor).json()
+            cursor, more = page["cursor"], page["more"]
+            seen |= {t["id"] for t in page["tasks"]}
+            pages += 1
+            self.assertLessEqual(len(page["tasks"]), 5)
+        self.assertEqual(len(seen), changed)
+        self.assertEqual(pages, -(-changed // 5))
+
+    def test_expired_cursor_asks_for_a_resync(self):
+        cursor = self.changes().json()["cursor"]
+        later = timezone.now() + datetime.timedelta(days=8)
+        with mock.patch("board.changes.timezone.now", return_value=later):
+            response = self.changes(cursor)
+        self.assertEqual(response.status_code, 410)
+        self.assertIs(response.json()["resync"], True)
+        self.assertEqual(self.changes(cursor).status_code, 200)
+
+    def test_malformed_cursor(self):
+        self.assertEqual(self.changes("garbage").status_code, 400)
+
+    def test_prune(self):
+        entries = BoardChange.objects.filter(board_id=self.board.id).order_by("id")
+        old, kept = entries[0].id, entries[1].id
+        # Retention plus the day of grace
+        BoardChange.objects.filter(id=old).update(created_at=timezone.now() - datetime.timedelta(days=8, hours=1))
+        BoardChange.objects.filter(id=kept).update(created_at=timezone.now() - datetime.timedelta(days=7, hours=23))
+        total = BoardChange.objects.count()
+        stdout = io.StringIO()
+        call_command("prune_board_changes", stdout=stdout)
+        self.assertIn("Pruned 1 change entry", stdout.getvalue())
+        self.assertFalse(BoardChange.objects.filter(id=old).exists())
+        self.assertEqual(BoardChange.objects.count(), total - 1)
+
+
+@override_settings(PAGE_SIZE=2)
+class BoardListPaginationTests(ApiTestCase):
+    def test_whole_list_without_limit_or_cursor(self):
+        response = self.request("get", f"/board/all/{self.workspace.id}")
+        self.assertEqual(len(response.json()), 3)
+        self.assertNotIn("X-Next-Cursor", response)
+
+    def test_pages_with_limit_or_cursor(self):
+        first = self.request("get", f"/board/all/{self.workspace.id}?limit=2")
+        self.assertEqual([board["id"] for board in first.json()], [board.id for board in self.boards[:2]])
+        rest = self.request("get", f"/board/all/{self.workspace.id}?cursor={first['X-Next-Cursor']}")
+        self.assertEqual([board["id"] for board in rest.json()], [self.boards[2].id])
+
+
+# Scripts run in fresh interpreters against a file database (CHILD_SETUP
+# then one of the scripts below), for what one test process can't show.
+# Mode "build" creates a member with one board of ``count`` tasks
+CHILD_SETUP = """
+import json, os, resource, sys
+import django
+
+os.environ["DJANGO_SETTINGS_MODULE"] = "backend.settings"
+from django.conf import settings
+
+mode, path, count = sys.argv[1], sys.argv[2], int(sys.argv[3])
+settings.DATABASES["default"]["NAME"] = path
+settings.ALLOWED_HOSTS = ["testserver"]
+settings.ACTIVITY_FEED_ENABLED = False
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+from board.models import Board
+from task.models import Task
+from workspace.models import UserWorkspace, Workspace
+
+if mode == "build":
+    call_command("migrate", verbosity=0)
+    user = User.objects.create_user("member", "member@example.com", "pw12345!")
+    workspace = Workspace.objects.create(name="Workspace")
+    UserWorkspace.objects.create(user=user, workspace=workspace)
+    board = Board.objects.create(name="Board", workspace=workspace)
+    Task.objects.bulk_create(
+        (
+            Task(name=f"Streamed task {i}", description="x" * 100, board=board, workspace=workspace,
+                 assigned_to=user, position=f"s{i:06d}")
+            for i in range(count)
+        ),
+        batch_size=1000,
+    )
+    sys.exit()
+"""
+
+# Export the workspace with (mode "stream") or without ("full") ?stream=1
+# and print the growth of the process's peak RSS
+EXPORT_SCRIPT = """
+client = Client()
+body = json.dumps({"username": "member", "password": "pw12345!"})
+token = client.post("/user/login", body, content_type="application/json").json()["token"]
+headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+workspace = Workspace.objects.get()
+# Warm up: every module the export needs is loaded before the baseline
+client.get(f"/board/{Board.objects.get().id}?per_column=1", **headers)
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+response = client.get(f"/board/all/{workspace.id}" + ("?stream=1" if mode == "stream" else ""), **headers)
+size = sum(len(chunk) for chunk in (response.streaming_content if response.streaming else [response.content]))
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"size": size, "growth": (peak - baseline) * 1024}))
+"""
+
+# Hold ``count`` streams of the board open, say "ready", then print when
+# the first task.created event has reached all of them
+LISTEN_SCRIPT = """
+import asyncio, time
+from asgiref.testing import ApplicationCommunicator
+from backend.asgi import application
+
+client = Client()
+body = json.dumps({"username": "member", "password": "pw12345!"})
+token = client.post("/user/login", body, content_type="application/json").json()["token"]
+board = Board.objects.get()
+
+async def stream():
+    communicator = ApplicationCommunicator(application, {
+        "type": "http", "method": "GET", "path": f"/board/{board.id}/events",
+        "query_string": f"token={token}".encode(), "headers": [(b"accept", b"text/event-stream")],
+        "http_version": "1.1", "scheme": "http", "server": ("testserver", 80), "client": ("127.0.0.1", 1),
+        "root_path": "",
+    })
+    await communicator.send_input({"type": "http.request", "body": b""})
+    assert (await communicator.receive_output(5))["status"] == 200
+    return communicator
+
+async def read_until(communicator, needle):
+    body = b""
+    while needle not in body:
+        body += (await communicator.receive_output(10)).get("body", b"")
+    return time.time()
+
+async def main():
+    streams = [await stream() for _ in range(count)]
+    await asyncio.gather(*(read_until(s, b": connected") for s in streams))
+    print("ready", flush=True)
+    received = await asyncio.gather(*(read_until(s, b"event: task.created") for s in streams))
+    print(json.dumps({"received": max(received)}), flush=True)
+    for s in streams:
+        await s.send_input({"type": "http.disconnect"})
+    for s in streams:
+        await s.wait(5)
+
+asyncio.run(main())
+"""
+
+# Create a task on the board and print when it was committed
+WRITE_SCRIPT = """
+import time
+client = Client()
+body = json.dumps({"username": "member", "password": "pw12345!"})
+token = client.post("/user/login", body, content_type="application/json").json()["token"]
+response = client.post(
+    f"/task/create/{Board.objects.get().id}", json.dumps({"name": "Pushed", "priority": "low"}),
+    content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {token}",
+)
+assert response.status_code == 201, response.content
+print(json.dumps({"committed": time.time()}))
+"""
+
+
+def child_command(script, mode, database, count=0):
+    return [sys.executable, "-c", CHILD_SETUP + script, mode, database, str(count)]
+
+
+class BoardStreamingMemoryTests(SimpleTestCase):
+    """
+    ?stream=1 holds a bounded window of rows, however large the board.
+    Measured as the growth of the peak RSS (ru_maxrss) of a fresh process,
+    which counts what tracemalloc can't see: SQLite's page cache and
+    orjson's buffers.
+    """
+
+    TASKS = 100000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.database = os.path.join(cls.directory.name, "export.sqlite3")
+        cls.export("build")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    @classmethod
+    def export(cls, mode):
+        result = subprocess.run(
+            child_command(EXPORT_SCRIPT, mode, cls.database, cls.TASKS),
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        return json.loads(result.stdout) if mode != "build" else None
+
+    def test_peak_rss_is_bounded(self):
+        streamed = self.export("stream")
+        # About 38 MB of JSON; the peak RSS doesn't move on the machine this
+        # was written on
+        self.assertGreater(streamed["size"], 30 * 1024 * 1024)
+        self.assertLess(streamed["growth"], 16 * 1024 * 1024, streamed)
+
+        # The same export built in memory grows the peak by about 270 MB
+        full = self.export("full")
+        self.assertEqual(full["size"], streamed["size"])
+        self.assertGreater(full["growth"], 5 * streamed["size"], full)
+
+
+class SparseFieldsetTests(ApiTestCase):
+    """A card list only transfers and loads the fields it draws."""
+
+    CARD_FIELDS = "id,name,status,priority"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Task.objects.filter(board=cls.board).update(description="x" * 1000)
+
+    def test_card_list_is_a_small_fraction_of_the_full_board(self):
+        full = self.request("get", f"/board/{self.board.id}?per_column=100")
+        cards = self.request("get", f"/board/{self.board.id}?per_column=100&fields={self.CARD_FIELDS}")
+        self.assertEqual(cards.status_code, 200)
+        self.assertLess(len(cards.content), len(full.content) / 5)
+        for column in cards.json()["columns"].values():
+            for task in column["tasks"]:
+                self.assertEqual(set(task), {"id", "name", "status", "priority"})
+
+    def test_card_list_does_not_load_descriptions_or_assignees(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.request("get", f"/board/all/{self.workspace.id}?fields={self.CARD_FIELDS}")
+        task_selects = [query["sql"] for query in queries if 'FROM "task_task"' in query["sql"]]
+        self.assertTrue(task_selects)
+        for sql in task_selects:
+            self.assertNotIn('"task_task"."description"', sql)
+            self.assertNotIn('"auth_user"', sql)
+
+    def test_exclude(self):
+        response = self.request("get", f"/board/all/{self.workspace.id}?exclude=description,assigned_to")
+        task = response.json()[0]["tasks"][0]
+        self.assertNotIn("description", task)
+        self.assertNotIn("assigned_to", task)
+        self.assertIn("name", task)
+
+    def test_unknown_field(self):
+        response = self.request("get", f"/board/{self.board.id}?fields=name,secret")
+        self.assertEqual(response.status_code, 400)
+
+    def test_workspace_fields(self):
+        response = self.request("get", "/workspace/user?fields=id,name")
+        self.assertEqual([set(workspace) for workspace in response.json()], [{"id", "name"}])
+
+
+class BoardEventsTests(ApiTestCase):
+    def test_wsgi_request_gets_501(self):
+        self.assertBudget(0, "get", f"/board/{self.board.id}/events", status=501)
+
+
+class BoardEventsLoadTests(TransactionTestCase):
+    """
+    Connections per worker and broadcast latency of /board/<id>/events,
+    driving the ASGI application in-process.
+    """
+
+    STREAMS = 200
+
+    def setUp(self):
+        user = User.objects.create_user("member", "member@example.com", "pw12345!")
+        workspace = Workspace.objects.create(name="Workspace")
+        UserWorkspace.objects.create(user=user, workspace=workspace)
+        self.board = Board.objects.create(name="Board", workspace=workspace)
+        response = self.client.post(
+            "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+        )
+        self.token = response.json()["token"]
+        revocation_store.sync()
+
+    def tearDown(self):
+        # Write the committed changes' activity while the tables exist
+        activity_buffer.flush()
+
+    async def open_stream(self):
+        communicator = ApplicationCommunicator(application, {
+            "type": "http",
+            "method": "GET",
+            "path": f"/board/{self.board.id}/events",
+            "query_string": f"token={self.token}".encode(),
+            "headers": [(b"accept", b"text/event-stream")],
+            "http_version": "1.1",
+            "scheme": "http",
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 1),
+            "root_path": "",
+        })
+        await communicator.send_input({"type": "http.request", "body": b""})
+        start = await communicator.receive_output(5)
+        return communicator, start["status"]
+
+    async def read_until(self, communicator, needle):
+        body = b""
+        while needle not in body:
+            body += (await communicator.receive_output(5)).get("body", b"")
+        return time.perf_counter()
+
+    async def test_fan_out(self):
+        baseline = event_hub.connections
+        streams = []
+        try:
+            for _ in range(self.STREAMS):
+                communicator, status = await self.open_stream()
+                self.assertEqual(status, 200)
+                streams.append(communicator)
+            await asyncio.gather(*(self.read_until(stream, b": connected") for stream in streams))
+            self.assertEqual(event_hub.connections - baseline, self.STREAMS)
+
+            # One worker refuses streams past its limit
+            with mock.patch.object(event_hub, "max_connections", event_hub.connections):
+                _, status = await self.open_stream()
+            self.assertEqual(status, 503)
+
+            await sync_to_async(self.client.post)(
+                f"/task/create/{self.board.id}",
+                dumps({"name": "Pushed", "priority": "low"}),
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Bearer {self.token}",
+            )
+            committed = time.perf_counter()
+            received = await asyncio.gather(*(self.read_until(stream, b"event: task.created") for stream in streams))
+            # Woken on commit, not at the next poll
+            self.assertLess(max(received) - committed, 1)
+        finally:
+            for stream in streams:
+                await stream.send_input({"type": "http.disconnect"})
+            for stream in streams:
+                await stream.wait(5)
+        self.assertEqual(event_hub.connections, baseline)
+
+
+class BoardEventsCrossProcessTests(SimpleTestCase):
+    """
+    A change made by one worker process reaches the streams held by
+    another: nothing wakes that process's poller, so it finds the change
+    in the log within SSE_POLL_INTERVAL.
+    """
+
+    STREAMS = 50
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = os.path.join(directory.name, "events.sqlite3")
+        subprocess.run(child_command("", "build", self.database), cwd=settings.BASE_DIR, check=True)
+
+    def test_fan_out_across_processes(self):
+        listener = subprocess.Popen(
+            child_command(LISTEN_SCRIPT, "listen", self.database, self.STREAMS),
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            self.assertEqual(listener.stdout.readline().strip(), "ready")
+            writer = subprocess.run(
+                child_command(WRITE_SCRIPT, "write", self.database),
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                check=True,
+                text=True,
+            )
+            committed = json.loads(writer.stdout)["committed"]
+            received = json.loads(listener.stdout.readline())["received"]
+            self.assertEqual(listener.wait(10), 0)
+        finally:
+            listener.kill()
+            listener.stdout.close()
+        # One poll interval, plus the time to resolve and deliver
+        self.assertLess(received - committed, settings.SSE_POLL_INTERVAL + 0.5)
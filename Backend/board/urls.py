@@ -1,9 +1,12 @@
 from django.urls import path
-from .views import get_boards, get_board_by_id, create_board, update_board, delete_board
+from .views import get_boards, get_board_by_id, get_board_column, get_board_changes, board_events, create_board, update_board, delete_board
 
 urlpatterns = [
     path('all/<int:workspace_id>', get_boards, name='get_boards'),
     path('<int:board_id>', get_board_by_id, name='get_board_by_id'),
+    path('<int:board_id>/column/<str:status>', get_board_column, name='get_board_column'),
+    path('<int:board_id>/changes', get_board_changes, name='get_board_changes'),
+    path('<int:board_id>/events', board_events, name='board_events'),
     path('create', create_board, name='create_board'),
     path('update/<int:board_id>', update_board, name='update_board'),
     path('delete/<int:board_id>', delete_board, name='delete_board')
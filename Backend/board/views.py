@@ -1,7 +1,33 @@
-from django.http import JsonResponse
-from .models import Board
-from workspace.models import Workspace, UserWorkspace
-from django.contrib.auth.models import User
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from backend.fastjson import JsonResponse, loads
+from .models import Board, BoardSnapshot
+from workspace.models import Workspace
+from workspace.membership import get_workspace_role
+from .serialization import (
+    TASK_FIELDS,
+    TASK_STATUSES,
+    board_queryset,
+    board_to_dict,
+    column_page,
+    column_to_dict,
+    columns_to_dict,
+    iter_boards_json,
+    task_queryset,
+)
+from .changes import CursorExpired, board_changes
+from .counters import get_board_task_counts
+from .events import event_hub, read_events
+from .snapshots import patch_board_snapshot, store_missing_snapshot
+from backend.conditional import not_modified, revision_etag, with_etag
+from backend.fieldsets import InvalidFieldset, requested_fields, wants_representation
+from backend.pagination import InvalidPage, get_page_limit, keyset_page, paginated_response
+from backend.streaming import streaming_json_response
+from django.conf import settings
 import json
 from django.views.decorators.csrf import csrf_exempt
 import jwt
@@ -19,53 +45,47 @@ def get_boards(request, workspace_id):
 
         try:
             workspace = Workspace.objects.get(id=workspace_id)
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=workspace, user=user)
         except Workspace.DoesNotExist:
             return JsonResponse({"error": "Workspace not found"}, status=404)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
+
+        # Check if user is a member of this workspace
+        if get_workspace_role(request, workspace.id) is None:
             return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
 
-        boards = Board.objects.filter(workspace=workspace_id)
+        # The workspace revision covers every board and task in it
+        etag = revision_etag(request, "boards", workspace.id, workspace.revision)
+        response = not_modified(request, etag)
+        if response:
+            return response
 
+        try:
+            # ?fields= / ?exclude= select task fields, pushed down to the SQL projection
+            task_fields = requested_fields(request, TASK_FIELDS)
+
+            # ?stream=1 streams every board in the workspace (no pagination)
+            if request.GET.get("stream") == "1":
+                boards = board_queryset(with_tasks=False).filter(workspace=workspace_id)
+                task_counts = get_board_task_counts(list(boards.values_list("id", flat=True)))
+                return with_etag(
+                    streaming_json_response(iter_boards_json(boards, task_fields, task_counts)),
+                    etag,
+                )
+
+            boards, next_cursor = keyset_page(
+                board_queryset(task_fields=task_fields).filter(workspace=workspace_id),
+                ("created_at", "id"),
+                get_page_limit(request, optional=True),
+                request.GET.get("cursor"),
+            )
+        except (InvalidPage, InvalidFieldset) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        task_counts = get_board_task_counts([board.id for board in boards])
         data = [
-            {
-                "id": board.id,
-                "name": board.name,
-                "workspace": {
-                    "id": board.workspace.id,
-                    "name": board.workspace.name,
-                    "created_at": board.workspace.created_at,
-                    "updated_at": board.workspace.updated_at,
-                },
-                "tasks": [
-                    {
-                        "id": task.id,
-                        "name": task.name,
-                        "description": task.description,
-                        "priority": task.priority,
-                        "status": task.status,
-                        "board_id": task.board.id,
-                        "assigned_to": {
-                            "id": task.assigned_to.id,
-                            "username": task.assigned_to.username,
-                            "first_name": task.assigned_to.first_name,
-                            "last_name": task.assigned_to.last_name,
-                        } if task.assigned_to else None,
-                        "created_at": task.created_at,
-                        "updated_at": task.updated_at,
-                    }
-                    for task in board.tasks.all()
-                ],
-                "created_at": board.created_at,
-                "updated_at": board.updated_at,
-            }
+            board_to_dict(board, board.tasks.all(), task_fields, task_counts[board.id])
             for board in boards
         ]
-        return JsonResponse(data, safe=False)
+        return with_etag(paginated_response(request, data, next_cursor), etag)
 
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
@@ -73,6 +93,82 @@ def get_boards(request, workspace_id):
 
 # get board by id
 def get_board_by_id(request, board_id):
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    # The plain full-board read is served straight from its snapshot row
+    plain_read = not request.GET
+    if plain_read:
+        snapshot = BoardSnapshot.objects.filter(board_id=board_id).first()
+        if snapshot is not None:
+            if get_workspace_role(request, snapshot.workspace_id) is None:
+                return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+            etag = revision_etag(
+                request, "board", board_id, snapshot.board_revision, snapshot.workspace_revision
+            )
+            response = not_modified(request, etag)
+            if response:
+                return response
+            return with_etag(HttpResponse(snapshot.payload, content_type="application/json"), etag)
+
+    try:
+        board = board_queryset(with_tasks=False).get(id=board_id)
+    except Board.DoesNotExist:
+        return JsonResponse({"error": "Board not found"}, status=404)
+
+    # Check if user is a member of this workspace
+    if get_workspace_role(request, board.workspace_id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    etag = revision_etag(
+        request, "board", board.id, board.revision, board.workspace.revision
+    )
+    response = not_modified(request, etag)
+    if response:
+        return response
+
+    # ?fields= / ?exclude= select task fields, pushed down to the SQL projection
+    try:
+        task_fields = requested_fields(request, TASK_FIELDS)
+    except InvalidFieldset as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    task_counts = get_board_task_counts([board.id])[board.id]
+
+    # ?per_column=N returns each status column's total and first N tasks
+    # instead of every task on the board
+    if "per_column" in request.GET:
+        try:
+            limit = get_page_limit(
+                request, "per_column", maximum=settings.BOARD_COLUMN_MAX_PAGE_SIZE
+            )
+        except InvalidPage as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        data = board_to_dict(board, task_counts=task_counts)
+        data["columns"] = columns_to_dict(board.id, limit, task_fields, task_counts["status"])
+        return with_etag(JsonResponse(data), etag)
+
+    data = board_to_dict(
+        board, task_queryset(task_fields).filter(board=board), task_fields, task_counts
+    )
+    if plain_read:
+        store_missing_snapshot(board, data)
+
+    return with_etag(JsonResponse(data, safe=False), etag)
+
+
+# Get the next page of one kanban column
+# the url pattern is /board/<int:board_id>/column/<str:status>?cursor=...&limit=...
+def get_board_column(request, board_id, status):
+    if status not in TASK_STATUSES:
+        return JsonResponse(
+            {"error": "Task status must be [not-done, semi-done, or done]"}, status=400
+        )
+
     try:
         board = Board.objects.get(id=board_id)
     except Board.DoesNotExist:
@@ -85,48 +181,131 @@ def get_board_by_id(request, board_id):
     if not user_id:
         return JsonResponse({"error": "User ID not found in token"}, status=400)
 
+    if get_workspace_role(request, board.workspace_id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
     try:
-        user = User.objects.get(id=user_id)
-        # Check if user is a member of this workspace
-        user_workspace = UserWorkspace.objects.get(workspace=board.workspace, user=user)
-    except User.DoesNotExist:
-        return JsonResponse({"error": "User not found"}, status=404)
-    except UserWorkspace.DoesNotExist:
+        task_fields = requested_fields(request, TASK_FIELDS)
+        limit = get_page_limit(
+            request,
+            default=settings.BOARD_COLUMN_PAGE_SIZE,
+            maximum=settings.BOARD_COLUMN_MAX_PAGE_SIZE,
+        )
+        count = get_board_task_counts([board.id])[board.id]["status"][status]
+        tasks, next_cursor = column_page(
+            board.id, status, limit, request.GET.get("cursor"), task_fields
+        )
+    except (InvalidPage, InvalidFieldset) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    return JsonResponse(column_to_dict(count, tasks, next_cursor, task_fields))
+
+
+# Get the tasks changed since a sync cursor
+# the url pattern is /board/<int:board_id>/changes?since=<cursor>
+# without since the whole board is returned with the first cursor
+def get_board_changes(request, board_id):
+    try:
+        board = board_queryset(with_tasks=False).get(id=board_id)
+    except Board.DoesNotExist:
+        return JsonResponse({"error": "Board not found"}, status=404)
+
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    if get_workspace_role(request, board.workspace_id) is None:
         return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
 
-    data = {
-        "id": board.id,
-        "name": board.name,
-        "workspace": {
-            "id": board.workspace.id,
-            "name": board.workspace.name,
-            "created_at": board.workspace.created_at,
-            "updated_at": board.workspace.updated_at,
-        },
-        "tasks": [
-            {
-                "id": task.id,
-                "name": task.name,
-                "description": task.description,
-                "priority": task.priority,
-                "status": task.status,
-                "board_id": task.board.id,
-                "assigned_to": {
-                    "id": task.assigned_to.id,
-                    "username": task.assigned_to.username,
-                    "first_name": task.assigned_to.first_name,
-                    "last_name": task.assigned_to.last_name,
-                } if task.assigned_to else None,
-                "created_at": task.created_at,
-                "updated_at": task.updated_at,
-            }
-            for task in board.tasks.all()
-        ],
-        "created_at": board.created_at,
-        "updated_at": board.updated_at,
-    }
-
-    return JsonResponse(data, safe=False)
+    try:
+        data = board_changes(board, request.GET.get("since"))
+    except InvalidPage as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except CursorExpired as e:
+        return JsonResponse({"error": str(e), "resync": True}, status=410)
+
+    return JsonResponse(data)
+
+
+# Stream a board's changes as Server-Sent Events (task.created, task.moved, board.updated, ...)
+# the url pattern is /board/<int:board_id>/events
+# a reconnect resumes after the Last-Event-ID header (or ?last_event_id=)
+async def board_events(request, board_id):
+    # Under WSGI an endless stream would hold a worker thread forever
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "Event streams need the ASGI server"}, status=501)
+
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    workspace_id = await Board.objects.filter(id=board_id).values_list("workspace_id", flat=True).afirst()
+    if workspace_id is None:
+        return JsonResponse({"error": "Board not found"}, status=404)
+
+    if await sync_to_async(get_workspace_role)(request, workspace_id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    if last_event_id is not None and not last_event_id.isdigit():
+        return JsonResponse({"error": "Last-Event-ID must be an event id"}, status=400)
+
+    if event_hub.connections >= event_hub.max_connections:
+        return JsonResponse({"error": "Too many event streams, retry later"}, status=503)
+
+    response = StreamingHttpResponse(
+        _event_stream(board_id, last_event_id and int(last_event_id)),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Keep reverse proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def _event_stream(board_id, last_event_id):
+    # Subscribed once streaming starts, so every subscription is released in finally
+    subscription = await sync_to_async(event_hub.subscribe)(board_id, asyncio.get_running_loop())
+    if subscription is None:
+        return
+    try:
+        # Sent at once so clients and proxies see the stream open
+        yield b": connected\n\n"
+
+        # Replay what the client missed; live events arriving meanwhile wait in the queue
+        if last_event_id is not None:
+            while True:
+                events = await sync_to_async(read_events)(
+                    board_id, last_event_id, settings.SYNC_PAGE_SIZE
+                )
+                for last_event_id, message in events:
+                    yield message
+                if len(events) < settings.SYNC_PAGE_SIZE:
+                    break
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), settings.SSE_HEARTBEAT_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if event is None:
+                # Fell too far behind; the client reconnects and replays
+                return
+            event_id, message = event
+            if last_event_id is not None and event_id <= last_event_id:
+                continue
+            yield message
+    finally:
+        event_hub.unsubscribe(subscription)
 
 
 # Create new board
@@ -134,7 +313,7 @@ def get_board_by_id(request, board_id):
 def create_board(request):
     if request.method == "POST":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             name = data.get("name")
             workspace = data.get("workspace")
 
@@ -161,34 +340,15 @@ def create_board(request):
         if not user_id:
             return JsonResponse({"error": "User ID not found in token"}, status=400)
 
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=workspace_to_save, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
+        # Check if user is a member of this workspace
+        if get_workspace_role(request, workspace_to_save.id) is None:
             return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
 
         board = Board(name=name, workspace=workspace_to_save)
-        board.save()
-
-        workspace_data = {
-            "id": workspace_to_save.id,
-            "name": workspace_to_save.name,
-            "created_at": workspace_to_save.created_at,
-            "updated_at": workspace_to_save.updated_at,
-        }
+        with transaction.atomic():
+            board.save()
 
-        return JsonResponse(
-            {
-                "id": board.id,
-                "name": board.name,
-                "workspace": workspace_data,
-                "created_at": board.created_at,
-                "updated_at": board.updated_at,
-            }
-        )
+        return JsonResponse(board_to_dict(board))
     else:
         return JsonResponse({"error": "Method not allowed"}, status=405)
 
@@ -198,7 +358,7 @@ def create_board(request):
 def update_board(request, board_id):
     if request.method == "PUT":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             name = data.get("name")
 
         except json.JSONDecodeError:
@@ -208,7 +368,7 @@ def update_board(request, board_id):
             return JsonResponse({"error": "Board name is required"}, status=400)
 
         try:
-            board = Board.objects.get(id=board_id)
+            board = board_queryset(with_tasks=False).get(id=board_id)
         except Board.DoesNotExist:
             return JsonResponse({"error": "Board not found"}, status=404)
 
@@ -219,38 +379,73 @@ def update_board(request, board_id):
         if not user_id:
             return JsonResponse({"error": "User ID not found in token"}, status=400)
 
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=board.workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
+        # Check if user is a member of this workspace
+        if get_workspace_role(request, board.workspace_id) is None:
             return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
 
         board.name = name
-        board.save()
+        with transaction.atomic():
+            board.save()
+            patch_board_snapshot(board.id, {"name": board.name, "updated_at": board.updated_at})
 
-        workspace_data = {
-            "id": board.workspace.id,
-            "name": board.workspace.name,
-            "created_at": board.workspace.created_at,
-            "updated_at": board.workspace.updated_at,
-        }
-
-        return JsonResponse(
-            {
-                "id": board.id,
-                "name": board.name,
-                "workspace": workspace_data,
-                "created_at": board.created_at,
-                "updated_at": board.updated_at,
-            }
-        )
+        return JsonResponse(board_to_dict(board))
+    elif request.method == "PATCH":
+        return patch_board(request, board_id)
     else:
         return JsonResponse({"error": "Method not allowed"}, status=405)
 
 
+# Partially update a board
+# the url pattern is /board/update/<int:board_id> (PATCH)
+# the request body holds only the fields to change, among PATCHABLE_BOARD_FIELDS
+# the response holds the id, the changed fields and updated_at; ask for the
+# whole board with "Prefer: return=representation"
+PATCHABLE_BOARD_FIELDS = ("name",)
+
+
+def patch_board(request, board_id):
+    try:
+        data = loads(request.body)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict) or not data:
+        return JsonResponse({"error": "A JSON object of fields to update is required"}, status=400)
+
+    unknown = set(data) - set(PATCHABLE_BOARD_FIELDS)
+    if unknown:
+        return JsonResponse({"error": f"Unknown field(s): {', '.join(sorted(unknown))}"}, status=400)
+    if not isinstance(data["name"], str) or not data["name"]:
+        return JsonResponse({"error": "Board name is required"}, status=400)
+
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    representation = wants_representation(request)
+    boards = board_queryset(with_tasks=False) if representation else Board.objects.only("id", "workspace")
+    try:
+        board = boards.get(id=board_id)
+    except Board.DoesNotExist:
+        return JsonResponse({"error": "Board not found"}, status=404)
+
+    if get_workspace_role(request, board.workspace_id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    board.name = data["name"]
+    with transaction.atomic():
+        # The revision is bumped by the pre_save signal
+        board.save(update_fields=["name", "updated_at", "revision"])
+        changed = {"name": board.name, "updated_at": board.updated_at}
+        patch_board_snapshot(board.id, values=changed)
+
+    if representation:
+        return JsonResponse(board_to_dict(board))
+    return JsonResponse({"id": board.id, **changed})
+
+
 # Delete board
 @csrf_exempt
 def delete_board(request, board_id):
@@ -267,16 +462,12 @@ def delete_board(request, board_id):
         if not user_id:
             return JsonResponse({"error": "User ID not found in token"}, status=400)
 
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=board.workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
+        # Check if user is a member of this workspace
+        if get_workspace_role(request, board.workspace_id) is None:
             return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
 
-        board.delete()
+        with transaction.atomic():
+            board.delete()
 
         return JsonResponse({"message": "Board deleted successfully"})
     else:
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 
 class TaskConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task'
+
+    def ready(self):
+        from .signals import attach_search_after_migrations, detach_search_for_migrations
+
+        pre_migrate.connect(detach_search_for_migrations, sender=self)
+        post_migrate.connect(attach_search_after_migrations, sender=self)
@@ -0,0 +1,130 @@
+import datetime
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from board.counters import adjust_task_counts, task_count_key
+from board.changes import log_task_changes
+from board.revisions import bump_board_revision, record_board_change
+from board.snapshots import drop_board_snapshots
+from .models import ArchivedTask, Task
+
+# Archival
+#
+# Done tasks untouched for TASK_ARCHIVE_AFTER_DAYS move from task_task to
+# task_archivedtask, so the hot table (and every board read, count and
+# index over it) holds live work only, however much history piles up.
+# Each chunk moves in its own short transaction and is logged like a
+# deletion: counters drop, sync clients get a tombstone, search forgets
+# the task, and board snapshots are dropped for the next read to rebuild.
+# Restoring puts the same row back under the same id.
+
+ARCHIVED_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "priority",
+    "status",
+    "board_id",
+    "workspace_id",
+    "assigned_to_id",
+    "position",
+    "created_at",
+    "updated_at",
+)
+
+
+class ArchiveConflict(Exception):
+    """Raised when tasks of a chunk changed while it was being archived."""
+
+
+def archive_cutoff(days=None):
+    """Done tasks last updated before this moment are archived."""
+    if days is None:
+        days = settings.TASK_ARCHIVE_AFTER_DAYS
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def _copy(task, model):
+    return model(**{column: getattr(task, column) for column in ARCHIVED_COLUMNS})
+
+
+def archive_chunk(workspace_id, cutoff, limit):
+    """
+    Archive up to ``limit`` of a workspace's done tasks last updated before
+    ``cutoff``, oldest first (an index range scan of task_ws_status_idx).
+    Returns how many were archived; 0 once none are left.
+    """
+    stale = Task.objects.filter(workspace_id=workspace_id, status="done", updated_at__lt=cutoff)
+    with transaction.atomic():
+        tasks = list(
+            stale.select_for_update().order_by("updated_at", "id").only(*ARCHIVED_COLUMNS)[:limit]
+        )
+        if not tasks:
+            return 0
+        ArchivedTask.objects.bulk_create([_copy(task, ArchivedTask) for task in tasks])
+        ids = [task.id for task in tasks]
+        # Databases without row locks: a task edited since it was read no
+        # longer matches, and the chunk is rolled back rather than archive
+        # a stale copy
+        _, deleted = stale.filter(id__in=ids).delete()
+        if deleted.get(Task._meta.label, 0) != len(ids):
+            raise ArchiveConflict("Tasks changed while being archived")
+        adjust_task_counts(removed=Counter(task_count_key(task) for task in tasks))
+        board_ids = {task.board_id for task in tasks}
+        bump_board_revision(*board_ids)
+        log_task_changes((task.board_id, task.id, "archived") for task in tasks)
+        # Not refreshed: that would serialize the rest of the board again
+        # for every chunk
+        drop_board_snapshots(*board_ids)
+    return len(tasks)
+
+
+def archive_workspace_tasks(workspace_id, cutoff, chunk_size=None, pause=None):
+    """
+    Archive every eligible task of a workspace, chunk by chunk, sleeping
+    ``pause`` seconds between chunks; returns the total.
+    """
+    chunk_size = chunk_size or settings.TASK_ARCHIVE_CHUNK_SIZE
+    if pause is None:
+        pause = settings.TASK_ARCHIVE_CHUNK_PAUSE
+    total = 0
+    while True:
+        try:
+            archived = archive_chunk(workspace_id, cutoff, chunk_size)
+        except ArchiveConflict:
+            continue
+        if not archived:
+            return total
+        total += archived
+        # SQLite hands its write lock to whoever asks first, not to who has
+        # waited longest: without a gap, back-to-back chunks would starve
+        # requests (and the activity flush) for the whole run
+        time.sleep(pause)
+
+
+def restore_tasks(workspace_id, ids):
+    """
+    Move archived tasks of a workspace back into task_task with their ids,
+    positions and creation dates; their update time becomes now, so the
+    next archival run leaves them be. Returns the restored tasks.
+    """
+    with transaction.atomic():
+        archived = list(ArchivedTask.objects.select_for_update().filter(workspace_id=workspace_id, id__in=ids))
+        if not archived:
+            return []
+        tasks = Task.objects.bulk_create([_copy(task, Task) for task in archived])
+        # bulk_create stamps auto_now_add columns: put the original dates back
+        for task, original in zip(tasks, archived):
+            task.created_at = original.created_at
+        Task.objects.bulk_update(tasks, ["created_at"])
+        ArchivedTask.objects.filter(id__in=[task.id for task in archived]).delete()
+        adjust_task_counts(added=Counter(task_count_key(task) for task in tasks))
+        record_board_change(
+            *{task.board_id for task in tasks},
+            tasks=[(task.board_id, task.id, "restored") for task in tasks],
+        )
+    return tasks
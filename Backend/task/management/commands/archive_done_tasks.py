@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from task.archive import archive_cutoff, archive_workspace_tasks
+from workspace.models import Workspace
+
+
+class Command(BaseCommand):
+    help = "Move done tasks not updated for TASK_ARCHIVE_AFTER_DAYS days to the archive, in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspace_ids", nargs="*", type=int, help="Only archive these workspaces")
+        parser.add_argument("--days", type=int, help="Archive after this many days (default TASK_ARCHIVE_AFTER_DAYS)")
+        parser.add_argument("--chunk-size", type=int, help="Tasks per transaction (default TASK_ARCHIVE_CHUNK_SIZE)")
+        parser.add_argument("--pause", type=float, help="Seconds between chunks (default TASK_ARCHIVE_CHUNK_PAUSE)")
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options["days"])
+        workspaces = Workspace.objects.order_by("id").values_list("id", flat=True)
+        if options["workspace_ids"]:
+            workspaces = workspaces.filter(id__in=options["workspace_ids"])
+
+        total = 0
+        for workspace_id in workspaces:
+            archived = archive_workspace_tasks(
+                workspace_id, cutoff, options["chunk_size"], options["pause"]
+            )
+            if archived:
+                self.stdout.write(f"Workspace {workspace_id}: archived {archived} task(s)")
+            total += archived
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} task(s) done before {cutoff:%Y-%m-%d %H:%M}"))
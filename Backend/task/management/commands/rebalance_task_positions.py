@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Length
+
+from task.models import Task
+from task.ordering import rebalance_column
+
+
+class Command(BaseCommand):
+    help = "Rebalance the board columns whose task position keys have grown too long"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-length",
+            type=int,
+            default=settings.TASK_POSITION_REBALANCE_LENGTH,
+            help="Rebalance columns with a key longer than this",
+        )
+
+    def handle(self, *args, **options):
+        columns = (
+            Task.objects.annotate(position_length=Length("position"))
+            .filter(position_length__gt=options["max_length"])
+            .values_list("board_id", "status")
+            .distinct()
+            .order_by()
+        )
+        columns = list(columns)
+        for board_id, status in columns:
+            rebalance_column(board_id, status)
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {len(columns)} column(s)"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task.search import has_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Re-index every task in the full-text search index (SQLite FTS5)"
+
+    def handle(self, *args, **options):
+        if not has_search_index():
+            raise CommandError("Full-text search is only indexed on SQLite")
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the task search index"))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+# A frozen copy of task.ordering.spaced_keys as of this migration, so that
+# later changes to the live key scheme can't change what it writes
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+
+def _to_key(value, length):
+    digits = []
+    for _ in range(length):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def spaced_keys(count):
+    # count increasing positions spread evenly over the whole key space
+    length = 2
+    while BASE ** (length - 1) <= count + 1:
+        length += 1
+    step = BASE ** length // (count + 1)
+    return [_to_key(step * (i + 1), length) for i in range(count)]
+
+
+def number_existing_tasks(apps, schema_editor):
+    # Keep today's order (insertion order) within every board column
+    Task = apps.get_model('task', 'Task')
+    columns = Task.objects.values_list('board_id', 'status').distinct().order_by()
+    for board_id, status in columns:
+        tasks = list(Task.objects.filter(board_id=board_id, status=status).order_by('id').only('id'))
+        for task, position in zip(tasks, spaced_keys(len(tasks))):
+            task.position = position
+        Task.objects.bulk_update(tasks, ['position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0005_boardtaskcount'),
+        ('task', '0004_task_board_status_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_board_status_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['board', 'status', 'position'], name='task_board_status_pos_idx'),
+        ),
+        migrations.RunPython(number_existing_tasks, migrations.RunPython.noop),
+    ]
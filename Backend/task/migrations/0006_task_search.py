@@ -0,0 +1,77 @@
+from django.db import migrations
+
+# The search schema as of this migration, frozen here rather than imported
+# from task.search: later versions of the view and triggers are put in
+# place by task.signals after every migrate run.
+SEARCH_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE task_search USING fts5(
+        name, description, workspace,
+        content='task_search_content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS task_search_content AS
+    SELECT t.id AS id, t.name AS name, t.description AS description, 'w' || b.workspace_id AS workspace
+    FROM task_task t JOIN board_board b ON b.id = t.board_id
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_search_insert AFTER INSERT ON task_task BEGIN
+        INSERT INTO task_search (rowid, name, description, workspace)
+        VALUES (new.id, new.name, new.description,
+                (SELECT 'w' || workspace_id FROM board_board WHERE id = new.board_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_search_delete AFTER DELETE ON task_task BEGIN
+        INSERT INTO task_search (task_search, rowid, name, description, workspace)
+        VALUES ('delete', old.id, old.name, old.description,
+                (SELECT 'w' || workspace_id FROM board_board WHERE id = old.board_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_search_update AFTER UPDATE OF name, description, board_id ON task_task BEGIN
+        INSERT INTO task_search (task_search, rowid, name, description, workspace)
+        VALUES ('delete', old.id, old.name, old.description,
+                (SELECT 'w' || workspace_id FROM board_board WHERE id = old.board_id));
+        INSERT INTO task_search (rowid, name, description, workspace)
+        VALUES (new.id, new.name, new.description,
+                (SELECT 'w' || workspace_id FROM board_board WHERE id = new.board_id));
+    END
+    """,
+    # Index the existing tasks
+    "INSERT INTO task_search (task_search) VALUES ('rebuild')",
+    "INSERT INTO task_search (task_search) VALUES ('optimize')",
+)
+
+DROP_SEARCH_SCHEMA = (
+    "DROP TRIGGER IF EXISTS task_search_update",
+    "DROP TRIGGER IF EXISTS task_search_delete",
+    "DROP TRIGGER IF EXISTS task_search_insert",
+    "DROP VIEW IF EXISTS task_search_content",
+    "DROP TABLE IF EXISTS task_search",
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        # FTS5 is SQLite only; other databases search unindexed
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board', '0007_boardchange_action'),
+        ('task', '0005_task_position'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(SEARCH_SCHEMA), run(DROP_SEARCH_SCHEMA)),
+    ]
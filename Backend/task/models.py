@@ -1,6 +1,8 @@
 from django.db import models
 from board.models import Board
+from workspace.models import Workspace
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Task(models.Model):
     STATUS_CHOICES = [
@@ -20,11 +22,76 @@ class Task(models.Model):
     priority = models.CharField(max_length=6, choices=PRIORITY_CHOICES, default="low")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="not-done")
     board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="tasks")
+    # Copy of board.workspace so workspace-wide task queries need no join.
+    # save() keeps it in step; bulk writes that move tasks set it themselves.
+    # Nullable so SQLite adds the column in place: rebuilding task_task
+    # would drop the search triggers (task.search).
+    workspace = models.ForeignKey(
+        Workspace, on_delete=models.CASCADE, related_name="tasks", db_index=False, null=True
+    )
     assigned_to = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, blank=True, related_name="assigned_tasks"
     )
+    # Fractional index ordering the task within its board column (see task.ordering)
+    position = models.CharField(max_length=64, default="", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Serves per-column board reads: keyset pages in position order
+            models.Index(fields=["board", "status", "position"], name="task_board_status_pos_idx"),
+            # Workspace task queries (task.query): one index per filter, each
+            # also ordered for the default sort by update time
+            models.Index(fields=["workspace", "updated_at"], name="task_ws_updated_idx"),
+            models.Index(fields=["workspace", "created_at"], name="task_ws_created_idx"),
+            models.Index(fields=["workspace", "status", "updated_at"], name="task_ws_status_idx"),
+            models.Index(fields=["workspace", "priority", "updated_at"], name="task_ws_priority_idx"),
+            models.Index(fields=["workspace", "assigned_to", "updated_at"], name="task_ws_assignee_idx"),
+            models.Index(fields=["board", "updated_at"], name="task_board_updated_idx"),
+            # A user's assigned tasks across workspaces (task.query.assigned_tasks)
+            models.Index(fields=["assigned_to", "updated_at"], name="task_assignee_updated_idx"),
+            models.Index(fields=["assigned_to", "status", "updated_at"], name="task_assignee_status_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # A task given a board object (new, or moved) takes its workspace
+        if self._meta.get_field("board").is_cached(self):
+            self.workspace_id = self.board.workspace_id
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedTask(models.Model):
+    """
+    A done task moved out of task_task by task.archive, keeping its id so
+    it can be restored as it was. Same columns as Task, plus archived_at.
+    """
+    id = models.IntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    priority = models.CharField(max_length=6, choices=Task.PRIORITY_CHOICES, default="low")
+    status = models.CharField(max_length=10, choices=Task.STATUS_CHOICES, default="done")
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="archived_tasks", db_index=False)
+    workspace = models.ForeignKey(
+        Workspace, on_delete=models.CASCADE, related_name="archived_tasks", db_index=False
+    )
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="archived_tasks"
+    )
+    position = models.CharField(max_length=64, default="", blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Browsing a workspace's or a board's archive, last completed first
+            models.Index(fields=["workspace", "updated_at", "id"], name="archivedtask_ws_updated_idx"),
+            models.Index(fields=["board", "updated_at", "id"], name="archivedtask_board_updated_idx"),
+        ]
+
     def __str__(self):
         return self.name
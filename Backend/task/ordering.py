@@ -0,0 +1,212 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Task
+
+# Positions are fractional indexes: base-36 digit strings read as the
+# fraction 0.<digits>, compared as plain strings. A key never ends in "0",
+# so there is always room for another key before it, and a move only writes
+# the moved task's row. Lowercase base 36 sorts the same under every
+# database collation.
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+# Appending steps by one unit at this digit instead of halving the space
+# left, so a column can take ~1.6M appends before its keys grow
+APPEND_DEPTH = 4
+
+
+class PositionError(ValueError):
+    """Raised when no key can be placed between two positions."""
+
+
+def _to_int(key, length):
+    return int(key.ljust(length, "0"), BASE)
+
+
+def _to_key(value, length):
+    digits = []
+    for _ in range(length):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip("0")
+
+
+def _midpoint(a, b):
+    # a < b; a may be "" (0) and b None (1)
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def key_between(a, b):
+    """
+    Return a position strictly between ``a`` and ``b``. ``None`` stands for
+    the start (``a``) or the end (``b``) of the column.
+    """
+    if b == "" or (a is not None and b is not None and not a < b):
+        raise PositionError(f"{a!r} is not before {b!r}")
+    if b is None and a:
+        # Append: step one unit past ``a`` while there is room
+        value = _to_int(a[:APPEND_DEPTH], APPEND_DEPTH) + 1
+        if value < BASE ** APPEND_DEPTH:
+            return _to_key(value, APPEND_DEPTH)
+    if a is None and b:
+        # Prepend: step one unit before ``b`` while there is room
+        value = _to_int(b[:APPEND_DEPTH], APPEND_DEPTH)
+        if len(b) <= APPEND_DEPTH:
+            value -= 1
+        if value > 0:
+            return _to_key(value, APPEND_DEPTH)
+    return _midpoint(a or "", b)
+
+
+def keys_after(a, count):
+    """``count`` increasing positions after ``a`` (None for an empty column)."""
+    keys = []
+    for _ in range(count):
+        a = key_between(a, None)
+        keys.append(a)
+    return keys
+
+
+def spaced_keys(count):
+    """``count`` increasing positions spread evenly over the whole key space."""
+    # One digit more than needed to number them leaves room between keys
+    length = 2
+    while BASE ** (length - 1) <= count + 1:
+        length += 1
+    step = BASE ** length // (count + 1)
+    return [_to_key(step * (i + 1), length) for i in range(count)]
+
+
+def last_position(board_id, status):
+    return (
+        Task.objects.filter(board_id=board_id, status=status)
+        .order_by("-position", "-id")
+        .values_list("position", flat=True)
+        .first()
+    )
+
+
+def append_to_columns(board_id, tasks):
+    """
+    Give ``tasks`` positions at the bottom of their status columns on board
+    ``board_id``, in list order. Call it before saving them, while the
+    columns don't hold them yet.
+    """
+    for status in {task.status for task in tasks}:
+        column = [task for task in tasks if task.status == status]
+        for task, position in zip(column, keys_after(last_position(board_id, status), len(column))):
+            task.position = position
+
+
+def position_at_end(board_id, status):
+    return key_between(last_position(board_id, status), None)
+
+
+def position_after(board_id, status, after_id=None, exclude_id=None):
+    """
+    Position for a task dropped right after task ``after_id`` in a board
+    column (at the top when ``after_id`` is None). Raises Task.DoesNotExist
+    if ``after_id`` is not in that column.
+    """
+    column = Task.objects.filter(board_id=board_id, status=status)
+    if exclude_id is not None:
+        column = column.exclude(id=exclude_id)
+    max_length = Task._meta.get_field("position").max_length
+
+    for attempt in range(2):
+        if after_id is None:
+            previous, following = None, column
+        else:
+            previous = column.values_list("position", flat=True).get(id=after_id)
+            following = column.filter(
+                Q(position__gt=previous) | Q(position=previous, id__gt=after_id)
+            )
+        next_position = following.order_by("position", "id").values_list("position", flat=True).first()
+        try:
+            position = key_between(previous, next_position)
+            if len(position) <= max_length:
+                return position
+        except PositionError:
+            # Equal keys, e.g. left behind by a bulk move
+            if attempt:
+                raise
+        # Respace the column and try again
+        rebalance_column(board_id, status)
+    raise PositionError(f"No room for a task after {after_id} in column {status!r}")
+
+
+# Rebalancing
+#
+# Keys only grow when cards are repeatedly dropped into the same gap. Once a
+# key is longer than TASK_POSITION_REBALANCE_LENGTH its column is rewritten
+# with evenly spaced short keys, off the request path. Rebalancing keeps the
+# order, so payloads and revisions are unaffected.
+
+
+def rebalance_column(board_id, status):
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update()
+            .filter(board_id=board_id, status=status)
+            .order_by("position", "id")
+            .only("id", "position")
+        )
+        for task, position in zip(tasks, spaced_keys(len(tasks))):
+            task.position = position
+        Task.objects.bulk_update(tasks, ["position"], batch_size=500)
+    return len(tasks)
+
+
+class Rebalancer:
+    """Runs column rebalances on one background thread, at most one pending per column."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-rebalance")
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, board_id, status):
+        """Rebalance the column once the current transaction commits."""
+        transaction.on_commit(lambda: self._submit((board_id, status)))
+
+    def _submit(self, column):
+        with self._lock:
+            if column in self._pending:
+                return
+            self._pending.add(column)
+        self._executor.submit(self._run, column)
+
+    def _run(self, column):
+        with self._lock:
+            self._pending.discard(column)
+        try:
+            rebalance_column(*column)
+        finally:
+            # The worker thread owns its own database connection
+            connection.close()
+
+
+rebalancer = Rebalancer()
+
+
+def check_position(task):
+    """Schedule a rebalance of the task's column if its key has grown too long."""
+    if len(task.position) > settings.TASK_POSITION_REBALANCE_LENGTH:
+        rebalancer.schedule(task.board_id, task.status)
@@ -0,0 +1,134 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from board.serialization import TASK_PRIORITIES, TASK_STATUSES
+from workspace.models import UserWorkspace
+
+# Workspace task queries
+#
+# Filters and sort keys are whitelisted so every query has a shape the
+# task_ws_* indexes on Task serve (see task/tests.py): the workspace column
+# leads each of them, then status, priority, or assignee equality, then a
+# date the rows come back sorted by.
+
+# ?sort= keys and the columns behind them
+SORT_KEYS = {
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "name": "name",
+    "board": "board_id",
+}
+DEFAULT_SORT = "-updated_at"
+
+RANGE_FILTERS = {
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+    "updated_after": "updated_at__gte",
+    "updated_before": "updated_at__lt",
+}
+
+
+class InvalidQuery(ValueError):
+    """Raised for a malformed filter or sort parameter."""
+
+
+def _values(params, name, allowed=None):
+    values = [value for value in params.get(name, "").split(",") if value]
+    if allowed is not None:
+        unknown = [value for value in values if value not in allowed]
+        if unknown:
+            raise InvalidQuery(f"{name} must be one of [{', '.join(allowed)}]")
+    return values
+
+
+def _ids(params, name):
+    values = _values(params, name)
+    if not all(value.isdigit() for value in values):
+        raise InvalidQuery(f"{name} must be a comma separated list of ids")
+    return [int(value) for value in values]
+
+
+def _moment(params, name):
+    try:
+        moment = parse_datetime(params[name]) or parse_date(params[name])
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise InvalidQuery(f"{name} must be an ISO 8601 date or datetime")
+    if not isinstance(moment, datetime.datetime):
+        moment = datetime.datetime.combine(moment, datetime.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_tasks(queryset, params):
+    """
+    Narrow a workspace's tasks by the query parameters ``params``:
+    status, priority and board (comma separated lists), assigned_to (a user
+    id, or "none" for unassigned tasks) and created/updated _after (from,
+    inclusive) / _before (until, exclusive) dates. Raises InvalidQuery.
+    """
+    statuses = _values(params, "status", TASK_STATUSES)
+    priorities = _values(params, "priority", TASK_PRIORITIES)
+    boards = _ids(params, "board")
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    if priorities:
+        queryset = queryset.filter(priority__in=priorities)
+    if boards:
+        queryset = queryset.filter(board_id__in=boards)
+
+    if "assigned_to" in params:
+        assignee = params["assigned_to"]
+        if assignee == "none":
+            queryset = queryset.filter(assigned_to__isnull=True)
+        elif assignee.isdigit():
+            queryset = queryset.filter(assigned_to_id=int(assignee))
+        else:
+            raise InvalidQuery('assigned_to must be a user id or "none"')
+
+    for name, lookup in RANGE_FILTERS.items():
+        if name in params:
+            queryset = queryset.filter(**{lookup: _moment(params, name)})
+    return queryset
+
+
+def assigned_tasks(queryset, user_id, params):
+    """
+    Tasks of ``queryset`` assigned to ``user_id`` in the workspaces they
+    are a member of, narrowed by ``params`` as in filter_tasks plus
+    workspace (comma separated ids). Membership is checked by a subquery,
+    so the task_assignee_* indexes drive the query and its cost follows
+    the user's own tasks, not the size of their workspaces.
+    """
+    queryset = queryset.filter(
+        assigned_to_id=user_id,
+        workspace_id__in=UserWorkspace.objects.filter(user_id=user_id).values("workspace_id"),
+    )
+    workspaces = _ids(params, "workspace")
+    if workspaces:
+        queryset = queryset.filter(workspace_id__in=workspaces)
+    params = params.copy()
+    params.pop("assigned_to", None)
+    return filter_tasks(queryset, params)
+
+
+def sort_keys(value):
+    """
+    Keyset pagination keys for a ?sort= value such as "board,-created_at",
+    ending with id (in the direction of the last key) to break ties.
+    """
+    keys = []
+    for key in (value or DEFAULT_SORT).split(","):
+        descending = key.startswith("-")
+        column = SORT_KEYS.get(key.lstrip("-"))
+        if column is None:
+            raise InvalidQuery(f"sort keys must be among [{', '.join(SORT_KEYS)}]")
+        if column in (existing.lstrip("-") for existing in keys):
+            raise InvalidQuery(f"sort key {key.lstrip('-')} is repeated")
+        keys.append("-" + column if descending else column)
+    keys.append("-id" if keys[-1].startswith("-") else "id")
+    return tuple(keys)
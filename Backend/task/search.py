@@ -0,0 +1,245 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from backend.pagination import InvalidPage, encode_cursor, load_cursor
+from .models import Task
+
+# Full-text search
+#
+# On SQLite, task names and descriptions are indexed in the FTS5 table
+# task_search. It is an external-content index: it stores only the
+# inverted index, and reads the text for snippets from the
+# task_search_content view. Triggers on task_task keep it in step with
+# every write, including bulk_create, queryset updates and cascades,
+# which bypass model signals. Every row also indexes its workspace as a
+# "w<id>" token. A search matches that token, so FTS5 only walks the
+# workspace's own entries instead of filtering hits after ranking.
+
+# bm25 column weights: a hit in the name outranks one in the description
+RANK_WEIGHTS = (10.0, 1.0, 0.0)
+SNIPPET_TOKENS = 12
+HIGHLIGHT = ("<mark>", "</mark>")
+ELLIPSIS = "…"
+
+SEARCH_INDEX = (
+    """
+    CREATE VIRTUAL TABLE task_search USING fts5(
+        name, description, workspace,
+        content='task_search_content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+)
+
+# The view and triggers tie the index to task_task and board_board. SQLite
+# alters most columns by rebuilding the table, which drops its triggers and,
+# with the view in place, fails outright, so they are detached before any
+# migration runs and attached again after it (task.signals).
+SEARCH_HOOKS = (
+    """
+    CREATE VIEW IF NOT EXISTS task_search_content AS
+    SELECT t.id AS id, t.name AS name, t.description AS description, 'w' || b.workspace_id AS workspace
+    FROM task_task t JOIN board_board b ON b.id = t.board_id
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_search_insert AFTER INSERT ON task_task BEGIN
+        INSERT INTO task_search (rowid, name, description, workspace)
+        VALUES (new.id, new.name, new.description,
+                (SELECT 'w' || workspace_id FROM board_board WHERE id = new.board_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_search_delete AFTER DELETE ON task_task BEGIN
+        INSERT INTO task_search (task_search, rowid, name, description, workspace)
+        VALUES ('delete', old.id, old.name, old.description,
+                (SELECT 'w' || workspace_id FROM board_board WHERE id = old.board_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_search_update AFTER UPDATE OF name, description, board_id ON task_task BEGIN
+        INSERT INTO task_search (task_search, rowid, name, description, workspace)
+        VALUES ('delete', old.id, old.name, old.description,
+                (SELECT 'w' || workspace_id FROM board_board WHERE id = old.board_id));
+        INSERT INTO task_search (rowid, name, description, workspace)
+        VALUES (new.id, new.name, new.description,
+                (SELECT 'w' || workspace_id FROM board_board WHERE id = new.board_id));
+    END
+    """,
+)
+
+SEARCH_SCHEMA = SEARCH_INDEX + SEARCH_HOOKS
+
+DROP_SEARCH_HOOKS = (
+    "DROP TRIGGER IF EXISTS task_search_update",
+    "DROP TRIGGER IF EXISTS task_search_delete",
+    "DROP TRIGGER IF EXISTS task_search_insert",
+    "DROP VIEW IF EXISTS task_search_content",
+)
+
+DROP_SEARCH_SCHEMA = DROP_SEARCH_HOOKS + ("DROP TABLE IF EXISTS task_search",)
+
+
+def has_search_index(using=connection):
+    return using.vendor == "sqlite"
+
+
+def create_search_index(using):
+    """Create the index, its triggers, and index every existing task."""
+    with using.cursor() as cursor:
+        for statement in SEARCH_SCHEMA:
+            cursor.execute(statement)
+    rebuild_search_index(using)
+
+
+def drop_search_index(using):
+    with using.cursor() as cursor:
+        for statement in DROP_SEARCH_SCHEMA:
+            cursor.execute(statement)
+
+
+def detach_search_index(using):
+    """Drop the view and triggers, leaving the index itself in place."""
+    with using.cursor() as cursor:
+        for statement in DROP_SEARCH_HOOKS:
+            cursor.execute(statement)
+
+
+def attach_search_index(using):
+    """
+    Recreate whichever of the view and triggers are missing, then re-index,
+    since writes made meanwhile went unindexed. Returns whether any were.
+    """
+    with using.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE 'task_search%'")
+        names = {name for name, in cursor.fetchall()}
+        if "task_search" not in names:
+            # Not migrated yet
+            return False
+        if names >= {"task_search_content", "task_search_insert", "task_search_delete", "task_search_update"}:
+            return False
+        for statement in SEARCH_HOOKS:
+            cursor.execute(statement)
+    rebuild_search_index(using)
+    return True
+
+
+def rebuild_search_index(using=connection):
+    """Re-index every task from scratch, then merge the index segments."""
+    with using.cursor() as cursor:
+        cursor.execute("INSERT INTO task_search (task_search) VALUES ('rebuild')")
+        cursor.execute("INSERT INTO task_search (task_search) VALUES ('optimize')")
+
+
+def search_terms(query):
+    return re.findall(r"\w+", query)
+
+
+def match_expression(workspace_id, terms):
+    """
+    FTS5 query matching every one of ``terms`` within a workspace (None
+    for all of them). Terms are quoted, so user input can't inject query
+    syntax.
+    """
+    phrases = " ".join(f'"{term}"' for term in terms)
+    if workspace_id is None:
+        return f"{{name description}} : ({phrases})"
+    return f'workspace : "w{workspace_id}" AND {{name description}} : ({phrases})'
+
+
+def search_filter(query, workspace_id=None):
+    """
+    Q for the tasks whose name or description contain every term of
+    ``query``, in one workspace or (None) all of them, for querysets that
+    keep their own ordering and pagination.
+    """
+    terms = search_terms(query)
+    if not has_search_index():
+        condition = Q(workspace_id=workspace_id) if workspace_id is not None else Q()
+        for term in terms:
+            condition &= Q(name__icontains=term) | Q(description__icontains=term)
+        return condition
+    return Q(
+        id__in=RawSQL(
+            "SELECT rowid FROM task_search WHERE task_search MATCH %s",
+            [match_expression(workspace_id, terms)],
+        )
+    )
+
+
+def _decode_search_cursor(cursor):
+    rank, last_id = load_cursor(cursor, 2)
+    if not isinstance(rank, (int, float)) or not isinstance(last_id, int):
+        raise InvalidPage("Invalid cursor")
+    return rank, last_id
+
+
+def search_tasks(workspace_id, query, limit, cursor=None):
+    """
+    Tasks of a workspace matching ``query``, best match first. Returns
+    ``(hits, next_cursor)``, where hits are ``(task_id, rank, name, snippet)``.
+    Name and snippet carry the matched terms wrapped in HIGHLIGHT. Raises
+    InvalidPage for a bad cursor.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+    if not has_search_index():
+        return _search_tasks_unindexed(workspace_id, terms, limit, cursor)
+
+    match = match_expression(workspace_id, terms)
+    params = [*RANK_WEIGHTS, match]
+    after = ""
+    if cursor:
+        rank, last_id = _decode_search_cursor(cursor)
+        after = "WHERE rank > %s OR (rank = %s AND id > %s)"
+        params += [rank, rank, last_id]
+    with connection.cursor() as db:
+        # Rank first, then snippet only the page: snippets are costly
+        db.execute(
+            f"""
+            SELECT id, rank FROM (
+                SELECT rowid AS id, bm25(task_search, %s, %s, %s) AS rank
+                FROM task_search WHERE task_search MATCH %s
+            )
+            {after}
+            ORDER BY rank, id LIMIT %s
+            """,
+            [*params, limit + 1],
+        )
+        ranked = db.fetchall()
+        page = ranked[:limit]
+        if not page:
+            return [], None
+
+        db.execute(
+            f"""
+            SELECT rowid,
+                   highlight(task_search, 0, %s, %s),
+                   snippet(task_search, 1, %s, %s, %s, %s)
+            FROM task_search
+            WHERE task_search MATCH %s AND rowid IN ({", ".join(["%s"] * len(page))})
+            """,
+            [*HIGHLIGHT, *HIGHLIGHT, ELLIPSIS, SNIPPET_TOKENS, match, *(task_id for task_id, _ in page)],
+        )
+        marked = {task_id: (name, snippet) for task_id, name, snippet in db.fetchall()}
+
+    hits = [(task_id, rank, *marked.get(task_id, (None, None))) for task_id, rank in page]
+    next_cursor = encode_cursor([page[-1][1], page[-1][0]]) if len(ranked) > limit else None
+    return hits, next_cursor
+
+
+def _search_tasks_unindexed(workspace_id, terms, limit, cursor):
+    # Databases without FTS5: substring matches, newest first, unranked
+    queryset = Task.objects.filter(workspace_id=workspace_id)
+    for term in terms:
+        queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+    if cursor:
+        _, last_id = _decode_search_cursor(cursor)
+        queryset = queryset.filter(id__lt=last_id)
+    ids = list(queryset.order_by("-id").values_list("id", flat=True)[: limit + 1])
+    hits = [(task_id, 0, None, None) for task_id in ids[:limit]]
+    next_cursor = encode_cursor([0, ids[limit - 1]]) if len(ids) > limit else None
+    return hits, next_cursor
@@ -0,0 +1,16 @@
+from django.db import connections
+
+from .search import attach_search_index, detach_search_index, has_search_index
+
+
+def detach_search_for_migrations(sender, using, plan, **kwargs):
+    # Rebuilding task_task or board_board fails while the view refers to them
+    connection = connections[using]
+    if plan and has_search_index(connection):
+        detach_search_index(connection)
+
+
+def attach_search_after_migrations(sender, using, **kwargs):
+    connection = connections[using]
+    if has_search_index(connection):
+        attach_search_index(connection)
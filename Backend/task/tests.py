@@ -1,3 +1,380 @@
-from django.test import TestCase
+import datetime
+import io
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from admin_panel.admin import TaskAdmin, admin_site
+from backend.fastjson import dumps
+from board.counters import find_drifted_counts
+from board.models import BoardSnapshot
+from board.serialization import TASK_STATUSES, task_queryset
+from board.tests import ApiTestCase
+from workspace.models import UserWorkspace, Workspace
+from .models import ArchivedTask, Task
+from .query import InvalidQuery, assigned_tasks, filter_tasks, sort_keys
+from .search import attach_search_index, search_filter
+from .signals import attach_search_after_migrations, detach_search_for_migrations
+
+
+@skipUnless(connection.vendor == "sqlite", "query plans are checked on SQLite")
+class TaskQueryPlanTests(TestCase):
+    """Every filter shape of /task/query is served by an index, never a table scan."""
+
+    def plan(self, query):
+        params = QueryDict(query)
+        queryset = filter_tasks(task_queryset().filter(workspace_id=1), params)
+        return queryset.order_by(*sort_keys(params.get("sort")))[:100].explain()
+
+    def assertUsesIndex(self, query, index):
+        plan = self.plan(query)
+        self.assertRegex(plan, rf"SEARCH task_task USING (COVERING )?INDEX {index} ", plan)
+        self.assertNotIn("SCAN task_task", plan)
+
+    def test_workspace_only(self):
+        self.assertUsesIndex("", "task_ws_updated_idx")
+
+    def test_status(self):
+        self.assertUsesIndex("status=not-done", "task_ws_status_idx")
+
+    def test_priority(self):
+        self.assertUsesIndex("priority=high", "task_ws_priority_idx")
+
+    def test_assignee(self):
+        self.assertUsesIndex("assigned_to=7", "task_ws_assignee_idx")
+
+    def test_unassigned(self):
+        self.assertUsesIndex("assigned_to=none", "task_ws_assignee_idx")
+
+    def test_assignee_status_priority(self):
+        self.assertUsesIndex("status=not-done&priority=high&assigned_to=7", "task_ws_assignee_idx")
+
+    def test_status_priority(self):
+        self.assertUsesIndex("status=not-done&priority=high", "task_ws_(status|priority)_idx")
+
+    def test_board(self):
+        self.assertUsesIndex("board=3", "task_board_updated_idx")
+
+    def test_created_range(self):
+        self.assertUsesIndex("created_after=2026-01-01&created_before=2026-02-01", "task_ws_created_idx")
+
+    def test_updated_range(self):
+        self.assertUsesIndex("updated_after=2026-01-01&updated_before=2026-02-01", "task_ws_updated_idx")
+
+    def test_sort_by_creation(self):
+        plan = self.plan("sort=-created_at")
+        self.assertRegex(plan, r"USING (COVERING )?INDEX task_ws_created_idx ")
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_default_sort_needs_no_sort_step(self):
+        for query in ("", "status=done", "priority=low", "assigned_to=7", "board=3"):
+            self.assertNotIn("TEMP B-TREE", self.plan(query), query)
+
+    def test_multi_key_sort(self):
+        self.assertUsesIndex("status=done,semi-done&sort=board,-created_at", "task_ws_[a-z]+_idx")
+
+
+@skipUnless(connection.vendor == "sqlite", "query plans are checked on SQLite")
+class MyTasksPlanTests(TestCase):
+    """/task/mine is driven by the assignee, whatever the workspaces' size."""
+
+    def plan(self, query):
+        queryset = assigned_tasks(task_queryset(), 7, QueryDict(query))
+        return queryset.order_by(*sort_keys(None))[:100].explain()
+
+    def test_all_tasks(self):
+        plan = self.plan("")
+        self.assertIn("USING INDEX task_assignee_updated_idx ", plan)
+        self.assertNotIn("SCAN task_task", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_status(self):
+        plan = self.plan("status=not-done")
+        self.assertIn("USING INDEX task_assignee_status_idx ", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class TaskQueryParamTests(SimpleTestCase):
+    def test_sort_keys_end_with_id(self):
+        self.assertEqual(sort_keys(None), ("-updated_at", "-id"))
+        self.assertEqual(sort_keys("board,-created_at"), ("board_id", "-created_at", "-id"))
+        self.assertEqual(sort_keys("name"), ("name", "id"))
+
+    def test_rejected_params(self):
+        for query in ("status=open", "priority=urgent", "board=x", "assigned_to=me", "created_after=yesterday"):
+            with self.assertRaises(InvalidQuery, msg=query):
+                filter_tasks(task_queryset(), QueryDict(query))
+        for sort in ("priority", "name,-name", "name,"):
+            with self.assertRaises(InvalidQuery, msg=sort):
+                sort_keys(sort)
+
+
+class TaskQueryBudgetTests(ApiTestCase):
+    """
+    Query budgets of the task endpoints. A single-task write loads the task
+    with its board and workspace in one query, then pays a fixed number of
+    statements for the counters, revisions, change log and snapshot patch,
+    whatever the size of the board.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.filter(board=self.board, status="not-done").order_by("id").first()
+        self.url = f"{self.board.id}/t/{self.task.id}"
+
+    def test_create(self):
+        # board with workspace, assignee, end of column, insert, counter
+        # row (created on first use), revisions, change log, snapshot patch
+        self.assertBudget(14, "post", f"/task/create/{self.board.id}", {
+            "name": "New", "priority": "low", "status": "done", "assigned_to_id": self.other.id,
+        }, status=201)
+
+    def test_bulk_create(self):
+        tasks = [{"name": f"New {i}", "priority": "low", "status": "done"} for i in range(20)]
+        self.assertBudget(13, "post", f"/task/bulk-create/{self.board.id}", tasks, status=201)
+
+    def test_update_same_column(self):
+        # task with board and workspace, update, revisions, change log,
+        # snapshot patch; the counters don't move
+        self.assertBudget(9, "put", f"/task/update/{self.url}", {
+            "name": "Renamed", "description": "", "priority": "low", "status": "not-done",
+        })
+
+    def test_update_new_column(self):
+        self.assertBudget(12, "put", f"/task/update/{self.url}", {
+            "name": "Renamed", "description": "", "priority": "high", "status": "done",
+        })
+
+    def test_patch(self):
+        self.assertBudget(9, "patch", f"/task/update/{self.url}", {"name": "Renamed"})
+
+    def test_patch_reads_and_writes_the_task_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.request("patch", f"/task/update/{self.url}", {"name": "Renamed"})
+        statements = [query["sql"] for query in queries if '"task_task"' in query["sql"]]
+        self.assertEqual(len(statements), 2, statements)
+        load, update = statements
+        self.assertTrue(load.startswith("SELECT"))
+        # Only the changed column and the timestamp are written
+        self.assertRegex(update, r'^UPDATE "task_task" SET "name" = .*, "updated_at" = [^,]* WHERE')
+
+    def test_delete(self):
+        self.assertBudget(10, "delete", f"/task/delete/{self.url}")
+
+    def test_assign_to_board(self):
+        self.assertBudget(16, "put", f"/task/assign/{self.task.id}", {
+            "prevBoard": self.board.id, "newBoard": self.boards[1].id,
+        })
+
+    def test_status(self):
+        self.assertBudget(14, "put", f"/task/status/{self.url}", {"status": "semi-done"})
+
+    def test_move(self):
+        after = Task.objects.filter(board=self.board, status="done").order_by("position").first()
+        self.assertBudget(15, "put", f"/task/move/{self.url}", {"status": "done", "after": after.id})
+
+    def test_assign_user(self):
+        self.assertBudget(10, "put", f"/task/assign-user/{self.url}", {"assigned_to_id": self.other.id})
+
+    def test_bulk_status(self):
+        # ... plus the bottom of the target column and one positions UPDATE
+        self.assertBudget(21, "put", "/task/bulk-status", {"filter": {"board": self.board.id}, "status": "done"})
+
+    def test_bulk_move(self):
+        # ... plus the bottom of each target column and one positions UPDATE
+        self.assertBudget(22, "put", "/task/bulk-move", {
+            "filter": {"board": self.board.id}, "newBoard": self.boards[1].id,
+        })
+
+    def test_bulk_delete(self):
+        self.assertBudget(14, "delete", "/task/bulk-delete", {"filter": {"board": self.board.id}})
+
+
+class BulkFilterTests(ApiTestCase):
+    def test_invalid_filter_values(self):
+        for task_filter in (
+            {"board": "abc"},
+            {"board": [self.board.id]},
+            {"board": True},
+            {"workspace": {}},
+            {"board": self.board.id, "status": ["done"]},
+            {"board": self.board.id, "priority": "urgent"},
+            {"board": self.board.id, "assigned_to_id": "1"},
+        ):
+            with self.subTest(task_filter=task_filter):
+                response = self.request("put", "/task/bulk-status", {"filter": task_filter, "status": "done"})
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertIn("filter", response.json()["error"])
+
+    def test_unassigned_filter(self):
+        response = self.request("delete", "/task/bulk-delete", {
+            "filter": {"board": self.board.id, "assigned_to_id": None},
+        })
+        self.assertEqual(response.json()["affected"], 4)
+
+
+class BulkColumnChangeTests(ApiTestCase):
+    """Tasks that bulk endpoints move to another column go to its bottom, in order."""
+
+    def column(self, board, status):
+        return list(
+            Task.objects.filter(board=board, status=status).order_by("position", "id").values_list("id", "position")
+        )
+
+    def assertAppended(self, before, moved, after):
+        self.assertEqual([task_id for task_id, _ in after], [task_id for task_id, _ in before] + moved)
+        positions = [position for _, position in after]
+        self.assertEqual(positions, sorted(set(positions)))
+
+    def test_bulk_status(self):
+        done = self.column(self.board, "done")
+        moved = [
+            task_id for task_id, _ in self.column(self.board, "not-done") + self.column(self.board, "semi-done")
+        ]
+        response = self.request("put", "/task/bulk-status", {"filter": {"board": self.board.id}, "status": "done"})
+        self.assertEqual(response.status_code, 200)
+        self.assertAppended(done, moved, self.column(self.board, "done"))
+
+    def test_bulk_move(self):
+        target = self.boards[1]
+        before = {status: self.column(target, status) for status in TASK_STATUSES}
+        moved = {status: [task_id for task_id, _ in self.column(self.board, status)] for status in TASK_STATUSES}
+        response = self.request("put", "/task/bulk-move", {"filter": {"board": self.board.id}, "newBoard": target.id})
+        self.assertEqual(response.status_code, 200)
+        for status in TASK_STATUSES:
+            self.assertAppended(before[status], moved[status], self.column(target, status))
+
+
+@skipUnless(connection.vendor == "sqlite", "the search index is SQLite only")
+class SearchIndexTests(ApiTestCase):
+    def hooks(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('trigger', 'view') AND name LIKE 'task_search%'")
+            return {name for name, in cursor.fetchall()}
+
+    def test_hooks_are_detached_around_migrations(self):
+        hooks = self.hooks()
+        self.assertEqual(len(hooks), 4)
+        # Nothing to migrate: left alone
+        detach_search_for_migrations(sender=None, using="default", plan=[])
+        self.assertEqual(self.hooks(), hooks)
+
+        detach_search_for_migrations(sender=None, using="default", plan=[(None, False)])
+        self.assertEqual(self.hooks(), set())
+        task = Task.objects.create(name="Unindexed meanwhile", board=self.board)
+        attach_search_after_migrations(sender=None, using="default")
+        self.assertEqual(self.hooks(), hooks)
+        self.assertEqual(list(Task.objects.filter(search_filter("unindexed"))), [task])
+        # Nothing to do once they exist
+        self.assertFalse(attach_search_index(connection))
+
+    def test_admin_search_uses_the_index(self):
+        task_admin = TaskAdmin(Task, admin_site)
+        request = RequestFactory().get("/")
+        with CaptureQueriesContext(connection) as queries:
+            tasks, may_have_duplicates = task_admin.get_search_results(request, Task.objects.all(), "task 7")
+            names = sorted(tasks.values_list("name", flat=True))
+        self.assertEqual(names, ["Task 7"] * 3)
+        self.assertFalse(may_have_duplicates)
+        self.assertIn("task_search MATCH", queries[0]["sql"])
+
+    def test_admin_search_board_names(self):
+        task_admin = TaskAdmin(Task, admin_site)
+        tasks, _ = task_admin.get_search_results(RequestFactory().get("/"), Task.objects.all(), "Board 1")
+        self.assertEqual(set(tasks.values_list("board", flat=True)), {self.boards[1].id})
+
+
+class ArchiveTests(ApiTestCase):
+    """Done tasks leave the live table and come back the way they were."""
+
+    def setUp(self):
+        super().setUp()
+        self.stale = Task.objects.filter(board=self.board, status="done")
+        self.stale.update(updated_at=timezone.now() - datetime.timedelta(days=31))
+        self.originals = {
+            task.id: (task.position, task.created_at, task.name)
+            for task in self.stale.only("position", "created_at", "name")
+        }
+        self.cursor = self.request("get", f"/board/{self.board.id}/changes").json()["cursor"]
+
+    def archive(self):
+        stdout = io.StringIO()
+        call_command("archive_done_tasks", "--chunk-size", "3", "--pause", "0", stdout=stdout)
+        return stdout.getvalue()
+
+    def board_task_ids(self):
+        return {task["id"] for task in self.request("get", f"/board/{self.board.id}").json()["tasks"]}
+
+    def search(self, name):
+        results = self.request("get", f"/task/search/{self.workspace.id}?q=\"{name}\"").json()
+        return {result["task"]["id"] for result in results}
+
+    def test_archive(self):
+        self.assertIn(f"Workspace {self.workspace.id}: archived 4 task(s)", self.archive())
+        ids = set(self.originals)
+        self.assertFalse(Task.objects.filter(id__in=ids).exists())
+        self.assertEqual(set(ArchivedTask.objects.values_list("id", flat=True)), ids)
+        # Recently updated done tasks stay
+        self.assertEqual(Task.objects.filter(status="done").count(), 8)
+
+        self.assertEqual(find_drifted_counts([board.id for board in self.boards]), [])
+        self.assertFalse(BoardSnapshot.objects.filter(board=self.board).exists())
+        self.assertFalse(self.board_task_ids() & ids)
+        changes = self.request("get", f"/board/{self.board.id}/changes?since={self.cursor}").json()
+        self.assertEqual(set(changes["deleted_tasks"]), ids)
+        name = self.originals[min(ids)][2]
+        self.assertFalse(self.search(name) & ids)
+
+        listed = self.request("get", f"/task/archived/{self.workspace.id}?board={self.board.id}").json()
+        self.assertEqual({task["id"] for task in listed}, ids)
+        self.assertTrue(all(task["archived_at"] for task in listed))
+
+    def test_restore(self):
+        self.archive()
+        ids = sorted(self.originals)
+        response = self.request("post", f"/task/restore/{self.workspace.id}", {"ids": ids + [0]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(task["id"] for task in response.json()["tasks"]), ids)
+        self.assertEqual(response.json()["missing"], [0])
+
+        for task in Task.objects.filter(id__in=ids):
+            position, created_at, name = self.originals[task.id]
+            self.assertEqual((task.position, task.created_at, task.name), (position, created_at, name))
+            # Fresh, so the next run leaves them be
+            self.assertGreater(task.updated_at, timezone.now() - datetime.timedelta(minutes=1))
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertEqual(find_drifted_counts([self.board.id]), [])
+        self.assertGreaterEqual(self.board_task_ids(), set(ids))
+        self.assertEqual(self.search(self.originals[ids[0]][2]) & set(ids), {ids[0]})
+        changes = self.request("get", f"/board/{self.board.id}/changes?since={self.cursor}").json()
+        self.assertEqual({task["id"] for task in changes["tasks"]}, set(ids))
+        self.assertNotIn("archived 4", self.archive())
+
+    def test_permissions(self):
+        self.archive()
+        User.objects.create_user("outsider", "outsider@example.com", "pw12345!")
+        token = self.client.post(
+            "/user/login", dumps({"username": "outsider", "password": "pw12345!"}), content_type="application/json"
+        ).json()["token"]
+        ids = sorted(self.originals)
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        response = self.api(self.client, "post", f"/task/restore/{self.workspace.id}", {"ids": ids}, **headers)
+        self.assertEqual(response.status_code, 403)
+        response = self.api(self.client, "get", f"/task/archived/{self.workspace.id}", **headers)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(ArchivedTask.objects.count(), 4)
+
+        # Archived ids are only restored through their own workspace
+        other = Workspace.objects.create(name="Other")
+        UserWorkspace.objects.create(user=self.user, workspace=other)
+        response = self.request("post", f"/task/restore/{other.id}", {"ids": ids})
+        self.assertEqual(response.json(), {"tasks": [], "missing": ids})
+        for body in ({"ids": []}, {"ids": ["1"]}, [1]):
+            response = self.request("post", f"/task/restore/{self.workspace.id}", body)
+            self.assertEqual(response.status_code, 400, body)
@@ -1,11 +1,21 @@
 from django.urls import path
-from .views import create_task, update_task, delete_task, assign_task, update_task_status, assign_user_to_task
+from .views import create_task, bulk_create_tasks, bulk_update_task_status, bulk_move_tasks, bulk_delete_tasks, update_task, delete_task, assign_task, update_task_status, move_task, assign_user_to_task, query_tasks, get_my_tasks, search_workspace_tasks, get_archived_tasks, restore_archived_tasks
 
 urlpatterns = [
     path("create/<int:board_id>", create_task, name="create_task"),
+    path("bulk-create/<int:board_id>", bulk_create_tasks, name="bulk_create_tasks"),
     path("update/<int:board_id>/t/<int:task_id>", update_task, name="update_task"),
     path("delete/<int:board_id>/t/<int:task_id>", delete_task, name="delete_task"),
     path("assign/<int:task_id>", assign_task, name="assign_task"),
     path("status/<int:board_id>/t/<int:task_id>", update_task_status, name="update_task_status"),
+    path("move/<int:board_id>/t/<int:task_id>", move_task, name="move_task"),
+    path("bulk-status", bulk_update_task_status, name="bulk_update_task_status"),
+    path("bulk-move", bulk_move_tasks, name="bulk_move_tasks"),
+    path("bulk-delete", bulk_delete_tasks, name="bulk_delete_tasks"),
     path("assign-user/<int:board_id>/t/<int:task_id>", assign_user_to_task, name="assign_user_to_task"),
+    path("query/<int:workspace_id>", query_tasks, name="query_tasks"),
+    path("mine", get_my_tasks, name="get_my_tasks"),
+    path("search/<int:workspace_id>", search_workspace_tasks, name="search_workspace_tasks"),
+    path("archived/<int:workspace_id>", get_archived_tasks, name="get_archived_tasks"),
+    path("restore/<int:workspace_id>", restore_archived_tasks, name="restore_archived_tasks"),
 ]
@@ -1,12 +1,55 @@
 import json
-from django.http import JsonResponse
-from .models import Task
+from django.db import transaction
+from backend.fastjson import JsonResponse, loads
+from .models import ArchivedTask, Task
+from .archive import restore_tasks
+from .query import InvalidQuery, assigned_tasks, filter_tasks, sort_keys
+from .search import search_tasks
+from .ordering import PositionError, append_to_columns, check_position, position_after, position_at_end
 from board.models import Board
-from workspace.models import UserWorkspace
+from workspace.models import Workspace
+from workspace.membership import get_workspace_role
+from board.counters import adjust_task_counts, counts_to_dict, task_count_key
+from board.revisions import record_board_change, record_task_change
+from board.snapshots import END, KEEP
+from board.serialization import TASK_FIELDS, TASK_PRIORITIES, TASK_STATUSES, USER_COLUMNS, board_queryset, column_to_dict, task_queryset, task_to_dict, task_with_board_to_dict, user_to_dict
+from backend.conditional import not_modified, revision_etag, with_etag
+from backend.fieldsets import InvalidFieldset, requested_fields, wants_representation
+from backend.pagination import InvalidPage, get_page_limit, keyset_page, paginated_response
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
 import jwt
 
+
+def _load_board_task(request, board_id, task_id):
+    """
+    Load a task of a board with its assignee, board and workspace joined,
+    in one query, and check that the user is a member of the workspace.
+    Returns ``(task, error_response)``.
+    """
+    task = task_queryset().select_related("board__workspace").filter(id=task_id, board_id=board_id).first()
+    board = task.board if task is not None else Board.objects.filter(id=board_id).first()
+    if board is None:
+        return None, JsonResponse({"error": "Board not found"}, status=404)
+
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return None, JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    # Check if user is a member of this workspace
+    if get_workspace_role(request, board.workspace_id) is None:
+        return None, JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    if task is None:
+        return None, JsonResponse({"error": "Task not found"}, status=404)
+    return task, None
+
+
 # Create new task
 
 
@@ -14,7 +57,7 @@ import jwt
 def create_task(request, board_id):
     if request.method == "POST":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             name = data.get("name")
             description = data.get("description")
             priority = data.get("priority")
@@ -43,7 +86,7 @@ def create_task(request, board_id):
 
         # Check if the board exists
         try:
-            board_to_save = Board.objects.get(id=board_id)
+            board_to_save = board_queryset(with_tasks=False).get(id=board_id)
         except Board.DoesNotExist:
             return JsonResponse({"error": "Board not found"}, status=404)
 
@@ -54,13 +97,8 @@ def create_task(request, board_id):
         if not user_id:
             return JsonResponse({"error": "User ID not found in token"}, status=400)
 
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=board_to_save.workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
+        # Check if user is a member of this workspace
+        if get_workspace_role(request, board_to_save.workspace_id) is None:
             return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
 
         # Validate status if provided
@@ -86,38 +124,135 @@ def create_task(request, board_id):
             board=board_to_save,
             assigned_to=assigned_to
         )
-        task.save()
+        with transaction.atomic():
+            # New tasks go to the bottom of their column
+            task.position = position_at_end(board_to_save.id, task.status)
+            task.save()
+            check_position(task)
+            record_task_change(task, "created", after=END)
 
         # Return the response with task and board details
-        assigned_to_data = None
-        if task.assigned_to:
-            assigned_to_data = {
-                "id": task.assigned_to.id,
-                "username": task.assigned_to.username,
-                "email": task.assigned_to.email,
-                "first_name": task.assigned_to.first_name,
-                "last_name": task.assigned_to.last_name,
-            }
-
         return JsonResponse(
             {
-                "task": {
-                    "id": task.id,
-                    "name": task.name,
-                    "description": task.description,
-                    "priority": task.priority,
-                    "status": task.status,
-                    "assigned_to": assigned_to_data,
-                    "created_at": task.created_at,
-                    "updated_at": task.updated_at,
+                "task": task_to_dict(task),
+                "board": {
+                    "id": board_to_save.id,
+                    "name": board_to_save.name,
                 },
+                "workspace": {
+                    "id": board_to_save.workspace.id,
+                    "name": board_to_save.workspace.name,
+                }
+            },
+            status=201
+        )
+
+    return JsonResponse({"error": "Method not allowed"}, status=405)
+
+# Create many tasks on one board
+# the url pattern is /task/bulk-create/<int:board_id>
+# the request body is a JSON array of tasks shaped like create_task's body
+@csrf_exempt
+def bulk_create_tasks(request, board_id):
+    if request.method == "POST":
+        try:
+            items = loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "A JSON array of tasks is required"}, status=400)
+
+        if not isinstance(items, list) or not items:
+            return JsonResponse({"error": "A JSON array of tasks is required"}, status=400)
+
+        if len(items) > settings.TASK_BULK_MAX_SIZE:
+            return JsonResponse(
+                {"error": f"At most {settings.TASK_BULK_MAX_SIZE} tasks can be created at once"},
+                status=400,
+            )
+
+        # Check if the board exists
+        try:
+            board_to_save = board_queryset(with_tasks=False).get(id=board_id)
+        except Board.DoesNotExist:
+            return JsonResponse({"error": "Board not found"}, status=404)
+
+        # Check if the authenticated user is a member of this workspace
+        payload = request.user
+        user_id = payload.get("id")
+
+        if not user_id:
+            return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+        # Check if user is a member of this workspace
+        if get_workspace_role(request, board_to_save.workspace_id) is None:
+            return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+        # Resolve every assignee with one query
+        assignee_ids = {
+            str(item["assigned_to_id"])
+            for item in items
+            if isinstance(item, dict) and item.get("assigned_to_id")
+        }
+        assignees = {
+            str(user.id): user
+            for user in User.objects.filter(id__in=[i for i in assignee_ids if i.isdigit()])
+        }
+
+        # Validate the whole batch before inserting anything
+        tasks, errors = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "error": "Task must be an object"})
+                continue
+
+            name = item.get("name")
+            priority = item.get("priority")
+            status = item.get("status")
+            assigned_to_id = item.get("assigned_to_id")
+
+            if not name:
+                errors.append({"index": index, "error": "Task name is required"})
+            elif not priority:
+                errors.append({"index": index, "error": "Task priority is required"})
+            elif priority not in ["low", "medium", "high"]:
+                errors.append({"index": index, "error": "Task priority must be [low, medium, or high]"})
+            elif status and status not in ["not-done", "semi-done", "done"]:
+                errors.append({"index": index, "error": "Task status must be [not-done, semi-done, or done]"})
+            elif assigned_to_id and str(assigned_to_id) not in assignees:
+                errors.append({"index": index, "error": "Assigned user not found"})
+            else:
+                tasks.append(
+                    Task(
+                        name=name,
+                        description=item.get("description") or "",
+                        priority=priority,
+                        status=status if status else "not-done",
+                        board=board_to_save,
+                        workspace_id=board_to_save.workspace_id,
+                        assigned_to=assignees[str(assigned_to_id)] if assigned_to_id else None,
+                    )
+                )
+
+        if errors:
+            return JsonResponse({"error": "Invalid tasks, nothing was created", "errors": errors}, status=400)
+
+        with transaction.atomic():
+            # New tasks go to the bottom of their column, in request order
+            append_to_columns(board_to_save.id, tasks)
+            Task.objects.bulk_create(tasks, batch_size=500)
+            adjust_task_counts(added=[task_count_key(task) for task in tasks])
+            record_board_change(board_to_save.id, tasks=[(board_to_save.id, task.id, "created") for task in tasks])
+
+        # Results are in the order of the request body
+        return JsonResponse(
+            {
+                "tasks": [task_to_dict(task) for task in tasks],
                 "board": {
-                    "id": task.board.id,
-                    "name": task.board.name,
+                    "id": board_to_save.id,
+                    "name": board_to_save.name,
                 },
                 "workspace": {
-                    "id": task.board.workspace.id,
-                    "name": task.board.workspace.name,
+                    "id": board_to_save.workspace.id,
+                    "name": board_to_save.workspace.name,
                 }
             },
             status=201
@@ -125,13 +260,14 @@ def create_task(request, board_id):
 
     return JsonResponse({"error": "Method not allowed"}, status=405)
 
+
 # Update task
 # the url pattern is /task/update/<int:board_id>/t/<int:task_id>
 @csrf_exempt
 def update_task(request, board_id, task_id):
     if request.method == "PUT":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             name = data.get("name")
             description = data.get("description")
             priority = data.get("priority")
@@ -157,31 +293,12 @@ def update_task(request, board_id, task_id):
                 {"error": "Task priority must be [low, medium or high]"}, status=400
             )
 
-        try:
-            board_to_save = Board.objects.get(id=board_id)
-        except Board.DoesNotExist:
-            return JsonResponse({"error": "Board not found"}, status=404)
-
         # Check if the authenticated user is a member of this workspace
-        payload = request.user
-        user_id = payload.get("id")
-
-        if not user_id:
-            return JsonResponse({"error": "User ID not found in token"}, status=400)
-
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=board_to_save.workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
-            return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
-
-        try:
-            task = Task.objects.get(id=task_id, board=board_to_save)
-        except Task.DoesNotExist:
-            return JsonResponse({"error": "Task not found"}, status=404)
+        task, error = _load_board_task(request, board_id, task_id)
+        if error:
+            return error
+        board_to_save = task.board
+        previous_key = task_count_key(task)
 
         # Validate status if provided
         if status and status not in ["not-done", "semi-done", "done"]:
@@ -203,47 +320,131 @@ def update_task(request, board_id, task_id):
         task.name = name
         task.description = description
         task.priority = priority
-        if status:
-            task.status = status
-        task.save()
-
-        # Prepare assigned_to data
-        assigned_to_data = None
-        if task.assigned_to:
-            assigned_to_data = {
-                "id": task.assigned_to.id,
-                "username": task.assigned_to.username,
-                "email": task.assigned_to.email,
-                "first_name": task.assigned_to.first_name,
-                "last_name": task.assigned_to.last_name,
-            }
+        with transaction.atomic():
+            after = KEEP
+            # A task changing column goes to the bottom of the new one
+            if status and status != task.status:
+                task.status = status
+                task.position = position_at_end(board_to_save.id, status)
+                after = END
+            task.save()
+            check_position(task)
+            record_task_change(task, "updated", previous=previous_key, after=after)
+
+        return JsonResponse(task_with_board_to_dict(task))
+
+    if request.method == "PATCH":
+        return patch_task(request, board_id, task_id)
+
+    return JsonResponse({"error": "Method not allowed"}, status=405)
+
 
+# Partially update a task
+# the url pattern is /task/update/<int:board_id>/t/<int:task_id> (PATCH)
+# the request body holds only the fields to change, among PATCHABLE_TASK_FIELDS
+# the response holds the id, the changed fields and updated_at; ask for the
+# whole task with "Prefer: return=representation" or ?fields=/?exclude=
+# a single-field edit reads and writes the task with one query each; the
+# revision bumps, change log entry and snapshot patch that every write
+# makes come on top (see TaskQueryBudgetTests)
+PATCHABLE_TASK_FIELDS = ("name", "description", "priority", "status", "assigned_to_id")
+
+
+def patch_task(request, board_id, task_id):
+    try:
+        data = loads(request.body)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict) or not data:
+        return JsonResponse({"error": "A JSON object of fields to update is required"}, status=400)
+
+    unknown = set(data) - set(PATCHABLE_TASK_FIELDS)
+    if unknown:
+        return JsonResponse({"error": f"Unknown field(s): {', '.join(sorted(unknown))}"}, status=400)
+    if "name" in data and (not isinstance(data["name"], str) or not data["name"]):
+        return JsonResponse({"error": "Task name is required"}, status=400)
+    if "description" in data and not isinstance(data["description"], (str, type(None))):
+        return JsonResponse({"error": "Task description must be a string"}, status=400)
+    if "priority" in data and data["priority"] not in TASK_PRIORITIES:
+        return JsonResponse({"error": "Task priority must be [low, medium or high]"}, status=400)
+    if "status" in data and data["status"] not in TASK_STATUSES:
         return JsonResponse(
-            {
-                "id": task.id,
-                "name": task.name,
-                "description": task.description,
-                "priority": task.priority,
-                "status": task.status,
-                "assigned_to": assigned_to_data,
-                "board": {
-                    "id": task.board.id,
-                    "name": task.board.name,
-                    "workspace": {
-                        "id": task.board.workspace.id,
-                        "name": task.board.workspace.name,
-                        "created_at": task.board.workspace.created_at,
-                        "updated_at": task.board.workspace.updated_at,
-                    },
-                    "created_at": task.board.created_at,
-                    "updated_at": task.board.updated_at,
-                },
-                "created_at": task.created_at,
-                "updated_at": task.updated_at,
-            }
+            {"error": "Task status must be [not-done, semi-done, or done]"}, status=400
         )
-
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    assigned_to_id = data.get("assigned_to_id")
+    if assigned_to_id == "":
+        assigned_to_id = None
+    if assigned_to_id is not None and (not isinstance(assigned_to_id, int) or isinstance(assigned_to_id, bool)):
+        return JsonResponse({"error": "assigned_to_id must be a user id"}, status=400)
+
+    try:
+        fields = requested_fields(request, TASK_FIELDS)
+    except InvalidFieldset as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    representation = wants_representation(request)
+
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    # One query: the task carries its workspace, so the board is not loaded
+    if representation:
+        tasks = task_queryset()
+    else:
+        tasks = Task.objects.only("id", "board", "workspace", "status", "priority")
+    try:
+        task = tasks.get(id=task_id, board_id=board_id)
+    except Task.DoesNotExist:
+        return JsonResponse({"error": "Task not found"}, status=404)
+
+    if get_workspace_role(request, task.workspace_id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    previous_key = task_count_key(task)
+    # Changed payload fields, for the response and the board snapshot
+    changed = {}
+    update_fields = ["updated_at"]
+    if "assigned_to_id" in data:
+        assigned_to = None
+        if assigned_to_id is not None:
+            try:
+                assigned_to = User.objects.only(*USER_COLUMNS).get(id=assigned_to_id)
+            except User.DoesNotExist:
+                return JsonResponse({"error": "Assigned user not found"}, status=404)
+        task.assigned_to = assigned_to
+        changed["assigned_to"] = user_to_dict(assigned_to)
+        update_fields.append("assigned_to")
+    for field in ("name", "description", "priority"):
+        if field in data:
+            value = data[field] if field != "description" else data[field] or ""
+            setattr(task, field, value)
+            changed[field] = value
+            update_fields.append(field)
+
+    with transaction.atomic():
+        after = KEEP
+        if "status" in data:
+            changed["status"] = data["status"]
+            # A task changing column goes to the bottom of the new one
+            if data["status"] != task.status:
+                task.status = data["status"]
+                task.position = position_at_end(board_id, task.status)
+                update_fields += ["status", "position"]
+                after = END
+        task.save(update_fields=update_fields)
+        changed["updated_at"] = task.updated_at
+
+        if after == END:
+            check_position(task)
+        # Only the changed fields are patched into the board snapshot
+        record_task_change(task, "updated", previous=previous_key, after=after, values=changed)
+
+    if representation:
+        return JsonResponse(task_to_dict(task, fields))
+    return JsonResponse({"id": task.id, **changed})
 
 
 # Delete task
@@ -251,33 +452,16 @@ def update_task(request, board_id, task_id):
 @csrf_exempt
 def delete_task(request, board_id, task_id):
     if request.method == "DELETE":
-        try:
-            board_to_save = Board.objects.get(id=board_id)
-        except Board.DoesNotExist:
-            return JsonResponse({"error": "Board not found"}, status=404)
-
         # Check if the authenticated user is a member of this workspace
-        payload = request.user
-        user_id = payload.get("id")
+        task, error = _load_board_task(request, board_id, task_id)
+        if error:
+            return error
 
-        if not user_id:
-            return JsonResponse({"error": "User ID not found in token"}, status=400)
-
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=board_to_save.workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
-            return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
-
-        try:
-            task = Task.objects.get(id=task_id, board=board_to_save)
-        except Task.DoesNotExist:
-            return JsonResponse({"error": "Task not found"}, status=404)
-
-        task.delete()
+        with transaction.atomic():
+            previous_key = task_count_key(task)
+            # Deleted through a queryset so the instance keeps its id
+            Task.objects.filter(id=task.id).delete()
+            record_task_change(task, "deleted", previous=previous_key)
 
         return JsonResponse({"message": "Task deleted successfully"})
 
@@ -293,7 +477,7 @@ def delete_task(request, board_id, task_id):
 def assign_task(request, task_id):
     if request.method == "PUT":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             prev_board_id = data.get("prevBoard")
             new_board_id = data.get("newBoard")
 
@@ -308,13 +492,15 @@ def assign_task(request, task_id):
         if not new_board_id:
             return JsonResponse({"error": "new_board_id is required"}, status=400)
 
-        try:
-            prev_board = Board.objects.get(id=prev_board_id)
-        except Board.DoesNotExist:
+        # The task is loaded with its board, and the previous board on its
+        # own only when the task isn't on it
+        task = task_queryset().select_related("board").filter(id=task_id, board_id=prev_board_id).first()
+        prev_board = task.board if task is not None else Board.objects.filter(id=prev_board_id).first()
+        if prev_board is None:
             return JsonResponse({"error": "Previous Board not found"}, status=404)
 
         try:
-            new_board = Board.objects.get(id=new_board_id)
+            new_board = board_queryset(with_tasks=False).get(id=new_board_id)
         except Board.DoesNotExist:
             return JsonResponse({"error": "New Board not found"}, status=404)
 
@@ -325,46 +511,29 @@ def assign_task(request, task_id):
         if not user_id:
             return JsonResponse({"error": "User ID not found in token"}, status=400)
 
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of both workspaces
-            prev_user_workspace = UserWorkspace.objects.get(workspace=prev_board.workspace, user=user)
-            new_user_workspace = UserWorkspace.objects.get(workspace=new_board.workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
+        # Check if user is a member of both workspaces
+        if (
+            get_workspace_role(request, prev_board.workspace_id) is None
+            or get_workspace_role(request, new_board.workspace_id) is None
+        ):
             return JsonResponse({"error": "You do not have permission to access one or both workspaces"}, status=403)
 
-        try:
-            task = Task.objects.get(id=task_id, board=prev_board)
-        except Task.DoesNotExist:
+        if task is None:
             return JsonResponse({"error": "Task not found"}, status=404)
 
-        task.board = new_board
-        task.save()
+        previous_key = task_count_key(task)
+        with transaction.atomic():
+            after = KEEP
+            # The task goes to the bottom of its column on the new board
+            if new_board.id != task.board_id:
+                task.position = position_at_end(new_board.id, task.status)
+                after = END
+            task.board = new_board
+            task.save()
+            check_position(task)
+            record_task_change(task, "moved", previous=previous_key, after=after)
 
-        return JsonResponse(
-            {
-                "id": task.id,
-                "name": task.name,
-                "description": task.description,
-                "priority": task.priority,
-                "board": {
-                    "id": task.board.id,
-                    "name": task.board.name,
-                    "workspace": {
-                        "id": task.board.workspace.id,
-                        "name": task.board.workspace.name,
-                        "created_at": task.board.workspace.created_at,
-                        "updated_at": task.board.workspace.updated_at,
-                    },
-                    "created_at": task.board.created_at,
-                    "updated_at": task.board.updated_at,
-                },
-                "created_at": task.created_at,
-                "updated_at": task.updated_at,
-            }
-        )
+        return JsonResponse(task_with_board_to_dict(task))
 
     return JsonResponse({"error": "Method not allowed"}, status=405)
 
@@ -375,7 +544,7 @@ def assign_task(request, task_id):
 def update_task_status(request, board_id, task_id):
     if request.method == "PUT":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             status = data.get("status")
 
         except json.JSONDecodeError:
@@ -390,70 +559,74 @@ def update_task_status(request, board_id, task_id):
                 {"error": "Task status must be [not-done, semi-done, or done]"}, status=400
             )
 
-        try:
-            board = Board.objects.get(id=board_id)
-        except Board.DoesNotExist:
-            return JsonResponse({"error": "Board not found"}, status=404)
-
         # Check if the authenticated user is a member of this workspace
-        payload = request.user
-        user_id = payload.get("id")
+        task, error = _load_board_task(request, board_id, task_id)
+        if error:
+            return error
+        board = task.board
+
+        previous_key = task_count_key(task)
+        with transaction.atomic():
+            after = KEEP
+            # A task changing column goes to the bottom of the new one
+            if status != task.status:
+                task.position = position_at_end(board.id, status)
+                after = END
+            task.status = status
+            task.save()
+            check_position(task)
+            record_task_change(task, "updated", previous=previous_key, after=after)
 
-        if not user_id:
-            return JsonResponse({"error": "User ID not found in token"}, status=400)
+        return JsonResponse(task_with_board_to_dict(task))
 
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=board.workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
-            return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+    return JsonResponse({"error": "Method not allowed"}, status=405)
 
+
+# Reorder a task within its board (drag and drop)
+# the url pattern is /task/move/<int:board_id>/t/<int:task_id>
+# the request body should contain "after", the id of the task to drop it
+# after (null for the top of the column), and optionally a new "status"
+@csrf_exempt
+def move_task(request, board_id, task_id):
+    if request.method == "PUT":
         try:
-            task = Task.objects.get(id=task_id, board=board)
-        except Task.DoesNotExist:
-            return JsonResponse({"error": "Task not found"}, status=404)
+            data = loads(request.body)
+            after_id = data.get("after")
+            status = data.get("status")
+        except (json.JSONDecodeError, AttributeError):
+            return JsonResponse({"error": "Invalid JSON data"}, status=400)
 
-        task.status = status
-        task.save()
-
-        # Prepare assigned_to data
-        assigned_to_data = None
-        if task.assigned_to:
-            assigned_to_data = {
-                "id": task.assigned_to.id,
-                "username": task.assigned_to.username,
-                "email": task.assigned_to.email,
-                "first_name": task.assigned_to.first_name,
-                "last_name": task.assigned_to.last_name,
-            }
+        if after_id is not None and not isinstance(after_id, int):
+            return JsonResponse({"error": "after must be a task id or null"}, status=400)
 
-        return JsonResponse(
-            {
-                "id": task.id,
-                "name": task.name,
-                "description": task.description,
-                "priority": task.priority,
-                "status": task.status,
-                "assigned_to": assigned_to_data,
-                "board": {
-                    "id": task.board.id,
-                    "name": task.board.name,
-                    "workspace": {
-                        "id": task.board.workspace.id,
-                        "name": task.board.workspace.name,
-                        "created_at": task.board.workspace.created_at,
-                        "updated_at": task.board.workspace.updated_at,
-                    },
-                    "created_at": task.board.created_at,
-                    "updated_at": task.board.updated_at,
-                },
-                "created_at": task.created_at,
-                "updated_at": task.updated_at,
-            }
-        )
+        # Validate status if provided
+        if status and status not in ["not-done", "semi-done", "done"]:
+            return JsonResponse(
+                {"error": "Task status must be [not-done, semi-done, or done]"}, status=400
+            )
+
+        # Check if the authenticated user is a member of this workspace
+        task, error = _load_board_task(request, board_id, task_id)
+        if error:
+            return error
+        board = task.board
+
+        previous_key = task_count_key(task)
+        status = status or task.status
+        with transaction.atomic():
+            try:
+                # Only the moved task's row is written
+                task.position = position_after(board.id, status, after_id, exclude_id=task.id)
+            except Task.DoesNotExist:
+                return JsonResponse({"error": "Task to place after not found in this column"}, status=404)
+            except PositionError as e:
+                return JsonResponse({"error": str(e)}, status=409)
+            task.status = status
+            task.save(update_fields=["position", "status", "updated_at"])
+            check_position(task)
+            record_task_change(task, "moved", previous=previous_key, after=after_id)
+
+        return JsonResponse(task_to_dict(task))
 
     return JsonResponse({"error": "Method not allowed"}, status=405)
 
@@ -463,16 +636,140 @@ def update_task_status(request, board_id, task_id):
 def assign_user_to_task(request, board_id, task_id):
     if request.method == "PUT":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             assigned_to_id = data.get("assigned_to_id")
         except json.JSONDecodeError:
             return JsonResponse({"error": "Invalid JSON data"}, status=400)
 
-        # Check if the board exists
+        # Check if the authenticated user is a member of this workspace
+        task, error = _load_board_task(request, board_id, task_id)
+        if error:
+            return error
+
+        # Handle assignment/unassignment
+        if assigned_to_id is None or assigned_to_id == "":
+            # Unassign user
+            task.assigned_to = None
+        else:
+            # Assign user
+            try:
+                assigned_to = User.objects.get(id=assigned_to_id)
+                task.assigned_to = assigned_to
+            except User.DoesNotExist:
+                return JsonResponse({"error": "Assigned user not found"}, status=404)
+
+        with transaction.atomic():
+            task.save()
+            record_task_change(task, "updated", previous=task_count_key(task))
+
+        return JsonResponse(task_to_dict(task))
+
+    return JsonResponse({"error": "Method not allowed"}, status=405)
+
+# Bulk changes
+#
+# The bulk endpoints select tasks either by id ({"ids": [...]}) or by a
+# filter ({"filter": {"board": ..., "status": ..., "priority": ...}}), check
+# the membership once per workspace involved, and apply one set-based
+# UPDATE/DELETE per board.
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# filter key -> (lookup, value check, what the value must be)
+BULK_FILTERS = {
+    "board": ("board_id", _is_id, "a board id"),
+    "workspace": ("workspace_id", _is_id, "a workspace id"),
+    "status": ("status", lambda value: value in TASK_STATUSES, f"one of {', '.join(TASK_STATUSES)}"),
+    "priority": ("priority", lambda value: value in TASK_PRIORITIES, f"one of {', '.join(TASK_PRIORITIES)}"),
+    "assigned_to_id": ("assigned_to_id", lambda value: value is None or _is_id(value), "a user id or null"),
+}
+
+
+def _bulk_selection(request, data):
+    """
+    Resolve the tasks selected by a bulk request body. Returns
+    ``(queryset, counts, error_response)`` where ``counts`` maps the
+    selected tasks' counter keys (board, status, priority) to task numbers.
+    """
+    ids = data.get("ids")
+    task_filter = data.get("filter")
+
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return None, None, JsonResponse({"error": "ids must be a list of task ids"}, status=400)
+        if len(ids) > settings.TASK_BULK_MAX_SIZE:
+            return None, None, JsonResponse(
+                {"error": f"At most {settings.TASK_BULK_MAX_SIZE} tasks can be changed at once"},
+                status=400,
+            )
+        tasks = Task.objects.filter(id__in=ids)
+    elif isinstance(task_filter, dict):
+        unknown = set(task_filter) - set(BULK_FILTERS)
+        if unknown:
+            return None, None, JsonResponse(
+                {"error": f"Unknown filter: {', '.join(sorted(unknown))}"}, status=400
+            )
+        if "board" not in task_filter and "workspace" not in task_filter:
+            return None, None, JsonResponse(
+                {"error": "filter must include a board or a workspace"}, status=400
+            )
+        for key, value in task_filter.items():
+            _, is_valid, expected = BULK_FILTERS[key]
+            if not is_valid(value):
+                return None, None, JsonResponse({"error": f"filter {key} must be {expected}"}, status=400)
+        tasks = Task.objects.filter(
+            **{BULK_FILTERS[key][0]: value for key, value in task_filter.items()}
+        )
+    else:
+        return None, None, JsonResponse({"error": "ids or filter is required"}, status=400)
+
+    # One grouped query gives the boards involved and the counter deltas
+    counts = {
+        (board_id, status, priority): count
+        for board_id, status, priority, count in tasks.values_list("board_id", "status", "priority")
+        .annotate(count=Count("id"))
+        .order_by()
+    }
+    if sum(counts.values()) > settings.TASK_BULK_MAX_SIZE:
+        return None, None, JsonResponse(
+            {"error": f"At most {settings.TASK_BULK_MAX_SIZE} tasks can be changed at once"},
+            status=400,
+        )
+
+    # Check if user is a member of every workspace involved
+    board_ids = {board_id for board_id, _, _ in counts}
+    workspace_ids = Workspace.objects.filter(boards__id__in=board_ids).values_list("id", flat=True).distinct()
+    for workspace_id in workspace_ids:
+        if get_workspace_role(request, workspace_id) is None:
+            return None, None, JsonResponse(
+                {"error": "You do not have permission to access one or more workspaces"}, status=403
+            )
+
+    return tasks, counts, None
+
+
+def _affected(counts):
+    boards = {}
+    for (board_id, _, _), count in counts.items():
+        boards[board_id] = boards.get(board_id, 0) + count
+    return {"affected": sum(boards.values()), "boards": boards}
+
+
+# Update the status of many tasks
+# the url pattern is /task/bulk-status
+# the request body should contain ids or filter, and the new status
+@csrf_exempt
+def bulk_update_task_status(request):
+    if request.method == "PUT":
         try:
-            board = Board.objects.get(id=board_id)
-        except Board.DoesNotExist:
-            return JsonResponse({"error": "Board not found"}, status=404)
+            data = loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Task status is required"}, status=400)
+
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "Task status is required"}, status=400)
 
         # Check if the authenticated user is a member of this workspace
         payload = request.user
@@ -481,57 +778,373 @@ def assign_user_to_task(request, board_id, task_id):
         if not user_id:
             return JsonResponse({"error": "User ID not found in token"}, status=400)
 
+        status = data.get("status")
+        if not status:
+            return JsonResponse({"error": "Task status is required"}, status=400)
+        elif status not in ["not-done", "semi-done", "done"]:
+            return JsonResponse(
+                {"error": "Task status must be [not-done, semi-done, or done]"}, status=400
+            )
+
+        now = timezone.now()
+        with transaction.atomic():
+            tasks, counts, error = _bulk_selection(request, data)
+            if error:
+                return error
+            changed = []
+            for board_id in {board_id for board_id, _, _ in counts}:
+                selected = list(
+                    tasks.filter(board_id=board_id)
+                    .order_by("status", "position", "id")
+                    .only("id", "status", "position", "board")
+                )
+                # Tasks changing column go to its bottom, in board order
+                moved = [task for task in selected if task.status != status]
+                for task in moved:
+                    task.status = status
+                append_to_columns(board_id, moved)
+                ids = [task.id for task in selected]
+                Task.objects.filter(id__in=ids).update(status=status, updated_at=now)
+                Task.objects.bulk_update(moved, ["position"], batch_size=500)
+                changed += [(board_id, task_id, "updated") for task_id in ids]
+            adjust_task_counts(
+                removed=counts,
+                added={(board_id, status, priority): count for (board_id, _, priority), count in counts.items()},
+            )
+            record_board_change(*{board_id for board_id, _, _ in counts}, tasks=changed)
+
+        return JsonResponse(_affected(counts))
+
+    return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Move many tasks to another board
+# the url pattern is /task/bulk-move
+# the request body should contain ids or filter, and the newBoard
+@csrf_exempt
+def bulk_move_tasks(request):
+    if request.method == "PUT":
         try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=board.workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
-            return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+            data = loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "newBoard is required"}, status=400)
+
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "newBoard is required"}, status=400)
+
+        # Check if the authenticated user is a member of this workspace
+        payload = request.user
+        user_id = payload.get("id")
+
+        if not user_id:
+            return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+        new_board_id = data.get("newBoard")
+        if not new_board_id:
+            return JsonResponse({"error": "new_board_id is required"}, status=400)
 
-        # Check if the task exists
         try:
-            task = Task.objects.get(id=task_id, board=board)
-        except Task.DoesNotExist:
-            return JsonResponse({"error": "Task not found"}, status=404)
+            new_board = Board.objects.get(id=new_board_id)
+        except (Board.DoesNotExist, ValueError):
+            return JsonResponse({"error": "New Board not found"}, status=404)
 
-        # Handle assignment/unassignment
-        if assigned_to_id is None or assigned_to_id == "":
-            # Unassign user
-            task.assigned_to = None
+        if get_workspace_role(request, new_board.workspace_id) is None:
+            return JsonResponse({"error": "You do not have permission to access one or both workspaces"}, status=403)
+
+        now = timezone.now()
+        with transaction.atomic():
+            tasks, counts, error = _bulk_selection(request, data)
+            if error:
+                return error
+            board_ids = {board_id for board_id, _, _ in counts}
+            # Moved tasks go to the bottom of their column on the new board
+            moving = list(
+                tasks.exclude(board_id=new_board.id)
+                .order_by("board_id", "status", "position", "id")
+                .only("id", "status", "position", "board")
+            )
+            append_to_columns(new_board.id, moving)
+            changed = []
+            for board_id in board_ids - {new_board.id}:
+                ids = [task.id for task in moving if task.board_id == board_id]
+                Task.objects.filter(id__in=ids).update(
+                    board=new_board, workspace_id=new_board.workspace_id, updated_at=now
+                )
+                # Gone from the old board, new on the target board
+                changed += [(board_id, task_id, "moved") for task_id in ids]
+                changed += [(new_board.id, task_id, "moved") for task_id in ids]
+            Task.objects.bulk_update(moving, ["position"], batch_size=500)
+            moved = {key: count for key, count in counts.items() if key[0] != new_board.id}
+            adjust_task_counts(
+                removed=moved,
+                added={(new_board.id, status, priority): count for (_, status, priority), count in moved.items()},
+            )
+            record_board_change(*board_ids, new_board.id, tasks=changed)
+
+        return JsonResponse(_affected(moved))
+
+    return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Delete many tasks
+# the url pattern is /task/bulk-delete
+# the request body should contain ids or filter
+@csrf_exempt
+def bulk_delete_tasks(request):
+    if request.method == "DELETE":
+        try:
+            data = loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "ids or filter is required"}, status=400)
+
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "ids or filter is required"}, status=400)
+
+        # Check if the authenticated user is a member of this workspace
+        payload = request.user
+        user_id = payload.get("id")
+
+        if not user_id:
+            return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+        with transaction.atomic():
+            tasks, counts, error = _bulk_selection(request, data)
+            if error:
+                return error
+            board_ids = {board_id for board_id, _, _ in counts}
+            changed = []
+            for board_id in board_ids:
+                ids = list(tasks.filter(board_id=board_id).values_list("id", flat=True))
+                Task.objects.filter(id__in=ids).delete()
+                changed += [(board_id, task_id, "deleted") for task_id in ids]
+            adjust_task_counts(removed=counts)
+            record_board_change(*board_ids, tasks=changed)
+
+        return JsonResponse(_affected(counts))
+
+    return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Query the tasks of a workspace
+# the url pattern is /task/query/<int:workspace_id>?status=not-done&priority=high&assigned_to=7
+# filters: status, priority, board (comma separated), assigned_to (id or none),
+# created_after/created_before/updated_after/updated_before (ISO 8601)
+# sort: comma separated keys among created_at, updated_at, name, board ("-" for descending)
+def query_tasks(request, workspace_id):
+    try:
+        workspace = Workspace.objects.get(id=workspace_id)
+    except Workspace.DoesNotExist:
+        return JsonResponse({"error": "Workspace not found"}, status=404)
+
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    if get_workspace_role(request, workspace.id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    # The workspace revision covers every task in it
+    etag = revision_etag(request, "tasks", workspace.id, workspace.revision)
+    response = not_modified(request, etag)
+    if response:
+        return response
+
+    try:
+        task_fields = requested_fields(request, TASK_FIELDS)
+        keys = sort_keys(request.GET.get("sort"))
+        # Sort columns are loaded too, the cursor is built from them
+        columns = None if task_fields is None else (*task_fields, *(key.lstrip("-") for key in keys))
+        tasks, next_cursor = keyset_page(
+            filter_tasks(task_queryset(columns).filter(workspace_id=workspace.id), request.GET),
+            keys,
+            get_page_limit(request),
+            request.GET.get("cursor"),
+        )
+    except (InvalidQuery, InvalidPage, InvalidFieldset) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    data = [task_to_dict(task, task_fields) for task in tasks]
+    return with_etag(paginated_response(request, data, next_cursor), etag)
+
+
+# Get the tasks assigned to the authenticated user in all their workspaces
+# the url pattern is /task/mine?status=...&priority=...&workspace=1,2&sort=...
+# takes the filters of /task/query plus workspace; task_counts ignore the status filter
+# with group=status each status column returns its first page, continue one
+# with ?status=<status>&cursor=...
+def get_my_tasks(request):
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    group = request.GET.get("group")
+    if group not in (None, "status"):
+        return JsonResponse({"error": "group must be status"}, status=400)
+
+    try:
+        task_fields = requested_fields(request, TASK_FIELDS)
+        keys = sort_keys(request.GET.get("sort"))
+        limit = get_page_limit(request)
+        # Sort columns are loaded too, the cursor is built from them
+        columns = None if task_fields is None else (*task_fields, *(key.lstrip("-") for key in keys))
+        tasks = assigned_tasks(task_queryset(columns), user_id, request.GET)
+
+        params = request.GET.copy()
+        params.pop("status", None)
+        counts = counts_to_dict(
+            assigned_tasks(Task.objects.all(), user_id, params)
+            .values_list("status", "priority")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+
+        data = {"task_counts": counts}
+        if group == "status":
+            data["columns"] = {}
+            for status in [status for status in request.GET.get("status", "").split(",") if status] or TASK_STATUSES:
+                page, next_cursor = (
+                    keyset_page(tasks.filter(status=status), keys, limit)
+                    if counts["status"][status]
+                    else ([], None)
+                )
+                data["columns"][status] = column_to_dict(counts["status"][status], page, next_cursor, task_fields)
         else:
-            # Assign user
-            try:
-                assigned_to = User.objects.get(id=assigned_to_id)
-                task.assigned_to = assigned_to
-            except User.DoesNotExist:
-                return JsonResponse({"error": "Assigned user not found"}, status=404)
+            page, next_cursor = keyset_page(tasks, keys, limit, request.GET.get("cursor"))
+            data["tasks"] = [task_to_dict(task, task_fields) for task in page]
+            data["next"] = next_cursor
+    except (InvalidQuery, InvalidPage, InvalidFieldset) as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
-        task.save()
-
-        # Prepare assigned_to data
-        assigned_to_data = None
-        if task.assigned_to:
-            assigned_to_data = {
-                "id": task.assigned_to.id,
-                "username": task.assigned_to.username,
-                "email": task.assigned_to.email,
-                "first_name": task.assigned_to.first_name,
-                "last_name": task.assigned_to.last_name,
-            }
+    return JsonResponse(data)
+
+
+# Search the tasks of a workspace by name and description, best match first
+# the url pattern is /task/search/<int:workspace_id>?q=...&limit=...&cursor=...
+def search_workspace_tasks(request, workspace_id):
+    try:
+        workspace = Workspace.objects.get(id=workspace_id)
+    except Workspace.DoesNotExist:
+        return JsonResponse({"error": "Workspace not found"}, status=404)
+
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    if get_workspace_role(request, workspace.id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"error": "Search query is required"}, status=400)
+
+    try:
+        hits, next_cursor = search_tasks(
+            workspace.id, query, get_page_limit(request), request.GET.get("cursor")
+        )
+    except InvalidPage as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    tasks = task_queryset().in_bulk([task_id for task_id, _, _, _ in hits])
+    data = [
+        {
+            "task": task_to_dict(tasks[task_id]),
+            "score": -rank,
+            "name": name,
+            "snippet": snippet,
+        }
+        for task_id, rank, name, snippet in hits
+        # Skip tasks deleted since the index was read
+        if task_id in tasks
+    ]
+    return paginated_response(request, data, next_cursor)
+
+
+# Browse the archived tasks of a workspace, last completed first
+# the url pattern is /task/archived/<int:workspace_id>?board=...&limit=...&cursor=...
+def get_archived_tasks(request, workspace_id):
+    try:
+        workspace = Workspace.objects.get(id=workspace_id)
+    except Workspace.DoesNotExist:
+        return JsonResponse({"error": "Workspace not found"}, status=404)
+
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    if get_workspace_role(request, workspace.id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    tasks = ArchivedTask.objects.select_related("assigned_to").filter(workspace_id=workspace.id)
+    board = request.GET.get("board")
+    if board is not None:
+        if not board.isdigit():
+            return JsonResponse({"error": "board must be a board id"}, status=400)
+        tasks = tasks.filter(board_id=int(board))
+
+    try:
+        tasks, next_cursor = keyset_page(
+            tasks, ("-updated_at", "-id"), get_page_limit(request), request.GET.get("cursor")
+        )
+    except InvalidPage as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    data = [{**task_to_dict(task), "archived_at": task.archived_at} for task in tasks]
+    return paginated_response(request, data, next_cursor)
+
+
+# Restore archived tasks to their boards
+# the url pattern is /task/restore/<int:workspace_id>
+# the request body should contain ids, the archived task ids
+@csrf_exempt
+def restore_archived_tasks(request, workspace_id):
+    if request.method == "POST":
+        try:
+            data = loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "ids is required"}, status=400)
+
+        ids = data.get("ids") if isinstance(data, dict) else None
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            return JsonResponse({"error": "ids must be a list of task ids"}, status=400)
+        if len(ids) > settings.TASK_BULK_MAX_SIZE:
+            return JsonResponse(
+                {"error": f"At most {settings.TASK_BULK_MAX_SIZE} tasks can be restored at once"},
+                status=400,
+            )
 
+        try:
+            workspace = Workspace.objects.get(id=workspace_id)
+        except Workspace.DoesNotExist:
+            return JsonResponse({"error": "Workspace not found"}, status=404)
+
+        # Check if the authenticated user is a member of this workspace
+        payload = request.user
+        user_id = payload.get("id")
+
+        if not user_id:
+            return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+        if get_workspace_role(request, workspace.id) is None:
+            return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+        restored = {task.id for task in restore_tasks(workspace.id, ids)}
+        tasks = task_queryset().filter(id__in=restored)
         return JsonResponse(
             {
-                "id": task.id,
-                "name": task.name,
-                "description": task.description,
-                "priority": task.priority,
-                "status": task.status,
-                "assigned_to": assigned_to_data,
-                "created_at": task.created_at,
-                "updated_at": task.updated_at,
+                "tasks": [task_to_dict(task) for task in tasks],
+                "missing": sorted(set(ids) - restored),
             }
         )
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
\ No newline at end of file
+    return JsonResponse({"error": "Method not allowed"}, status=405)
@@ -0,0 +1,119 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+from backend.timing import current_timer
+
+logger = logging.getLogger("user.login")
+
+
+class LoginBusy(Exception):
+    """Raised when the login hashing pool cannot take more work."""
+
+
+class LoginHashExecutor:
+    """
+    Runs password hashing on a small dedicated thread pool so a burst of
+    logins cannot occupy every request worker's CPU. Work beyond
+    ``max_workers + max_queue`` outstanding jobs is refused with LoginBusy
+    without waiting, as is work still queued after ``timeout`` seconds.
+
+    The caller's request worker blocks until its job is done, so admission
+    must stay below the number of request workers: a storm of logins then
+    gets fast 503s instead of holding every worker, and everything else
+    keeps being served.
+
+    Sampled requests get their queue and hash time as "login_queue" and
+    "login_hash" Server-Timing phases. Refusals log the pool's stats() as
+    one JSON line to the "user.login" logger, at most every
+    ``log_interval`` seconds however many logins are refused.
+    """
+
+    log_interval = 10
+
+    def __init__(self, max_workers, max_queue, timeout):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="login-hash"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._next_log = 0.0
+        self._metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "queue_time_total": 0.0,
+            "queue_time_max": 0.0,
+        }
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self._record(rejected=1)
+            self._log_refusal("rejected")
+            raise LoginBusy("Too many concurrent logins")
+
+        submitted_at = time.monotonic()
+        self._record(submitted=1)
+
+        def job():
+            started_at = time.monotonic()
+            queue_time = started_at - submitted_at
+            try:
+                return fn(*args), queue_time, time.monotonic() - started_at
+            finally:
+                self._slots.release()
+                self._record(completed=1, queue_time=queue_time)
+
+        future = self._executor.submit(job)
+        try:
+            result, queue_time, hash_time = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                # The job never started, so it will not release its slot
+                self._slots.release()
+            self._record(timed_out=1)
+            self._log_refusal("timed_out")
+            raise LoginBusy("Login timed out waiting for a hashing slot")
+
+        timer = current_timer.get()
+        if timer is not None:
+            timer.add("login_queue", queue_time)
+            timer.add("login_hash", hash_time)
+        return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._metrics)
+        completed = stats["completed"]
+        stats["queue_time_avg"] = stats["queue_time_total"] / completed if completed else 0.0
+        return stats
+
+    def _log_refusal(self, reason):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_log:
+                return
+            self._next_log = now + self.log_interval
+        logger.warning(json.dumps({"event": f"login_{reason}", **self.stats()}))
+
+    def _record(self, queue_time=None, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                self._metrics[name] += value
+            if queue_time is not None:
+                self._metrics["queue_time_total"] += queue_time
+                self._metrics["queue_time_max"] = max(self._metrics["queue_time_max"], queue_time)
+
+
+login_executor = LoginHashExecutor(
+    getattr(settings, "LOGIN_HASH_WORKERS", 2),
+    getattr(settings, "LOGIN_HASH_QUEUE_SIZE", 2),
+    getattr(settings, "LOGIN_HASH_TIMEOUT", 1),
+)
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import ScryptPasswordHasher
+
+
+class FastScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Scrypt with PASSWORD_SCRYPT_PARALLELISM lanes instead of Django's 5.
+
+    Each lane is a full 16 MiB scrypt computation, run one after another,
+    so the lane count scales the work per hash for us and for anyone
+    guessing passwords from a leaked hash alike: one lane is a fifth of the
+    default cost. Memory per lane is unchanged. Hashes made with another
+    cost are rehashed at their owner's next login.
+    """
+
+    parallelism = getattr(settings, "PASSWORD_SCRYPT_PARALLELISM", ScryptPasswordHasher.parallelism)
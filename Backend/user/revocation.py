@@ -0,0 +1,92 @@
+import datetime
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RevokedToken
+
+
+class RevocationStore:
+    """
+    In-memory set of revoked token ids, mirrored from the RevokedToken table.
+
+    ``is_revoked`` is a set lookup; at most once per ``sync_interval`` seconds
+    a single indexed query pulls rows added by other processes since the last
+    sync. Ids are dropped from memory (and from the table, on revoke) once the
+    token itself has expired, so the set only ever holds live tokens.
+
+    A revocation takes effect at once in the process that made it; other
+    processes keep accepting the token until their next sync, i.e. for up to
+    ``sync_interval`` seconds. The sync runs on the request thread that finds
+    it due: one query on the primary key for the rows added since the last
+    one, which keeps the store free of threads and its view of the table
+    consistent with the request's connection.
+    """
+
+    def __init__(self, sync_interval):
+        self.sync_interval = sync_interval
+        self._revoked = set()
+        self._expiry_heap = []
+        self._last_synced_id = 0
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        now = time.time()
+        if now >= self._next_sync:
+            self.sync(now)
+        return jti in self._revoked
+
+    def revoke(self, jti, exp):
+        expires_at = datetime.datetime.fromtimestamp(exp, tz=datetime.timezone.utc)
+        # Rows for tokens that have expired on their own are no longer needed
+        RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        RevokedToken.objects.get_or_create(jti=jti, defaults={"expires_at": expires_at})
+        with self._lock:
+            self._add(jti, exp)
+
+    def sync(self, now=None):
+        if not self._lock.acquire(blocking=False):
+            # Another thread is already syncing
+            return
+        try:
+            now = now or time.time()
+            rows = (
+                RevokedToken.objects.filter(id__gt=self._last_synced_id)
+                .order_by("id")
+                .values_list("id", "jti", "expires_at")
+            )
+            for row_id, jti, expires_at in rows:
+                self._last_synced_id = row_id
+                exp = expires_at.timestamp()
+                if exp > now:
+                    self._add(jti, exp)
+            self._prune(now)
+            self._next_sync = now + self.sync_interval
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._expiry_heap.clear()
+            self._last_synced_id = 0
+            self._next_sync = 0.0
+
+    def _add(self, jti, exp):
+        if jti not in self._revoked:
+            self._revoked.add(jti)
+            heapq.heappush(self._expiry_heap, (exp, jti))
+
+    def _prune(self, now):
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry_heap)
+            self._revoked.discard(jti)
+
+
+revocation_store = RevocationStore(
+    getattr(settings, "TOKEN_REVOCATION_SYNC_INTERVAL", 5)
+)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password, verify_password
+from .executor import LoginBusy, login_executor
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -42,11 +43,28 @@ class LoginSerializer(serializers.Serializer):
                 f"The following fields are required: {', '.join(missing_fields)}"
             )
 
-        # Authenticate the user
-        user = authenticate(username=data['username'], password=data['password'])
+        # Authenticate the user; hashing runs on the bounded login pool
+        user = User.objects.filter(username=data['username']).first()
         if user is None:
+            # Hash anyway so unknown usernames cost as much as wrong passwords
+            login_executor.run(make_password, data['password'])
             raise serializers.ValidationError("Invalid username or password")
-        if not user.is_active:
-            raise serializers.ValidationError("This user account is inactive")
+
+        is_correct, must_update = login_executor.run(
+            verify_password, data['password'], user.password
+        )
+        # Inactive accounts fail like wrong passwords, as authenticate() does
+        if not is_correct or not user.is_active:
+            raise serializers.ValidationError("Invalid username or password")
+        if must_update:
+            # Transparently rehash with the preferred hasher. The password is
+            # already verified: with the pool full, log in now and rehash at
+            # a later login instead of failing it
+            try:
+                user.password = login_executor.run(make_password, data['password'])
+            except LoginBusy:
+                pass
+            else:
+                user.save(update_fields=["password"])
 
         return user
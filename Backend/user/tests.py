@@ -1,3 +1,284 @@
-from django.test import TestCase
+import datetime
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import jwt
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from backend.fastjson import dumps
+from .executor import LoginBusy, LoginHashExecutor, login_executor
+from .models import RevokedToken
+from .revocation import RevocationStore, revocation_store
+
+
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("member", "member@example.com", "pw12345!")
+
+    def login(self, password="pw12345!"):
+        return self.client.post(
+            "/user/login", dumps({"username": "member", "password": password}), content_type="application/json"
+        )
+
+    def test_login(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("token", response.json())
+
+    def test_inactive_account_gets_generic_error(self):
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        inactive = self.login()
+        wrong_password = self.login("wrong")
+        self.assertEqual(inactive.status_code, 401)
+        self.assertEqual(inactive.json(), wrong_password.json())
+
+    def test_full_pool_is_refused_at_once(self):
+        with mock.patch("user.serializers.login_executor.run", side_effect=LoginBusy):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+
+class LoginHashExecutorTests(SimpleTestCase):
+    def test_admission_is_refused_without_waiting(self):
+        executor = LoginHashExecutor(max_workers=1, max_queue=1, timeout=5)
+        release = threading.Event()
+        threads = [threading.Thread(target=executor.run, args=(release.wait,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        while executor.stats()["submitted"] < 2:
+            release.wait(0.001)
+        try:
+            with self.assertRaises(LoginBusy):
+                executor.run(lambda: None)
+        finally:
+            release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(executor.stats()["rejected"], 1)
+        self.assertIsNone(executor.run(lambda: None))
+
+
+class LegacyHashLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="legacy", password=make_password("pw12345!", hasher="pbkdf2_sha256"))
+
+    def login(self):
+        return self.client.post(
+            "/user/login", dumps({"username": "legacy", "password": "pw12345!"}), content_type="application/json"
+        )
+
+    def test_rehashed_with_the_preferred_hasher(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+
+    def test_full_pool_skips_the_rehash(self):
+        run = login_executor.run
+
+        def busy_after_verifying(fn, *args):
+            if fn is make_password:
+                raise LoginBusy("Too many concurrent logins")
+            return run(fn, *args)
+
+        with mock.patch.object(login_executor, "run", side_effect=busy_after_verifying):
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+
+class LoginMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("member", "member@example.com", "pw12345!")
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_server_timing_phases(self):
+        response = self.client.post(
+            "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+        )
+        self.assertRegex(response["Server-Timing"], r"login_queue;dur=[\d.]+, login_hash;dur=[\d.]+")
+
+    def test_refusals_log_the_pool_stats(self):
+        executor = LoginHashExecutor(max_workers=1, max_queue=0, timeout=5)
+        release = threading.Event()
+        thread = threading.Thread(target=executor.run, args=(release.wait,))
+        thread.start()
+        while executor.stats()["submitted"] < 1:
+            release.wait(0.001)
+        try:
+            with self.assertLogs("user.login", "WARNING") as logs:
+                for _ in range(3):
+                    with self.assertRaises(LoginBusy):
+                        executor.run(lambda: None)
+        finally:
+            release.set()
+            thread.join()
+        # One line per log_interval, not per refusal
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["event"], "login_rejected")
+        self.assertEqual(line["rejected"], 1)
+        self.assertIn("queue_time_max", line)
+
+
+class LoginStormTests(TransactionTestCase):
+    """
+    A burst of logins on a process with a fixed number of request workers:
+    logins past the hashing pool's admission are refused at once, so other
+    requests keep being served. Real hashing, in-process test clients.
+    """
+
+    REQUEST_WORKERS = 8
+    LOGINS = 200
+    API_CALLS = 50
+
+    def setUp(self):
+        User.objects.create_user("member", "member@example.com", "pw12345!")
+        response = self.client.post(
+            "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+        )
+        self.token = response.json()["token"]
+
+    def request(self, kind, submitted_at):
+        client = Client()
+        if kind == "login":
+            response = client.post(
+                "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+            )
+        else:
+            response = client.get("/user/me", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        connection.close()
+        return kind, response.status_code, time.perf_counter() - submitted_at
+
+    def test_storm(self):
+        kinds = ["login"] * self.LOGINS + ["api"] * self.API_CALLS
+        random.Random(0).shuffle(kinds)
+        with ThreadPoolExecutor(self.REQUEST_WORKERS) as workers:
+            futures = [workers.submit(self.request, kind, time.perf_counter()) for kind in kinds]
+            results = [future.result() for future in futures]
+
+        latencies = {"login": [], "api": []}
+        statuses = {"login": set(), "api": set()}
+        for kind, status, latency in results:
+            latencies[kind].append(latency)
+            statuses[kind].add(status)
+        p99 = {kind: sorted(values)[int(len(values) * 0.99) - 1] for kind, values in latencies.items()}
+
+        self.assertEqual(statuses["api"], {200})
+        self.assertLessEqual(statuses["login"], {200, 503})
+        self.assertIn(503, statuses["login"])
+        # Without admission control every request queues behind the hashes
+        # (API p99 of seconds); with it, well under one hash-queue's worth
+        self.assertLess(p99["api"], 1, p99)
+        self.assertLess(p99["login"], 1, p99)
+
+
+class LogoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("member", "member@example.com", "pw12345!")
+
+    def setUp(self):
+        revocation_store.clear()
+        revocation_store.sync()
+        response = self.client.post(
+            "/user/login", dumps({"username": "member", "password": "pw12345!"}), content_type="application/json"
+        )
+        self.token = response.json()["token"]
+
+    def me(self):
+        return self.client.get("/user/me", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def later(self, seconds):
+        return mock.patch("user.revocation.time.time", return_value=time.time() + seconds)
+
+    def test_logged_out_token_is_refused(self):
+        self.assertEqual(self.me().status_code, 200)
+        response = self.client.post("/user/logout", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(response.status_code, 200)
+        response = self.me()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "Token revoked"})
+
+    def test_revocation_by_another_process_is_seen_at_the_next_sync(self):
+        self.assertEqual(self.me().status_code, 200)
+        # Another process logs the token out: only the table changes here
+        jti = jwt.decode(self.token, options={"verify_signature": False})["jti"]
+        RevokedToken.objects.create(jti=jti, expires_at=timezone.now() + datetime.timedelta(days=1))
+
+        # Accepted until this process's sync is due
+        self.assertEqual(self.me().status_code, 200)
+        with self.later(revocation_store.sync_interval):
+            self.assertEqual(self.me().status_code, 401)
+
+
+class RevocationStoreTests(TestCase):
+    def setUp(self):
+        self.store = RevocationStore(sync_interval=5)
+        self.exp = time.time() + 3600
+
+    def later(self, seconds):
+        return mock.patch("user.revocation.time.time", return_value=time.time() + seconds)
+
+    def test_revoke(self):
+        self.store.revoke("a", self.exp)
+        self.assertTrue(self.store.is_revoked("a"))
+        self.assertFalse(self.store.is_revoked("b"))
+        self.assertTrue(RevokedToken.objects.filter(jti="a").exists())
+        # Revoking twice is harmless
+        self.store.revoke("a", self.exp)
+        self.assertEqual(RevokedToken.objects.filter(jti="a").count(), 1)
+
+    def test_stale_store_accepts_until_its_next_sync(self):
+        self.store.sync()
+        RevocationStore(sync_interval=5).revoke("a", self.exp)
+        self.assertFalse(self.store.is_revoked("a"))
+        with self.later(5):
+            self.assertTrue(self.store.is_revoked("a"))
+
+    def test_syncs_at_most_once_per_interval(self):
+        with self.assertNumQueries(1):
+            for _ in range(100):
+                self.store.is_revoked("a")
+        with self.later(5), self.assertNumQueries(1):
+            self.store.is_revoked("a")
+
+    def test_sync_only_reads_new_rows(self):
+        self.store.revoke("a", self.exp)
+        self.store.sync()
+        RevocationStore(sync_interval=5).revoke("b", self.exp)
+        with CaptureQueriesContext(connection) as queries:
+            self.store.sync()
+        self.assertTrue(self.store.is_revoked("b"))
+        self.assertIn('"id" >', queries[0]["sql"])
+
+    def test_expired_tokens_are_pruned(self):
+        self.store.revoke("a", time.time() + 10)
+        self.store.revoke("b", self.exp)
+        with self.later(10):
+            self.store.sync()
+            self.assertFalse(self.store.is_revoked("a"))
+            self.assertTrue(self.store.is_revoked("b"))
+        # The next revocation deletes rows whose token has expired
+        RevokedToken.objects.filter(jti="a").update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.store.revoke("c", self.exp)
+        self.assertEqual(set(RevokedToken.objects.values_list("jti", flat=True)), {"b", "c"})
+
+    def test_expired_rows_are_not_loaded(self):
+        RevokedToken.objects.create(jti="a", expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.store.sync()
+        self.assertFalse(self.store.is_revoked("a"))
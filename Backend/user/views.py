@@ -1,8 +1,11 @@
-from django.http import JsonResponse
+from backend.fastjson import JsonResponse, loads
 from django.views.decorators.csrf import csrf_exempt
 from .serializers import UserSerializer, LoginSerializer
 from django.contrib.auth.models import User
+from .revocation import revocation_store
+from .executor import LoginBusy
 import json
+import uuid
 import jwt, datetime
 
 
@@ -11,7 +14,7 @@ import jwt, datetime
 def register(request):
     if request.method == "POST":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             serializer = UserSerializer(data=data)
             if serializer.is_valid():
                 serializer.save()
@@ -32,7 +35,7 @@ def register(request):
 def login(request):
     if request.method == "POST":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             serializer = LoginSerializer(data=data)
             if serializer.is_valid():
                 user = serializer.validated_data
@@ -42,6 +45,7 @@ def login(request):
                     "email": user.email,
                     "exp": datetime.datetime.utcnow() + datetime.timedelta(days=1),
                     "iat": datetime.datetime.utcnow(),
+                    "jti": uuid.uuid4().hex,
                 }
 
                 token = jwt.encode(
@@ -59,6 +63,10 @@ def login(request):
                     }
                 }, status=200)
             return JsonResponse(serializer.errors, status=401)
+        except LoginBusy:
+            response = JsonResponse({"error": "Too many login attempts, please retry shortly"}, status=503)
+            response["Retry-After"] = "1"
+            return response
         except json.JSONDecodeError:
             return JsonResponse({"error": "Invalid data"}, status=400)
         except Exception as e:
@@ -94,7 +102,12 @@ def me(request):
 @csrf_exempt
 def logout(request):
     if request.method == "POST":
-        # Simulating the logout by instructing the client to delete the token on the client side.
+        # Revoke the token server-side so it stops working before it expires.
+        # Tokens issued before jti was introduced can only be discarded by the client.
+        payload = request.user
+        jti = payload.get("jti")
+        if jti and payload.get("exp"):
+            revocation_store.revoke(jti, payload["exp"])
         return JsonResponse({"message": "Logged out successfully. Please discard your token."}, status=200)
 
     else:
@@ -0,0 +1,179 @@
+import atexit
+import contextvars
+import datetime
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from board.models import Board
+from task.models import ArchivedTask, Task
+from .models import Activity
+
+# Activity feed
+#
+# Mutations don't write their feed entries themselves: an entry is queued
+# in memory once its transaction commits, and a background thread writes
+# the queue with one bulk_create when it reaches ACTIVITY_BATCH_SIZE
+# entries or every ACTIVITY_FLUSH_INTERVAL seconds, and once more at exit.
+# Requests add no write of their own to the database. Entries still queued
+# when a process is killed are lost; a feed can lag by one interval.
+
+# The user making the current request, set by JWTAuthenticationMiddleware
+current_actor = contextvars.ContextVar("current_actor", default=None)
+
+
+class ActivityBuffer:
+    """
+    Queues Activity rows and writes them in batches from one background
+    thread, started with the first entry. At most ``max_size`` entries are
+    kept while the database can't be written; the oldest are dropped.
+    """
+
+    def __init__(self, batch_size, flush_interval, max_size):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._entries = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._metrics = {"queued": 0, "written": 0, "dropped": 0, "flushes": 0, "failed_flushes": 0}
+
+    def add(self, entries):
+        with self._lock:
+            self._entries.extend(entries)
+            self._metrics["queued"] += len(entries)
+            overflow = len(self._entries) - self.max_size
+            if overflow > 0:
+                del self._entries[:overflow]
+                self._metrics["dropped"] += overflow
+            if len(self._entries) >= self.batch_size:
+                self._wake.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="activity-flush", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def flush(self):
+        """
+        Write every queued entry now, one transaction per batch so the
+        database's write lock is never held for long; returns how many
+        were written.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    entries = self._entries[: self.batch_size]
+                    del self._entries[: self.batch_size]
+                if not entries:
+                    return written
+                try:
+                    Activity.objects.bulk_create(entries)
+                except Exception:
+                    # Put them back in front of newer entries for the next flush
+                    with self._lock:
+                        self._entries[:0] = entries
+                        overflow = len(self._entries) - self.max_size
+                        if overflow > 0:
+                            del self._entries[:overflow]
+                            self._metrics["dropped"] += overflow
+                        self._metrics["failed_flushes"] += 1
+                    raise
+                with self._lock:
+                    self._metrics["written"] += len(entries)
+                    self._metrics["flushes"] += 1
+                written += len(entries)
+
+    def stats(self):
+        with self._lock:
+            return {**self._metrics, "pending": len(self._entries)}
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Retried next interval (e.g. the database was locked or restarting)
+                connection.close()
+
+
+activity_buffer = ActivityBuffer(
+    batch_size=settings.ACTIVITY_BATCH_SIZE,
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL,
+    max_size=settings.ACTIVITY_MAX_PENDING,
+)
+
+
+def record_activity(changes):
+    """
+    Queue a feed entry for each change (BoardChange-like objects with
+    workspace_id, board_id, kind, object_id and action), attributed to the
+    current user, once the current transaction commits.
+    """
+    if not settings.ACTIVITY_FEED_ENABLED:
+        return
+    actor_id = current_actor.get()
+    now = timezone.now()
+    entries = [
+        Activity(
+            workspace_id=change.workspace_id,
+            board_id=change.board_id,
+            actor_id=actor_id,
+            kind=change.kind,
+            object_id=change.object_id,
+            action=change.action,
+            created_at=now,
+        )
+        for change in changes
+    ]
+    if entries:
+        transaction.on_commit(lambda: activity_buffer.add(entries))
+
+
+def activity_to_dicts(entries):
+    """
+    Serialize a page of entries with their actor and the current name of
+    the board or task (archived tasks included; null once deleted).
+    """
+    actor_ids = {entry.actor_id for entry in entries if entry.actor_id is not None}
+    actors = dict(User.objects.filter(id__in=actor_ids).values_list("id", "username")) if actor_ids else {}
+    names = {"board": {}, "task": {}}
+    for kind, model in (("board", Board), ("task", Task)):
+        ids = {entry.object_id for entry in entries if entry.kind == kind}
+        if ids:
+            names[kind] = dict(model.objects.filter(id__in=ids).values_list("id", "name"))
+    archived = {entry.object_id for entry in entries if entry.kind == "task"} - set(names["task"])
+    if archived:
+        names["task"].update(ArchivedTask.objects.filter(id__in=archived).values_list("id", "name"))
+
+    return [
+        {
+            "id": entry.id,
+            "created_at": entry.created_at,
+            "actor": (
+                {"id": entry.actor_id, "username": actors.get(entry.actor_id)}
+                if entry.actor_id is not None
+                else None
+            ),
+            "action": entry.action,
+            "kind": entry.kind,
+            "object_id": entry.object_id,
+            "board_id": entry.board_id,
+            "name": names[entry.kind].get(entry.object_id),
+        }
+        for entry in entries
+    ]
+
+
+def prune_activity():
+    """Delete entries older than ACTIVITY_RETENTION_DAYS."""
+    cutoff = timezone.now() - datetime.timedelta(days=settings.ACTIVITY_RETENTION_DAYS)
+    deleted, _ = Activity.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
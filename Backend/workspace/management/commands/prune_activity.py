@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from workspace.activity import prune_activity
+
+
+class Command(BaseCommand):
+    help = "Delete activity feed entries older than the ACTIVITY_RETENTION_DAYS window"
+
+    def handle(self, *args, **options):
+        deleted = prune_activity()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} activit{'y' if deleted == 1 else 'ies'}"))
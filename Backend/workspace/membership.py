@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from backend.timing import phase
+
+from .models import UserWorkspace
+
+
+class MembershipCache:
+    """
+    Process-level LRU of ``user_id -> {workspace_id: role}`` maps.
+
+    Entries are dropped by the UserWorkspace signals in this process and also
+    expire after ``ttl`` seconds: a member removed through another worker
+    process keeps access in this one for up to ``ttl`` seconds. Checking a
+    revision on every hit would close that window, but at the price of a
+    query per request, which is what the cache is for.
+
+    A fill reads the database without the lock, so an invalidation can land
+    between its query and its ``set()``. Fills therefore take a ``version()``
+    before querying and pass it to ``set()``, which drops the roles if the
+    user was invalidated since. Invalidations are stamped from one counter;
+    only the latest ``max_size`` stamps are kept, and older ones fold into
+    a floor that any fill started before it must clear.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._invalidated = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            loaded_at, roles = entry
+            if time.monotonic() - loaded_at > self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return roles
+
+    def version(self):
+        """Stamp to pass to ``set()`` for roles read from now on."""
+        with self._lock:
+            return self._clock
+
+    def set(self, user_id, roles, version):
+        with self._lock:
+            if version < max(self._floor, self._invalidated.get(user_id, 0)):
+                # Invalidated while the roles were read: they may be stale
+                return
+            self._entries[user_id] = (time.monotonic(), roles)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._clock += 1
+            self._invalidated[user_id] = self._clock
+            self._invalidated.move_to_end(user_id)
+            while len(self._invalidated) > self.max_size:
+                _, stamp = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, stamp)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+            self._clock += 1
+            self._floor = self._clock
+
+
+membership_cache = MembershipCache(
+    getattr(settings, "WORKSPACE_ROLE_CACHE_SIZE", 10000),
+    getattr(settings, "WORKSPACE_ROLE_CACHE_TTL", 5),
+)
+
+
+def get_user_roles(request):
+    """Return the ``{workspace_id: role}`` map of the authenticated user."""
+    roles = getattr(request, "_workspace_roles", None)
+    if roles is not None:
+        return roles
+
+    user_id = request.user.get("id")
+    if not user_id:
+        return {}
+
+    with phase("membership"):
+        roles = membership_cache.get(user_id)
+        if roles is None:
+            version = membership_cache.version()
+            roles = dict(
+                UserWorkspace.objects.filter(user_id=user_id).values_list(
+                    "workspace_id", "role"
+                )
+            )
+            membership_cache.set(user_id, roles, version)
+
+    request._workspace_roles = roles
+    return roles
+
+
+def get_workspace_role(request, workspace_id):
+    """Return the authenticated user's role in a workspace, or None."""
+    return get_user_roles(request).get(workspace_id)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userworkspace',
+            index=models.Index(fields=['user', 'join_date', 'id'], name='userworkspace_user_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userworkspace',
+            index=models.Index(fields=['workspace', 'join_date', 'id'], name='userworkspace_ws_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workspace',
+            index=models.Index(fields=['created_at', 'id'], name='workspace_created_idx'),
+        ),
+    ]
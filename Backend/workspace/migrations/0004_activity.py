@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0003_workspace_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('workspace_id', models.IntegerField()),
+                ('board_id', models.IntegerField()),
+                ('actor_id', models.IntegerField(null=True)),
+                ('kind', models.CharField(max_length=5)),
+                ('object_id', models.IntegerField()),
+                ('action', models.CharField(max_length=7)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['workspace_id', 'created_at', 'id'], name='activity_ws_created_idx'), models.Index(fields=['created_at'], name='activity_created_idx')],
+            },
+        ),
+    ]
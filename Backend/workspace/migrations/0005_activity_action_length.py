@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspace', '0004_activity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activity',
+            name='action',
+            field=models.CharField(max_length=8),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Create your models here.
 
@@ -9,6 +10,14 @@ class Workspace(models.Model):
     name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every change to the workspace, its members, boards or tasks;
+    # drives ETags
+    revision = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="workspace_created_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -28,6 +37,11 @@ class UserWorkspace(models.Model):
 
     class Meta:
         unique_together = ("user", "workspace")
+        indexes = [
+            # Keyset pagination of a user's workspaces and a workspace's members
+            models.Index(fields=["user", "join_date", "id"], name="userworkspace_user_joined_idx"),
+            models.Index(fields=["workspace", "join_date", "id"], name="userworkspace_ws_joined_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.workspace.name} - {self.role}"
@@ -37,3 +51,29 @@ class UserWorkspace(models.Model):
     
     
 Workspace.users = models.ManyToManyField(User, through=UserWorkspace, related_name='workspaces')
+
+
+class Activity(models.Model):
+    """
+    Activity feed entry: who created, updated, moved or deleted a board or
+    task. Written in batches by workspace.activity, so ids follow flush
+    order; created_at is when the change was made. Workspaces, boards and
+    users are plain ids so entries outlive what they describe.
+    """
+    id = models.BigAutoField(primary_key=True)
+    workspace_id = models.IntegerField()
+    board_id = models.IntegerField()
+    actor_id = models.IntegerField(null=True)
+    kind = models.CharField(max_length=5)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=8)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["workspace_id", "created_at", "id"], name="activity_ws_created_idx"),
+            models.Index(fields=["created_at"], name="activity_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Activity {self.id}: user {self.actor_id} {self.action} {self.kind} {self.object_id}"
@@ -0,0 +1,7 @@
+from django.db.models import F
+
+from .models import Workspace
+
+
+def bump_workspace_revision(*workspace_ids):
+    Workspace.objects.filter(id__in=workspace_ids).update(revision=F("revision") + 1)
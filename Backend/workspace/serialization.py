@@ -0,0 +1,12 @@
+WORKSPACE_FIELDS = ("id", "name", "created_at", "updated_at")
+
+
+def workspace_to_dict(workspace, fields=None):
+    if fields is None:
+        fields = WORKSPACE_FIELDS
+    return {field: getattr(workspace, field) for field in fields}
+
+
+def workspace_columns(fields, prefix=""):
+    """Model columns to pass to only() for a workspace sparse fieldset."""
+    return {prefix + field for field in ("id", "revision", *fields)}
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .membership import membership_cache
+from .models import UserWorkspace, Workspace
+from .revisions import bump_workspace_revision
+
+
+@receiver(post_save, sender=UserWorkspace)
+@receiver(post_delete, sender=UserWorkspace)
+def invalidate_user_roles(sender, instance, **kwargs):
+    membership_cache.invalidate(instance.user_id)
+    # Again once committed: a fill in between may have read the old rows
+    transaction.on_commit(lambda: membership_cache.invalidate(instance.user_id))
+    bump_workspace_revision(instance.workspace_id)
+
+
+@receiver(pre_save, sender=Workspace)
+def increment_workspace_revision(sender, instance, **kwargs):
+    # Incremented in SQL so a stale in-memory value can never be written back
+    if not instance._state.adding:
+        instance.revision = F("revision") + 1
@@ -1,3 +1,276 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from board.tests import ApiTestCase, child_command
+from task.models import Task
+from .activity import ActivityBuffer
+from .membership import MembershipCache, get_workspace_role, membership_cache
+from .models import Activity, UserWorkspace, Workspace
+
+
+class MembershipCacheTests(SimpleTestCase):
+    def test_fill_after_invalidation_is_dropped(self):
+        cache = MembershipCache(max_size=10, ttl=60)
+        version = cache.version()
+        # The membership changes while the roles are being read
+        cache.invalidate(1)
+        cache.set(1, {1: "OWNER"}, version)
+        self.assertIsNone(cache.get(1))
+
+        cache.set(1, {1: "OWNER"}, cache.version())
+        self.assertEqual(cache.get(1), {1: "OWNER"})
+
+    def test_other_users_fill_normally(self):
+        cache = MembershipCache(max_size=10, ttl=60)
+        version = cache.version()
+        cache.invalidate(2)
+        cache.set(1, {1: "OWNER"}, version)
+        self.assertEqual(cache.get(1), {1: "OWNER"})
+
+    def test_forgotten_invalidations_still_drop_older_fills(self):
+        cache = MembershipCache(max_size=2, ttl=60)
+        version = cache.version()
+        for user_id in (1, 2, 3):
+            cache.invalidate(user_id)
+        # User 1's stamp was evicted into the floor
+        cache.set(1, {1: "OWNER"}, version)
+        self.assertIsNone(cache.get(1))
+
+    def test_clear_drops_fills_in_flight(self):
+        cache = MembershipCache(max_size=10, ttl=60)
+        version = cache.version()
+        cache.clear()
+        cache.set(1, {1: "OWNER"}, version)
+        self.assertIsNone(cache.get(1))
+
+
+class WorkspaceRoleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("member", "member@example.com", "pw12345!")
+        cls.workspace = Workspace.objects.create(name="Workspace")
+        UserWorkspace.objects.create(user=cls.user, workspace=cls.workspace)
+
+    def setUp(self):
+        membership_cache.clear()
+
+    def request(self):
+        request = RequestFactory().get("/")
+        request.user = {"id": self.user.id}
+        return request
+
+    def test_warm_cache_makes_no_queries(self):
+        get_workspace_role(self.request(), self.workspace.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_workspace_role(self.request(), self.workspace.id), "OWNER")
+            self.assertIsNone(get_workspace_role(self.request(), self.workspace.id + 1))
+
+    def test_removal_by_another_process_is_seen_within_the_ttl(self):
+        self.assertEqual(get_workspace_role(self.request(), self.workspace.id), "OWNER")
+        # Deleted behind this process's signals, as another process would
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM workspace_userworkspace WHERE user_id = %s", [self.user.id])
+        self.assertEqual(get_workspace_role(self.request(), self.workspace.id), "OWNER")
+        later = time.monotonic() + membership_cache.ttl + 0.1
+        with mock.patch("workspace.membership.time.monotonic", return_value=later):
+            self.assertIsNone(get_workspace_role(self.request(), self.workspace.id))
+
+    def test_membership_change_is_seen(self):
+        self.assertEqual(get_workspace_role(self.request(), self.workspace.id), "OWNER")
+        UserWorkspace.objects.filter(user=self.user).get().delete()
+        self.assertIsNone(get_workspace_role(self.request(), self.workspace.id))
+
+
+@override_settings(PAGE_SIZE=1)
+class MemberListPaginationTests(ApiTestCase):
+    def test_whole_list_without_limit_or_cursor(self):
+        response = self.request("get", f"/workspace/members/{self.workspace.id}")
+        self.assertEqual(len(response.json()), 2)
+        self.assertNotIn("X-Next-Cursor", response)
+
+    def test_pages_with_limit(self):
+        response = self.request("get", f"/workspace/members/{self.workspace.id}?limit=1")
+        self.assertEqual(len(response.json()), 1)
+        self.assertIn("X-Next-Cursor", response)
+
+
+class ActivityBufferTests(SimpleTestCase):
+    def setUp(self):
+        self.written = []
+        self.flushed = threading.Event()
+        patcher = mock.patch.object(Activity.objects, "bulk_create", side_effect=self.bulk_create)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def bulk_create(self, entries):
+        self.written.append([entry.object_id for entry in entries])
+        self.flushed.set()
+        return entries
+
+    def entries(self, *object_ids):
+        return [Activity(workspace_id=1, board_id=1, kind="task", object_id=i, action="updated") for i in object_ids]
+
+    def test_flushes_once_a_batch_is_queued(self):
+        buffer = ActivityBuffer(batch_size=3, flush_interval=60, max_size=100)
+        buffer.add(self.entries(1, 2))
+        self.assertFalse(self.flushed.wait(0.1))
+        buffer.add(self.entries(3))
+        self.assertTrue(self.flushed.wait(5))
+        self.assertEqual(self.written, [[1, 2, 3]])
+
+    def test_flushes_every_interval(self):
+        buffer = ActivityBuffer(batch_size=100, flush_interval=0.05, max_size=100)
+        buffer.add(self.entries(1))
+        self.assertTrue(self.flushed.wait(5))
+        self.assertEqual(self.written, [[1]])
+
+    def test_flush_writes_one_batch_at_a_time(self):
+        buffer = ActivityBuffer(batch_size=2, flush_interval=60, max_size=100)
+        buffer.add(self.entries(1, 2, 3))
+        deadline = time.monotonic() + 5
+        while buffer.stats()["written"] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.written, [[1, 2], [3]])
+
+    def test_failed_write_is_requeued_in_order(self):
+        buffer = ActivityBuffer(batch_size=100, flush_interval=60, max_size=100)
+        buffer.add(self.entries(1, 2))
+        with mock.patch.object(Activity.objects, "bulk_create", side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+        buffer.add(self.entries(3))
+        self.assertEqual(buffer.stats()["pending"], 3)
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(self.written, [[1, 2, 3]])
+        self.assertEqual(buffer.stats()["failed_flushes"], 1)
+
+    def test_oldest_entries_are_dropped_past_max_pending(self):
+        buffer = ActivityBuffer(batch_size=100, flush_interval=60, max_size=3)
+        buffer.add(self.entries(1, 2))
+        with mock.patch.object(Activity.objects, "bulk_create", side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+        buffer.add(self.entries(3, 4, 5))
+        self.assertEqual(buffer.stats()["dropped"], 2)
+        buffer.flush()
+        self.assertEqual(self.written, [[3, 4, 5]])
+
+
+class ActivityFeedTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        # A buffer whose thread never flushes on its own, flushed by the test
+        self.buffer = ActivityBuffer(batch_size=1000, flush_interval=3600, max_size=1000)
+        patcher = mock.patch("workspace.activity.activity_buffer", self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        Activity.objects.all().delete()
+
+    def write(self, method, url, body=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request(method, url, body)
+        self.assertIn(response.status_code, (200, 201), response.content)
+        self.buffer.flush()
+        return response
+
+    def feed(self, query=""):
+        return self.request("get", f"/workspace/activity/{self.workspace.id}{query}")
+
+    def test_newest_first_with_names(self):
+        task = Task.objects.filter(board=self.board).order_by("id").first()
+        self.write("patch", f"/task/update/{self.board.id}/t/{task.id}", {"name": "Renamed"})
+        response = self.write("post", f"/task/create/{self.board.id}", {"name": "New", "priority": "low"})
+        created = response.json()["task"]
+        self.write("delete", f"/task/delete/{self.board.id}/t/{created['id']}")
+
+        entries = self.feed().json()
+        self.assertEqual(
+            [(entry["action"], entry["object_id"]) for entry in entries],
+            [("deleted", created["id"]), ("created", created["id"]), ("updated", task.id)],
+        )
+        self.assertEqual(entries[-1]["name"], "Renamed")
+        self.assertEqual(entries[-1]["actor"], {"id": self.user.id, "username": "member"})
+        # Deleted tasks keep their entries, without a name
+        self.assertIsNone(entries[0]["name"])
+        self.assertIsNone(entries[1]["name"])
+
+    def test_pages(self):
+        for i in range(5):
+            self.write("patch", f"/board/update/{self.board.id}", {"name": f"Board {i}"})
+        first = self.feed("?limit=2")
+        self.assertEqual(len(first.json()), 2)
+        rest = self.feed(f"?cursor={first['X-Next-Cursor']}").json()
+        ids = [entry["id"] for entry in first.json() + rest]
+        self.assertEqual(ids, sorted(Activity.objects.values_list("id", flat=True), reverse=True))
+
+    def test_other_workspace(self):
+        workspace = Workspace.objects.create(name="Other")
+        self.assertEqual(self.request("get", f"/workspace/activity/{workspace.id}").status_code, 403)
+
+
+# Read the workspace, say "ready", wait for a line on stdin, then read it
+# again at once and after the role cache's TTL, printing the statuses
+HOLD_SCRIPT = """
+import logging, time
+from workspace.membership import membership_cache
+
+logging.getLogger("django.request").setLevel(logging.ERROR)
+# A shorter window than WORKSPACE_ROLE_CACHE_TTL, for a quicker test
+membership_cache.ttl = 1
+client = Client()
+body = json.dumps({"username": "member", "password": "pw12345!"})
+token = client.post("/user/login", body, content_type="application/json").json()["token"]
+url = f"/workspace/{Workspace.objects.get().id}"
+headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+assert client.get(url, **headers).status_code == 200
+print("ready", flush=True)
+sys.stdin.readline()
+statuses = [client.get(url, **headers).status_code]
+time.sleep(membership_cache.ttl)
+statuses.append(client.get(url, **headers).status_code)
+print(json.dumps(statuses), flush=True)
+"""
+
+REMOVE_SCRIPT = """
+UserWorkspace.objects.filter(user__username="member").delete()
+"""
+
+
+class MembershipCrossProcessTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = os.path.join(directory.name, "membership.sqlite3")
+        subprocess.run(child_command("", "build", self.database), cwd=settings.BASE_DIR, check=True)
+
+    def test_removal_takes_effect_in_another_process(self):
+        holder = subprocess.Popen(
+            child_command(HOLD_SCRIPT, "hold", self.database),
+            cwd=settings.BASE_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            self.assertEqual(holder.stdout.readline().strip(), "ready")
+            subprocess.run(child_command(REMOVE_SCRIPT, "remove", self.database), cwd=settings.BASE_DIR, check=True)
+            holder.stdin.write("\n")
+            holder.stdin.flush()
+            statuses = json.loads(holder.stdout.readline())
+            self.assertEqual(holder.wait(10), 0)
+        finally:
+            holder.kill()
+            holder.stdin.close()
+            holder.stdout.close()
+        # Still cached right after, refused once the TTL has passed
+        self.assertEqual(statuses, [200, 403])
@@ -1,6 +1,8 @@
 from django.urls import path
 from .views import (
     get_workspaces,
+    get_workspace_changes,
+    get_workspace_activity,
     create_workspace,
     update_workspace,
     delete_workspace,
@@ -16,6 +18,8 @@ urlpatterns = [
     path("user", get_user_workspaces, name="get_user_workspaces"),  # New endpoint
     path("<int:workspace_id>", get_workspace_by_id, name="get_workspace_by_id"),
     path("members/<int:workspace_id>",get_workspace_members,name="get_workspace_members"),
+    path("changes/<int:workspace_id>", get_workspace_changes, name="get_workspace_changes"),
+    path("activity/<int:workspace_id>", get_workspace_activity, name="get_workspace_activity"),
     path("create", create_workspace, name="create_workspace"),
     path("update/<int:workspace_id>", update_workspace, name="update_workspace"),
     path("delete/<int:workspace_id>", delete_workspace, name="delete_workspace"),
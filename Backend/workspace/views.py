@@ -1,8 +1,19 @@
-from django.http import JsonResponse
+from django.db import transaction
+from backend.fastjson import JsonResponse, loads
 from .models import Workspace
 from django.views.decorators.csrf import csrf_exempt
 import json
 from workspace.models import UserWorkspace
+from workspace.membership import get_workspace_role
+from board.changes import CursorExpired, workspace_changes
+from workspace.activity import activity_to_dicts
+from workspace.models import Activity
+from board.counters import get_workspace_task_counts
+from workspace.serialization import WORKSPACE_FIELDS, workspace_columns, workspace_to_dict
+from backend.conditional import not_modified, revision_etag, with_etag
+from backend.fieldsets import InvalidFieldset, requested_fields
+from backend.pagination import InvalidPage, get_page_limit, keyset_page, paginated_response
+from backend.streaming import encode, json_array, streaming_json_response
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
@@ -12,17 +23,29 @@ from django.core.exceptions import ValidationError
 
 def get_workspaces(request):
     try:
-        workspaces = Workspace.objects.all()
-        data = [
-            {
-                "id": workspace.id,
-                "name": workspace.name,
-                "created_at": workspace.created_at,
-                "updated_at": workspace.updated_at,
-            }
-            for workspace in workspaces
-        ]
-        return JsonResponse(data, safe=False)
+        try:
+            fields = requested_fields(request, WORKSPACE_FIELDS)
+            workspaces = Workspace.objects.all()
+            if fields is not None:
+                workspaces = workspaces.only("created_at", *workspace_columns(fields))
+
+            # ?stream=1 streams every workspace (no pagination)
+            if request.GET.get("stream") == "1":
+                workspaces = workspaces.order_by("created_at", "id").iterator(chunk_size=1000)
+                return streaming_json_response(
+                    json_array(encode(workspace_to_dict(workspace, fields)) for workspace in workspaces)
+                )
+
+            workspaces, next_cursor = keyset_page(
+                workspaces,
+                ("created_at", "id"),
+                get_page_limit(request, optional=True),
+                request.GET.get("cursor"),
+            )
+        except (InvalidPage, InvalidFieldset) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        data = [workspace_to_dict(workspace, fields) for workspace in workspaces]
+        return paginated_response(request, data, next_cursor)
     except Exception as e:
         return JsonResponse({"error": e}, status=400)
 
@@ -32,7 +55,19 @@ def get_workspaces(request):
 
 def get_workspace_by_id(request, workspace_id):
     try:
-        workspace = Workspace.objects.get(id=workspace_id)
+        fields = requested_fields(request, WORKSPACE_FIELDS + ("task_counts",))
+    except InvalidFieldset as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    workspace_fields = None
+    if fields is not None:
+        workspace_fields = tuple(field for field in fields if field != "task_counts")
+
+    try:
+        workspaces = Workspace.objects.all()
+        if fields is not None:
+            workspaces = workspaces.only(*workspace_columns(workspace_fields))
+        workspace = workspaces.get(id=workspace_id)
     except Workspace.DoesNotExist:
         return JsonResponse({"error": "Workspace not found"}, status=404)
 
@@ -43,23 +78,19 @@ def get_workspace_by_id(request, workspace_id):
     if not user_id:
         return JsonResponse({"error": "User ID not found in token"}, status=400)
 
-    try:
-        user = User.objects.get(id=user_id)
-        # Check if user is a member of this workspace
-        user_workspace = UserWorkspace.objects.get(workspace=workspace, user=user)
-    except User.DoesNotExist:
-        return JsonResponse({"error": "User not found"}, status=404)
-    except UserWorkspace.DoesNotExist:
+    # Check if user is a member of this workspace
+    if get_workspace_role(request, workspace.id) is None:
         return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
 
-    return JsonResponse(
-        {
-            "id": workspace.id,
-            "name": workspace.name,
-            "created_at": workspace.created_at,
-            "updated_at": workspace.updated_at,
-        }
-    )
+    etag = revision_etag(request, "workspace", workspace.id, workspace.revision)
+    response = not_modified(request, etag)
+    if response:
+        return response
+
+    data = workspace_to_dict(workspace, workspace_fields)
+    if fields is None or "task_counts" in fields:
+        data["task_counts"] = get_workspace_task_counts(workspace.id)
+    return with_etag(JsonResponse(data), etag)
 
 
 # Get workspace members
@@ -80,18 +111,24 @@ def get_workspace_members(request, workspace_id):
         if not user_id:
             return JsonResponse({"error": "User ID not found in token"}, status=400)
 
-        try:
-            user = User.objects.get(id=user_id)
-            # Check if user is a member of this workspace
-            user_workspace = UserWorkspace.objects.get(workspace=workspace, user=user)
-        except User.DoesNotExist:
-            return JsonResponse({"error": "User not found"}, status=404)
-        except UserWorkspace.DoesNotExist:
+        # Check if user is a member of this workspace
+        if get_workspace_role(request, workspace.id) is None:
             return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
 
-        user_workspaces = UserWorkspace.objects.filter(
-            workspace=workspace
-        ).select_related("user")
+        etag = revision_etag(request, "members", workspace.id, workspace.revision)
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        try:
+            user_workspaces, next_cursor = keyset_page(
+                UserWorkspace.objects.filter(workspace=workspace).select_related("user"),
+                ("join_date", "id"),
+                get_page_limit(request, optional=True),
+                request.GET.get("cursor"),
+            )
+        except InvalidPage as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
         members = []
         for user_workspace in user_workspaces:
@@ -109,17 +146,66 @@ def get_workspace_members(request, workspace_id):
             }
             members.append(member_info)
 
-        return JsonResponse(members, safe=False, status=200)
+        return with_etag(paginated_response(request, members, next_cursor), etag)
     else:
         return JsonResponse({"error": "Method not allowed"}, status=405)
 
 
+# Get the boards and tasks changed since a sync cursor
+# the url pattern is /workspace/changes/<int:workspace_id>?since=<cursor>
+# without since every board and task is returned with the first cursor
+def get_workspace_changes(request, workspace_id):
+    try:
+        workspace = Workspace.objects.get(id=workspace_id)
+    except Workspace.DoesNotExist:
+        return JsonResponse({"error": "Workspace not found"}, status=404)
+
+    # Check if the authenticated user is a member of this workspace
+    payload = request.user
+    user_id = payload.get("id")
+
+    if not user_id:
+        return JsonResponse({"error": "User ID not found in token"}, status=400)
+
+    if get_workspace_role(request, workspace.id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    try:
+        data = workspace_changes(workspace.id, request.GET.get("since"))
+    except InvalidPage as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except CursorExpired as e:
+        return JsonResponse({"error": str(e), "resync": True}, status=410)
+
+    return JsonResponse(data)
+
+
+# Get the activity feed of a workspace, newest first
+# the url pattern is /workspace/activity/<workspace_id>?limit=N&cursor=...
+
+
+def get_workspace_activity(request, workspace_id):
+    if get_workspace_role(request, workspace_id) is None:
+        return JsonResponse({"error": "You do not have permission to access this workspace"}, status=403)
+
+    try:
+        entries, next_cursor = keyset_page(
+            Activity.objects.filter(workspace_id=workspace_id),
+            ("-created_at", "-id"),
+            get_page_limit(request),
+            request.GET.get("cursor"),
+        )
+    except InvalidPage as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return paginated_response(request, activity_to_dicts(entries), next_cursor)
+
+
 # Create new workspace
 @csrf_exempt
 def create_workspace(request):
     if request.method == "POST":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             name = data.get("name")
 
         except json.JSONDecodeError:
@@ -160,7 +246,7 @@ def create_workspace(request):
 def update_workspace(request, workspace_id):
     if request.method == "PUT":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             name = data.get("name")
 
         except json.JSONDecodeError:
@@ -175,7 +261,9 @@ def update_workspace(request, workspace_id):
             return JsonResponse({"error": "Workspace not found"}, status=404)
 
         workspace.name = name
-        workspace.save()
+        # Saved atomically with the board snapshots that embed the workspace
+        with transaction.atomic():
+            workspace.save()
 
         return JsonResponse(
             {
@@ -211,7 +299,7 @@ def add_member_to_workspace(request, workspace_id):
     if request.method == "PUT":
         try:
             # Parse the JSON body
-            data = json.loads(request.body)
+            data = loads(request.body)
             email = data.get("email")
             role = data.get("role")
 
@@ -226,18 +314,13 @@ def add_member_to_workspace(request, workspace_id):
                 return JsonResponse({"error": "Invalid role"}, status=400)
 
             # Fetch the workspace
-            payload = request.user
-            user_id = payload.get("id")
-            user = User.objects.get(id=user_id)
-
             try:
                 workspace = Workspace.objects.get(id=workspace_id)
             except Workspace.DoesNotExist:
                 return JsonResponse({"error": "Workspace not found"}, status=404)
 
             # Check if the authenticated user is the owner of the workspace
-            user_workspace = UserWorkspace.objects.get(workspace=workspace, user=user)
-            if user_workspace.role != "OWNER":
+            if get_workspace_role(request, workspace.id) != "OWNER":
                 return JsonResponse(
                     {
                         "error": "You do not have permission to add members to this workspace"
@@ -300,22 +383,20 @@ def delete_member_from_workspace(request, workspace_id, user_id):
 
             # Authenticated user (must be OWNER)
             payload = request.user
-            current_user = User.objects.get(id=payload.get("id"))
+            current_user_id = payload.get("id")
 
             # Check if the current user is the OWNER
-            owner_link = UserWorkspace.objects.get(user=current_user, workspace=workspace)
-            if owner_link.role != "OWNER":
+            if get_workspace_role(request, workspace.id) != "OWNER":
                 return JsonResponse({"error": "Only the owner can remove members."}, status=403)
 
             # Can't remove the owner
-            if user_id == current_user.id:
+            if user_id == current_user_id:
                 return JsonResponse({"error": "Owner cannot remove themselves."}, status=400)
 
             # Check if the user is part of the workspace
             try:
-                user_to_remove = User.objects.get(id=user_id)
-                link = UserWorkspace.objects.get(user=user_to_remove, workspace=workspace)
-            except (User.DoesNotExist, UserWorkspace.DoesNotExist):
+                link = UserWorkspace.objects.get(user_id=user_id, workspace=workspace)
+            except UserWorkspace.DoesNotExist:
                 return JsonResponse({"error": "User not found in workspace."}, status=404)
 
             # Remove the member
@@ -339,19 +420,14 @@ def delete_workspace(request, workspace_id):
         try:
             workspace = Workspace.objects.get(id=workspace_id)
 
-            # Authenticated user (assume payload injected by middleware/auth)
-            payload = request.user
-            user = User.objects.get(id=payload.get("id"))
-
             # Check if user is OWNER of the workspace
-            try:
-                user_workspace = UserWorkspace.objects.get(user=user, workspace=workspace)
-                if user_workspace.role != "OWNER":
-                    return JsonResponse(
-                        {"error": "Only the owner can delete the workspace."}, status=403
-                    )
-            except UserWorkspace.DoesNotExist:
+            role = get_workspace_role(request, workspace.id)
+            if role is None:
                 return JsonResponse({"error": "You are not a member of this workspace."}, status=403)
+            if role != "OWNER":
+                return JsonResponse(
+                    {"error": "Only the owner can delete the workspace."}, status=403
+                )
 
             # Delete the workspace
             workspace.delete()
@@ -376,20 +452,33 @@ def get_user_workspaces(request):
             return JsonResponse({"error": "User ID not found in token"}, status=400)
 
         # Get user's workspaces through UserWorkspace
-        user_workspaces = UserWorkspace.objects.filter(user_id=user_id).select_related('workspace')
+        try:
+            fields = requested_fields(request, WORKSPACE_FIELDS + ("role",))
+            user_workspaces = UserWorkspace.objects.filter(user_id=user_id).select_related('workspace')
+            workspace_fields = None
+            if fields is not None:
+                workspace_fields = tuple(field for field in fields if field != "role")
+                user_workspaces = user_workspaces.only(
+                    "id", "join_date", "role", "workspace",
+                    *workspace_columns(workspace_fields, prefix="workspace__"),
+                )
+            user_workspaces, next_cursor = keyset_page(
+                user_workspaces,
+                ("join_date", "id"),
+                get_page_limit(request, optional=True),
+                request.GET.get("cursor"),
+            )
+        except (InvalidPage, InvalidFieldset) as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
         # Extract workspace data
-        data = [
-            {
-                "id": user_workspace.workspace.id,
-                "name": user_workspace.workspace.name,
-                "created_at": user_workspace.workspace.created_at,
-                "updated_at": user_workspace.workspace.updated_at,
-                "role": user_workspace.role
-            }
-            for user_workspace in user_workspaces
-        ]
+        data = []
+        for user_workspace in user_workspaces:
+            item = workspace_to_dict(user_workspace.workspace, workspace_fields)
+            if fields is None or "role" in fields:
+                item["role"] = user_workspace.role
+            data.append(item)
 
-        return JsonResponse(data, safe=False)
+        return paginated_response(request, data, next_cursor)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)